@@ -0,0 +1,38 @@
+"""Add content_versions table
+
+Revision ID: add_content_versions
+Revises: 7ef80420a8d6
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_content_versions'
+down_revision = '7ef80420a8d6'
+branch_labels = None
+depends_on = None
+
+
+CONTENT_NAMESPACES = [
+    'settings', 'navigation', 'pages', 'blog', 'events', 'gallery',
+    'testimonials', 'documents', 'departments', 'branches',
+]
+
+
+def upgrade():
+    # One version counter per kind of public content, used for cross-worker cache invalidation
+    content_versions = op.create_table(
+        'content_versions',
+        sa.Column('namespace', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('namespace')
+    )
+    op.bulk_insert(content_versions, [{'namespace': namespace, 'version': 0} for namespace in CONTENT_NAMESPACES])
+
+
+def downgrade():
+    op.drop_table('content_versions')
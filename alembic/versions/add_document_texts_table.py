@@ -0,0 +1,40 @@
+"""Add document_texts table
+
+Revision ID: add_document_texts
+Revises: add_search_index
+Create Date: 2026-10-17 12:00:00.000000
+
+Existing documents can be processed with:
+    python -m manage extract-document-text
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_document_texts'
+down_revision = 'add_search_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'document_texts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('file_url', sa.String(length=500), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('text', sa.Text().with_variant(mysql.LONGTEXT(), 'mysql'), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('extracted_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('document_id'),
+    )
+    op.create_index(op.f('ix_document_texts_id'), 'document_texts', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_document_texts_id'), table_name='document_texts')
+    op.drop_table('document_texts')
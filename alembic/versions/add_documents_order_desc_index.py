@@ -0,0 +1,34 @@
+"""Index documents by (is_visible, order, created_at DESC)
+
+Revision ID: add_documents_order_desc_index
+Revises: add_document_texts
+Create Date: 2026-10-17 12:00:00.000000
+
+The documents list orders by order ASC, created_at DESC; with an all-ascending
+index the database still sorted each page. MySQL only honours DESC index
+columns from 8.0 (older versions ignore it and behave as before).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_documents_order_desc_index'
+down_revision = 'add_document_texts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_documents_is_visible_order_created_at_desc', 'documents',
+        ['is_visible', 'order', sa.text('created_at DESC')], unique=False,
+    )
+    op.drop_index('ix_documents_is_visible_order_created_at', table_name='documents')
+
+
+def downgrade():
+    op.create_index(
+        'ix_documents_is_visible_order_created_at', 'documents', ['is_visible', 'order', 'created_at'], unique=False,
+    )
+    op.drop_index('ix_documents_is_visible_order_created_at_desc', table_name='documents')
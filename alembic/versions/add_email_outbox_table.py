@@ -0,0 +1,44 @@
+"""Add email_outbox table
+
+Revision ID: add_email_outbox
+Revises: add_jobs_table
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_email_outbox'
+down_revision = 'add_jobs_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'email_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('idempotency_key', sa.String(length=100), nullable=False),
+        sa.Column('kind', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.Column('digest_size', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('idempotency_key')
+    )
+    op.create_index(op.f('ix_email_outbox_id'), 'email_outbox', ['id'], unique=False)
+    op.create_index('ix_email_outbox_status_next_attempt_at', 'email_outbox', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_email_outbox_status_next_attempt_at', table_name='email_outbox')
+    op.drop_index(op.f('ix_email_outbox_id'), table_name='email_outbox')
+    op.drop_table('email_outbox')
@@ -0,0 +1,43 @@
+"""Add jobs table for the background job queue
+
+Revision ID: add_jobs_table
+Revises: add_stored_file_variants
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_jobs_table'
+down_revision = 'add_stored_file_variants'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_at', sa.DateTime(), nullable=False),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_jobs_id'), 'jobs', ['id'], unique=False)
+    op.create_index('ix_jobs_type_status_run_at', 'jobs', ['type', 'status', 'run_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_jobs_type_status_run_at', table_name='jobs')
+    op.drop_index(op.f('ix_jobs_id'), table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,39 @@
+"""Add composite indexes for API list queries
+
+Revision ID: add_query_indexes
+Revises: add_content_versions
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_query_indexes'
+down_revision = 'add_content_versions'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns) - each matches the WHERE / ORDER BY of a list endpoint
+INDEXES = [
+    ('ix_blog_posts_created_at_id', 'blog_posts', ['created_at', 'id']),
+    ('ix_contact_messages_created_at_id', 'contact_messages', ['created_at', 'id']),
+    ('ix_events_date_id', 'events', ['date', 'id']),
+    ('ix_gallery_images_created_at_id', 'gallery_images', ['created_at', 'id']),
+    ('ix_gallery_images_category_created_at_id', 'gallery_images', ['category', 'created_at', 'id']),
+    ('ix_testimonials_is_active_order', 'testimonials', ['is_active', 'order']),
+    ('ix_documents_is_visible_order_created_at', 'documents', ['is_visible', 'order', 'created_at']),
+    ('ix_navigation_items_is_active_order', 'navigation_items', ['is_active', 'order']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
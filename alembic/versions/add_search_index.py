@@ -0,0 +1,60 @@
+"""Add full-text search index
+
+Revision ID: add_search_index
+Revises: add_email_outbox
+Create Date: 2026-10-17 12:00:00.000000
+
+The table uses each dialect's full-text facility, so it is created with
+dialect-specific DDL (see search.py). Fill it afterwards with:
+    python -m manage rebuild-search-index
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_search_index'
+down_revision = 'add_email_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE search_index USING fts5("
+            "kind UNINDEXED, ref_id UNINDEXED, page UNINDEXED, title, body, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        return
+
+    op.create_table(
+        'search_index',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('ref_id', sa.Integer(), nullable=False),
+        sa.Column('page', sa.String(length=50), nullable=True),
+        sa.Column('title', sa.Text(), nullable=True),
+        sa.Column('body', sa.Text().with_variant(mysql.LONGTEXT(), 'mysql'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        mysql_engine='InnoDB',
+    )
+    op.create_index('ix_search_index_kind_ref_id', 'search_index', ['kind', 'ref_id'], unique=False)
+    if dialect == 'mysql':
+        op.execute("CREATE FULLTEXT INDEX ix_search_index_fulltext ON search_index (title, body)")
+    elif dialect == 'postgresql':
+        # Titles rank above body text; the text search configuration must match search.PG_TEXT_SEARCH_CONFIG
+        op.execute(
+            "ALTER TABLE search_index ADD COLUMN document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(body, '')), 'B')) STORED"
+        )
+        op.execute("CREATE INDEX ix_search_index_document ON search_index USING GIN (document)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        op.drop_index('ix_search_index_kind_ref_id', table_name='search_index')
+    op.drop_table('search_index')
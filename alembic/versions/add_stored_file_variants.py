@@ -0,0 +1,25 @@
+"""Add variants column to stored_files
+
+Revision ID: add_stored_file_variants
+Revises: add_stored_files
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_stored_file_variants'
+down_revision = 'add_stored_files'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # JSON map of format -> srcset; existing images can be processed with: python -m manage generate-variants
+    op.add_column('stored_files', sa.Column('variants', sa.Text(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('stored_files', 'variants')
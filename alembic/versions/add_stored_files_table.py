@@ -0,0 +1,36 @@
+"""Add stored_files table for content-addressed uploads
+
+Revision ID: add_stored_files
+Revises: add_query_indexes
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_stored_files'
+down_revision = 'add_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Reference-counted index of uploads stored under their SHA-256 digest.
+    # Existing files can be moved into it with: python -m manage dedupe-uploads
+    op.create_table(
+        'stored_files',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('url', sa.String(length=255), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=True),
+        sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('sha256'),
+        sa.UniqueConstraint('url')
+    )
+
+
+def downgrade():
+    op.drop_table('stored_files')
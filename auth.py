@@ -2,8 +2,12 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from passlib.context import CryptContext
 from config import settings
+import asyncio
+import multiprocessing
+import threading
 
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 security = HTTPBearer()
@@ -16,6 +20,53 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
     return pwd_context.verify(plain_password, hashed_password)
 
+# argon2 is deliberately slow, so logins verify on their own bounded pool instead of
+# the threadpool that serves every other sync endpoint
+_hash_executor = None
+_hash_executor_lock = threading.Lock()
+_hash_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_LIMIT)
+
+def _get_hash_executor():
+    """Create the password hashing executor on first use"""
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            if settings.PASSWORD_HASH_EXECUTOR.lower() == "process":
+                # Spawn rather than fork: forking this multithreaded server can copy held locks
+                _hash_executor = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                _hash_executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+                )
+        return _hash_executor
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the password hashing pool.
+    Raises 429 when PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT verifications are already in flight.
+    """
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts in progress, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), verify_password, plain_password, hashed_password)
+    finally:
+        _hash_slots.release()
+
+def shutdown_password_executor():
+    """Stop the password hashing pool (called on app shutdown)"""
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=False, cancel_futures=True)
+            _hash_executor = None
+
 def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
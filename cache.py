@@ -0,0 +1,188 @@
+"""
+In-process cache for public CMS content (settings, navigation, pages)
+
+Each worker keeps its own cache. Writes bump a row in the content_versions
+table in the same transaction, and every worker polls that table so an
+admin edit on one worker invalidates the caches of all the others.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models import ContentVersion
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a fixed TTL.
+
+    Keys are tuples whose first element is a namespace (e.g. ("pages", "home")),
+    so writes can drop every entry belonging to one kind of content at once.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Invalidation counters (per namespace, and for clearing everything), see generation()
+        self._generations: Dict[Hashable, int] = {}
+        self._cleared = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def generation(self, key: Hashable) -> tuple:
+        """
+        A token that changes whenever key's namespace is invalidated. Take it
+        before loading a value and pass it to set(), so a value loaded before
+        a write committed is not stored after that write's invalidation.
+        """
+        with self._lock:
+            return self._cleared, self._generations.get(_namespace(key), 0)
+
+    def set(self, key: Hashable, value: Any, generation: Optional[tuple] = None) -> Any:
+        """
+        Store value under key (evicting the least recently used entry) and return it.
+        With a generation from generation(), value is only stored if key's
+        namespace has not been invalidated since.
+        """
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return value
+        with self._lock:
+            if generation is not None and generation != (self._cleared, self._generations.get(_namespace(key), 0)):
+                return value
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def invalidate(self, *namespaces: str) -> None:
+        """Drop all entries in the given namespaces, or everything if none are given"""
+        with self._lock:
+            if not namespaces:
+                self._cleared += 1
+                self._data.clear()
+                return
+            for namespace in namespaces:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            for key in [k for k in self._data if _namespace(k) in namespaces]:
+                del self._data[key]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def _namespace(key: Hashable) -> Hashable:
+    return key[0] if isinstance(key, tuple) else key
+
+
+content_cache = TTLCache(maxsize=settings.CACHE_MAX_ENTRIES, ttl=settings.CACHE_TTL_SECONDS)
+
+# Entries built from several kinds of content (e.g. /api/bootstrap) are dropped on any write
+AGGREGATE_NAMESPACES = ("bootstrap",)
+
+_known_versions: Dict[str, int] = {}
+_synced_once = False
+_last_sync = 0.0
+_sync_lock = threading.Lock()
+
+
+def bump_content_version(db: Session, *namespaces: str) -> None:
+    """
+    Increment the version of the given namespaces inside the caller's transaction.
+    Call this before db.commit() in every handler that writes public content.
+    Local cache entries are dropped once the transaction commits.
+    """
+    for namespace in namespaces:
+        updated = db.query(ContentVersion).filter(ContentVersion.namespace == namespace).update(
+            {ContentVersion.version: ContentVersion.version + 1},
+            synchronize_session=False
+        )
+        if not updated:
+            db.add(ContentVersion(namespace=namespace, version=1))
+    db.info.setdefault("bumped_namespaces", set()).update(namespaces)
+
+
+def sync_content_versions(db: Session, force: bool = False) -> None:
+    """
+    Compare content_versions with the versions this worker last saw and drop
+    cache entries for every namespace another worker has changed.
+    Runs at most once per CONTENT_VERSION_POLL_MS.
+    """
+    global _last_sync, _synced_once
+    if not force and not _sync_due():
+        return
+    # Never block here: async handlers run this on the event loop thread, and a
+    # request that finds another one already syncing can use the current cache
+    if not _sync_lock.acquire(blocking=False):
+        return
+    try:
+        if not force and not _sync_due():
+            return
+        _last_sync = time.monotonic()
+        try:
+            rows = db.query(ContentVersion.namespace, ContentVersion.version).all()
+        except Exception as e:
+            # Table missing (migration not run yet) - fall back to TTL expiry only
+            db.rollback()
+            print(f"Warning: Could not read content versions: {e}")
+            return
+        stale = [namespace for namespace, version in rows if _known_versions.get(namespace) != version]
+        _known_versions.update({namespace: version for namespace, version in rows})
+        if stale and _synced_once:
+            invalidate_content(*stale)
+        _synced_once = True
+    finally:
+        _sync_lock.release()
+
+
+def _sync_due() -> bool:
+    return time.monotonic() - _last_sync >= settings.CONTENT_VERSION_POLL_MS / 1000.0
+
+
+def invalidate_content(*namespaces: str) -> None:
+    """Drop local cache entries for the given namespaces and every aggregate built from them"""
+    content_cache.invalidate(*namespaces, *AGGREGATE_NAMESPACES)
+
+
+def get_cached(db: Session, key: Hashable) -> Optional[Any]:
+    """Look up key in the content cache after checking for writes from other workers"""
+    sync_content_versions(db)
+    return content_cache.get(key)
+
+
+async def get_cached_async(db: AsyncSession, key: Hashable) -> Optional[Any]:
+    """get_cached for async handlers"""
+    if _sync_due():
+        await db.run_sync(sync_content_versions)
+    return content_cache.get(key)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    namespaces = session.info.pop("bumped_namespaces", None)
+    if namespaces:
+        invalidate_content(*namespaces)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop("bumped_namespaces", None)
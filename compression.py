@@ -0,0 +1,176 @@
+"""
+Response compression (Brotli or gzip, negotiated from Accept-Encoding)
+
+CompressionMiddleware compresses JSON, text and other compressible
+responses of at least COMPRESSION_MIN_SIZE bytes. Cached payloads (see
+http_cache.py) keep their compressed bodies next to the raw one, so they
+are compressed once per content version; responses that already carry a
+Content-Encoding are passed through untouched.
+
+A compressed body is a different representation from the identity one, so
+its strong ETag gets the encoding as a suffix ("<tag>-gzip"). The suffix is
+removed from If-None-Match before the request reaches the app (and put back
+on a 304), so StaticFiles and the cached payloads still see their own tags.
+Bodies of COMPRESSION_THREAD_MIN_SIZE bytes or more are compressed on a
+worker thread to keep the event loop free.
+
+Brotli is optional: without the brotli package only gzip is offered.
+"""
+import gzip
+from typing import Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+
+from config import settings
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/javascript", "application/xml", "image/svg+xml", "text/",
+)
+
+
+def supported_encodings():
+    """Encodings we can produce, most preferred first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The encoding to use for a client's Accept-Encoding header, or None for identity"""
+    if not accept_encoding or not settings.COMPRESSION_ENABLED:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """
+    The ETag of the encoding's representation of a body whose ETag is etag
+    (StaticFiles sends its tags unquoted, so both forms are handled)
+    """
+    if encoding is None:
+        return etag
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return f"{etag}-{encoding}"
+
+
+def split_etag(tag: str) -> Tuple[str, Optional[str]]:
+    """(the ETag a representation ETag was derived from, its encoding or None)"""
+    quote = '"' if tag.endswith('"') else ""
+    for encoding in ("br", "gzip"):
+        suffix = f"-{encoding}{quote}"
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + quote, encoding
+    return tag, None
+
+
+def _add_vary(headers: MutableHeaders) -> None:
+    vary = [value.strip().lower() for value in headers.get("vary", "").split(",")]
+    if "accept-encoding" not in vary and "*" not in vary:
+        headers.add_vary_header("Accept-Encoding")
+
+
+def _strip_if_none_match(scope) -> Tuple[dict, Optional[str]]:
+    """The scope with encoding suffixes removed from If-None-Match, and the encoding removed"""
+    if_none_match = Headers(scope=scope).get("if-none-match")
+    if not if_none_match:
+        return scope, None
+    tags, stripped = [], None
+    for tag in if_none_match.split(","):
+        tag, encoding = split_etag(tag.strip())
+        tags.append(tag)
+        stripped = stripped or encoding
+    if stripped is None:
+        return scope, None
+    headers = [(name, value) for name, value in scope["headers"] if name != b"if-none-match"]
+    headers.append((b"if-none-match", ", ".join(tags).encode("latin-1")))
+    return dict(scope, headers=headers), stripped
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing complete (non-streamed) responses"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        scope, requested_encoding = _strip_if_none_match(scope)
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if message["status"] == 304:
+                    # Validated against the identity tag: answer with the tag the client sent
+                    etag = headers.get("etag")
+                    if etag and requested_encoding and split_etag(etag)[1] is None:
+                        MutableHeaders(scope=message)["ETag"] = encoded_etag(etag, requested_encoding)
+                    await send(message)
+                elif "content-encoding" in headers or not is_compressible(headers.get("content-type")):
+                    await send(message)
+                else:
+                    # Hold the headers back until we know the body size
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start)
+            _add_vary(headers)
+            if message.get("more_body", False) or len(body) < settings.COMPRESSION_MIN_SIZE:
+                # Streamed or small: send as is
+                await send(start)
+                await send(message)
+                return
+            if len(body) >= settings.COMPRESSION_THREAD_MIN_SIZE:
+                body = await anyio.to_thread.run_sync(compress, body, encoding)
+            else:
+                body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            if "etag" in headers:
+                headers["ETag"] = encoded_etag(headers["etag"], encoding)
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -16,7 +16,28 @@ class Settings(BaseSettings):
     SMTP_PORT: int
     SMTP_USERNAME: str
     SMTP_PASSWORD: str
+    # Email outbox (see email_outbox.py)
+    EMAIL_MAX_ATTEMPTS: int = 8
+    EMAIL_RETRY_BASE_SECONDS: float = 60  # backoff doubles after each failed send
+    EMAIL_RETRY_MAX_SECONDS: float = 6 * 3600
+    # Digest mode: one email for every EMAIL_DIGEST_MAX_MESSAGES notifications,
+    # or for whatever is waiting EMAIL_DIGEST_MINUTES after the oldest one
+    EMAIL_DIGEST_ENABLED: bool = False
+    EMAIL_DIGEST_MAX_MESSAGES: int = 20
+    EMAIL_DIGEST_MINUTES: float = 15
+    # Pooled SMTP client (see email_service.py)
+    SMTP_POOL_SIZE: int = 2  # open connections per SMTP server
+    SMTP_BATCH_SIZE: int = 20  # queued messages sent per connection turn
+    SMTP_IDLE_TIMEOUT: float = 60  # seconds before an unused connection is closed
+    SMTP_TIMEOUT: float = 30
+    SMTP_REQUIRE_TLS: bool = True  # STARTTLS on non-465 ports; false only for local test servers
     
+    # Password verification pool used by login ("thread" or "process")
+    # Logins beyond WORKERS + QUEUE_LIMIT concurrent verifications get a 429
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_LIMIT: int = 8
+
     # Database Configuration
     # For development: always SQLite
     # For production/live: MySQL or PostgreSQL based on DB_TYPE
@@ -29,7 +50,88 @@ class Settings(BaseSettings):
     
     # SQLite database path (for development)
     SQLITE_DB_PATH: str = "./glorious_church.db"
-    
+
+    # Connection pool (per engine, per worker)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30  # seconds to wait for a free connection
+    DB_POOL_USE_LIFO: bool = False  # reuse the most recent connection so idle ones can be recycled
+
+    # Uploads: size limits in MB per category (gallery, blog, hero, departments, documents)
+    UPLOAD_MAX_MB_DEFAULT: float = 10
+    UPLOAD_MAX_MB: Dict[str, float] = {"documents": 50}
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+
+    # Responsive image variants (needs Pillow); formats: webp, avif, jpeg, png
+    # Set IMAGE_VARIANT_WIDTHS=[] to disable
+    IMAGE_VARIANT_WIDTHS: List[int] = [320, 640, 1280]
+    IMAGE_VARIANT_FORMATS: List[str] = ["webp"]
+    IMAGE_VARIANT_QUALITY: int = 80
+    IMAGE_VARIANT_WORKERS: int = 1
+
+    # Background jobs (see jobs.py)
+    # Run the job worker inside the API process; by default only when the server runs one process
+    # (WEB_CONCURRENCY, as read by uvicorn), since each process would run its own worker
+    JOB_WORKER_IN_PROCESS: Optional[bool] = None
+    WEB_CONCURRENCY: int = 1
+    JOB_POLL_INTERVAL: float = 1.0  # seconds between polls when the queue is idle
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: float = 30  # backoff doubles after each failed attempt
+    JOB_RETRY_MAX_SECONDS: float = 3600
+    JOB_LOCK_TIMEOUT_SECONDS: int = 600  # requeue running jobs whose worker died
+    JOB_HEARTBEAT_SECONDS: int = 60  # how often a worker refreshes the lock of jobs it runs
+    JOB_RETENTION_DAYS: int = 7
+    JOB_CONCURRENCY: Dict[str, int] = {}  # per job type overrides, e.g. {"image_variants": 2}
+
+    # Public content cache (settings, navigation, pages)
+    # Set CACHE_TTL_SECONDS=0 to disable caching
+    CACHE_TTL_SECONDS: float = 300
+    CACHE_MAX_ENTRIES: int = 256
+    # How often each worker checks content_versions for writes made by other workers
+    # Set to 0 to check on every request
+    CONTENT_VERSION_POLL_MS: int = 500
+
+    # Cache-Control for public read endpoints. Per-route overrides are given as JSON, e.g.
+    # HTTP_CACHE_CONTROL='{"/api/navigation": "public, max-age=300"}'
+    HTTP_CACHE_CONTROL_DEFAULT: str = "public, no-cache"
+    HTTP_CACHE_CONTROL: Dict[str, str] = {}
+
+    # Response compression (see compression.py); Brotli needs the brotli package
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes; smaller responses are sent uncompressed
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    COMPRESSION_THREAD_MIN_SIZE: int = 64 * 1024  # larger bodies are compressed off the event loop
+
+    # Text extracted from uploaded documents for search (see document_text.py); PDFs need pypdf
+    DOCUMENT_TEXT_MAX_CHARS: int = 500_000
+    DOCUMENT_TEXT_WORKERS: int = 1
+
+    # Full-text search at /api/search (see search.py)
+    SEARCH_MAX_LIMIT: int = 50
+
+    # Prometheus metrics at /metrics (see metrics.py)
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None  # scrapers send "Authorization: Bearer <token>"; required outside development
+    # Directory shared by all workers of one server; required when running several workers.
+    # Empty it before the server starts (not while workers are running)
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    METRICS_LATENCY_BUCKETS: List[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+    # Per-request SQL statistics (see query_stats.py)
+    SERVER_TIMING_ENABLED: bool = True  # Server-Timing header with query count and time
+    # Warn when a request runs more statements than this (0 disables); per-route overrides as JSON, e.g.
+    # SQL_QUERY_BUDGET_ROUTES='{"/api/bootstrap": 40}'
+    SQL_QUERY_BUDGET: int = 20
+    SQL_QUERY_BUDGET_ROUTES: Dict[str, int] = {}
+
+    # Slow query log (see slow_queries.py): JSON lines with route, parameter types and EXPLAIN
+    SLOW_QUERY_LOG_ENABLED: bool = False
+    SLOW_QUERY_THRESHOLD_MS: float = 200
+    SLOW_QUERY_LOG_FILE: str = "logs/slow_queries.log"  # shared by all workers; empty for stderr
+    SLOW_QUERY_EXPLAIN: bool = True
+    SLOW_QUERY_EXPLAIN_INTERVAL: float = 600  # explain each statement at most this often (seconds)
+
     class Config:
         env_file = ".env"
         case_sensitive = False
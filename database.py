@@ -1,10 +1,13 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from config import settings
 import os
-
-from sql_helper import SqlHelper
+import threading
+import time
 
 def get_database_url():
     """
@@ -45,7 +48,7 @@ def get_database_url():
             raise ValueError(
                 f"Missing required database parameters for {environment}: {', '.join(missing_params)}"
             )
-        SqlHelper.create_user_and_grant_privileges(settings.DB_USER,settings.DB_PASSWORD,settings.DB_NAME)
+        # Creating the database and user is done once, explicitly: python -m manage provision-db
         db_host = settings.DB_HOST
         db_port = settings.DB_PORT or (3306 if db_type == "mysql" else 5432)
         db_user = settings.DB_USER
@@ -65,6 +68,77 @@ def get_database_url():
     # Fallback to SQLite for unknown environments
     return f"sqlite:///{settings.SQLITE_DB_PATH}"
 
+def get_async_database_url(url: str):
+    """
+    Map a sync database URL to its asyncio driver.
+    - SQLite: aiosqlite
+    - MySQL: aiomysql
+    - PostgreSQL: asyncpg
+    """
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("mysql+pymysql:"):
+        return url.replace("mysql+pymysql:", "mysql+aiomysql:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    raise ValueError(f"No async driver configured for database URL '{url.split(':', 1)[0]}'")
+
+class PoolMetricsMixin:
+    """Records how long callers wait to check a connection out of the pool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkout_count = 0
+        self.checkout_seconds_total = 0.0
+        self.checkout_seconds_max = 0.0
+        self.checkout_timeouts = 0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            with self._metrics_lock:
+                self.checkout_timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._metrics_lock:
+                self.checkout_count += 1
+                self.checkout_seconds_total += elapsed
+                self.checkout_seconds_max = max(self.checkout_seconds_max, elapsed)
+
+    def metrics(self):
+        """Current pool usage and checkout latency totals"""
+        with self._metrics_lock:
+            return {
+                "pool_size": self.size(),
+                "checked_out": self.checkedout(),
+                "checked_in": self.checkedin(),
+                "overflow": max(self.overflow(), 0),
+                "checkout_count": self.checkout_count,
+                "checkout_seconds_total": round(self.checkout_seconds_total, 6),
+                "checkout_seconds_max": round(self.checkout_seconds_max, 6),
+                "checkout_timeouts": self.checkout_timeouts,
+            }
+
+class InstrumentedQueuePool(PoolMetricsMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(PoolMetricsMixin, AsyncAdaptedQueuePool):
+    pass
+
+# Pool sizing is shared by the sync and async engines (each worker gets one of each)
+POOL_OPTIONS = {
+    "pool_pre_ping": True,
+    "pool_recycle": 3600,
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+}
+
 SQLALCHEMY_DATABASE_URL = get_database_url()
 
 # Create engine with appropriate connect_args
@@ -82,10 +156,30 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     # connect_args=connect_args,
     echo=False,  # Set to True for SQL query logging
-    pool_pre_ping = True,
-    pool_recycle = 3600
+    poolclass=InstrumentedQueuePool,
+    **POOL_OPTIONS
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the public read endpoints, so one worker can serve many
+# concurrent requests without tying up a threadpool thread per query
+async_pool_options = {"poolclass": InstrumentedAsyncQueuePool, **POOL_OPTIONS}
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    # aiosqlite runs every connection in its own thread; keep SQLAlchemy's default (unpooled) setup
+    async_pool_options = {}
+
+async_engine = create_async_engine(
+    get_async_database_url(SQLALCHEMY_DATABASE_URL),
+    echo=False,
+    **async_pool_options
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+def get_pool_metrics():
+    """Connection pool metrics for the sync and async engines"""
+    pools = {"sync": engine.pool, "async": async_engine.sync_engine.pool}
+    return {name: pool.metrics() for name, pool in pools.items() if isinstance(pool, PoolMetricsMixin)}
+
 Base = declarative_base()
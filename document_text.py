@@ -0,0 +1,189 @@
+"""
+Text extraction from uploaded documents, for search
+
+Each new document whose file is a PDF, DOCX or plain text file gets a
+"document_text" background job (see jobs.py). The job extracts the text on a
+process pool and saves it in document_texts; saving it re-indexes the
+document for /api/search (see search.py), so visitors can find a document
+by its contents.
+
+PDF extraction needs the optional pypdf package; DOCX and text files are read
+with the standard library. Files that can't be read (encrypted or damaged)
+are recorded as failed rather than retried.
+
+Documents uploaded before this existed can be processed with:
+    python -m manage extract-document-text
+"""
+import codecs
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from xml.etree import ElementTree
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from jobs import enqueue_job, job_handler
+from models import Document, DocumentText
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # optional dependency
+    PdfReader = None
+
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+TEXT_EXTENSIONS = {"txt", "csv"}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def extract_pdf(path: str, max_chars: int) -> str:
+    reader = PdfReader(path)
+    pages, length = [], 0
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        pages.append(text)
+        length += len(text)
+        if length >= max_chars:
+            break
+    return "\n".join(pages)
+
+
+def extract_docx(path: str, max_chars: int) -> str:
+    """Paragraph text of the document body (word/document.xml)"""
+    paragraphs, length = [], 0
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as xml:
+        parts = []
+        for _, element in ElementTree.iterparse(xml):
+            if element.tag == WORD_NAMESPACE + "t":
+                parts.append(element.text or "")
+            elif element.tag in (WORD_NAMESPACE + "tab", WORD_NAMESPACE + "br"):
+                parts.append(" ")
+            elif element.tag == WORD_NAMESPACE + "p":
+                paragraphs.append("".join(parts))
+                length += len(paragraphs[-1])
+                parts = []
+                element.clear()
+                if length >= max_chars:
+                    break
+    return "\n".join(paragraphs)
+
+
+def extract_plain(path: str, max_chars: int) -> str:
+    limit = max_chars * 4
+    with open(path, "rb") as f:
+        data = f.read(limit)
+    try:
+        # A read that hit the limit may have cut the last character in half
+        return codecs.getincrementaldecoder("utf-8-sig")().decode(data, final=len(data) < limit)
+    except UnicodeDecodeError:
+        return data.decode("cp1252", errors="replace")
+
+
+def extractor_for(extension: Optional[str]):
+    """The extraction function for a file extension, or None if its text can't be extracted"""
+    extension = (extension or "").lower()
+    if extension == "pdf":
+        return extract_pdf if PdfReader is not None else None
+    if extension == "docx":
+        return extract_docx
+    if extension in TEXT_EXTENSIONS:
+        return extract_plain
+    return None
+
+
+def extract_text(path: str, extension: str, max_chars: int) -> str:
+    """
+    The text of the file at path, at most max_chars long.
+    Runs in a worker process.
+    """
+    text = extractor_for(extension)(path, max_chars)
+    # NUL characters can't be stored in PostgreSQL text columns
+    return text.replace("\x00", "")[:max_chars].strip()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawn rather than fork: forking this multithreaded server can copy held locks
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.DOCUMENT_TEXT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def schedule_text_extraction(db: Session, document: Document) -> None:
+    """Queue text extraction for a new document in the caller's transaction (document must be flushed)"""
+    if extractor_for(document.file_type) is not None:
+        enqueue_job(db, "document_text", {"document_id": document.id})
+
+
+def _extract(document_id: int, extract) -> int:
+    """Extract and save the text of a document with extract(path, extension, max_chars); returns 1 if saved"""
+    with SessionLocal() as db:
+        document = db.query(Document.file_url, Document.file_type).filter(Document.id == document_id).first()
+    if document is None:
+        return 0  # deleted before the job ran
+    path = document.file_url.replace("/uploads/", "uploads/", 1)
+    if not os.path.exists(path):
+        return 0
+    text, error = None, None
+    try:
+        text = extract(path, document.file_type, settings.DOCUMENT_TEXT_MAX_CHARS)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        print(f"Error extracting text from {document.file_url}: {error}")
+    return save_text(document_id, document.file_url, text, error)
+
+
+@job_handler("document_text", concurrency=settings.DOCUMENT_TEXT_WORKERS)
+def extract_document_text_job(payload) -> None:
+    # Parsing is CPU bound, so it runs in a worker process rather than on the job thread
+    _extract(payload["document_id"], lambda *args: _get_executor().submit(extract_text, *args).result())
+
+
+def save_text(document_id: int, file_url: str, text: Optional[str], error: Optional[str]) -> int:
+    """Store the extracted text (which re-indexes the document for search); returns 1 if saved"""
+    with SessionLocal() as db:
+        document = db.query(Document).filter(Document.id == document_id).first()
+        if document is None or document.file_url != file_url:
+            return 0
+        if document.extracted_text is None:
+            document.extracted_text = DocumentText(document_id=document_id)
+        row = document.extracted_text
+        row.file_url = file_url
+        row.status = "failed" if error else "done"
+        row.text = text
+        row.error = error
+        db.commit()
+    return 1
+
+
+def shutdown_text_executor() -> None:
+    """Stop the extraction pool (called on app shutdown)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def extract_missing_text() -> int:
+    """Synchronously extract the text of every document that has none yet; returns the count"""
+    with SessionLocal() as db:
+        pending = [
+            document_id for document_id, file_type in
+            db.query(Document.id, Document.file_type)
+            .outerjoin(DocumentText, DocumentText.document_id == Document.id)
+            .filter(DocumentText.id.is_(None))
+            if extractor_for(file_type) is not None
+        ]
+    if PdfReader is None:
+        print("pypdf is not installed, skipping PDF documents")
+    return sum(_extract(document_id, extract_text) for document_id in pending)
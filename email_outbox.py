@@ -0,0 +1,254 @@
+"""
+Outbox for admin email notifications
+
+Every notification is first written to the email_outbox table in the same
+transaction as the record it is about (keyed by that record, e.g.
+contact_message:42), so it is stored if and only if the record is. An
+"email_outbox" job (see jobs.py) drains the table: due rows are claimed with
+a conditional UPDATE, so two workers never send the same row, then sent and
+marked sent; failed sends are retried with exponential backoff up to
+EMAIL_MAX_ATTEMPTS. While no admin emails or SMTP settings are configured,
+rows stay pending and are checked again with backoff, without using up
+their attempts.
+
+With EMAIL_DIGEST_ENABLED, pending notifications are collected and sent as
+one email once EMAIL_DIGEST_MAX_MESSAGES are waiting or the oldest has
+waited EMAIL_DIGEST_MINUTES.
+"""
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from cache import content_cache, get_cached
+from config import settings
+from database import SessionLocal
+from email_service import digest_body, notification_body, resolve_smtp_config, send_admin_email
+from jobs import enqueue_job, job_handler, retry_delay
+from models import ContactMessage, EmailOutbox, SiteSettings
+
+OUTBOX_PENDING = "pending"
+OUTBOX_SENDING = "sending"
+OUTBOX_SENT = "sent"
+OUTBOX_FAILED = "failed"
+
+
+def add_to_outbox(db: Session, kind: str, idempotency_key: str, payload: Dict[str, Any]) -> EmailOutbox:
+    """
+    Record a notification in the caller's transaction and schedule a drain.
+    A notification whose key is already in the outbox is not added again.
+    """
+    existing = db.query(EmailOutbox).filter(EmailOutbox.idempotency_key == idempotency_key).first()
+    if existing is not None:
+        return existing
+    entry = EmailOutbox(
+        idempotency_key=idempotency_key,
+        kind=kind,
+        payload=json.dumps(payload),
+        status=OUTBOX_PENDING,
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(entry)
+    db.flush()
+
+    if not settings.EMAIL_DIGEST_ENABLED:
+        enqueue_job(db, "email_outbox", {})
+        return entry
+    waiting = db.query(EmailOutbox).filter(EmailOutbox.status == OUTBOX_PENDING).count()
+    if waiting >= settings.EMAIL_DIGEST_MAX_MESSAGES:
+        enqueue_job(db, "email_outbox", {})
+    elif waiting == 1:
+        # First message of a new digest: make sure it goes out within the window
+        enqueue_job(db, "email_outbox", {}, delay_seconds=settings.EMAIL_DIGEST_MINUTES * 60)
+    return entry
+
+
+def queue_contact_notification(db: Session, message: ContactMessage) -> EmailOutbox:
+    """Notify the admins about a new contact message (message must be flushed)"""
+    return add_to_outbox(db, "contact_notification", f"contact_message:{message.id}", {
+        "name": message.name,
+        "email": message.email,
+        "subject": message.subject,
+        "message": message.message,
+    })
+
+
+@job_handler("email_outbox")
+def drain_email_outbox(payload: Dict[str, Any]) -> None:
+    """Send due outbox notifications, individually or as one digest"""
+    with SessionLocal() as db:
+        _release_stale(db)
+        notification_settings = get_notification_settings(db)
+        # The password is read for each drain rather than kept in the cache
+        smtp = dict(notification_settings["smtp"], smtp_sender_password=get_smtp_password(db))
+    admin_emails = notification_settings["admin_emails"]
+
+    if not admin_emails or resolve_smtp_config(**smtp) is None:
+        # Nothing can be sent until the settings are filled in
+        _defer_pending("No admin emails or SMTP settings configured")
+        return
+
+    if settings.EMAIL_DIGEST_ENABLED:
+        _send_digest(admin_emails, smtp)
+    else:
+        for entry_id, entry_payload in _claim_due():
+            sent = send_admin_email(
+                admin_emails,
+                f"New Contact Message: {entry_payload.get('subject') or 'No Subject'}",
+                notification_body(
+                    entry_payload["name"], entry_payload["email"],
+                    entry_payload.get("subject"), entry_payload["message"],
+                ),
+                **smtp,
+            )
+            _record_result([entry_id], sent)
+
+
+def get_notification_settings(db: Session) -> Dict[str, Any]:
+    """
+    Admin addresses and SMTP settings (except the password) from SiteSettings,
+    loaded without the rest of the settings row and cached until the settings
+    are next saved.
+    """
+    cached = get_cached(db, ("settings", "notifications"))
+    if cached is not None:
+        return cached
+    generation = content_cache.generation(("settings", "notifications"))
+    row = db.query(
+        SiteSettings.admin_emails,
+        SiteSettings.smtp_sender_email,
+        SiteSettings.smtp_host,
+        SiteSettings.smtp_port,
+    ).first()
+    return content_cache.set(("settings", "notifications"), {
+        "admin_emails": row.admin_emails if row else None,
+        "smtp": {
+            "smtp_sender_email": row.smtp_sender_email if row else None,
+            "smtp_host": row.smtp_host if row else None,
+            "smtp_port": row.smtp_port if row else None,
+        },
+    }, generation)
+
+
+def get_smtp_password(db: Session) -> Optional[str]:
+    """The SMTP password from SiteSettings, read from the database every time"""
+    return db.query(SiteSettings.smtp_sender_password).limit(1).scalar()
+
+
+def _send_digest(admin_emails: str, smtp: Dict[str, Any]) -> None:
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        due = db.query(EmailOutbox).filter(
+            EmailOutbox.status == OUTBOX_PENDING, EmailOutbox.next_attempt_at <= now
+        )
+        waiting = due.count()
+        oldest = due.order_by(EmailOutbox.created_at).with_entities(EmailOutbox.created_at).first()
+    if not waiting:
+        return
+    window = timedelta(minutes=settings.EMAIL_DIGEST_MINUTES)
+    if waiting < settings.EMAIL_DIGEST_MAX_MESSAGES and oldest[0] + window > now:
+        # Not full yet: come back when the oldest message's window closes
+        with SessionLocal() as db:
+            enqueue_job(db, "email_outbox", {}, delay_seconds=(oldest[0] + window - now).total_seconds())
+            db.commit()
+        return
+
+    claimed = _claim_due(limit=settings.EMAIL_DIGEST_MAX_MESSAGES)
+    if not claimed:
+        return
+    messages = [entry_payload for _, entry_payload in claimed]
+    if len(messages) == 1:
+        item = messages[0]
+        subject = f"New Contact Message: {item.get('subject') or 'No Subject'}"
+        body = notification_body(item["name"], item["email"], item.get("subject"), item["message"])
+    else:
+        subject = f"{len(messages)} New Contact Messages"
+        body = digest_body(messages)
+    sent = send_admin_email(admin_emails, subject, body, **smtp)
+    _record_result([entry_id for entry_id, _ in claimed], sent)
+
+
+def _claim_due(limit: Optional[int] = None) -> List[tuple]:
+    """Move due pending rows to sending; returns (id, payload) for the rows this worker won"""
+    now = datetime.utcnow()
+    claimed = []
+    with SessionLocal() as db:
+        query = (
+            db.query(EmailOutbox.id, EmailOutbox.payload)
+            .filter(EmailOutbox.status == OUTBOX_PENDING, EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.created_at, EmailOutbox.id)
+        )
+        if limit:
+            query = query.limit(limit)
+        for entry_id, entry_payload in query.all():
+            # Only one worker's UPDATE can move a given row out of pending
+            won = db.query(EmailOutbox).filter(
+                EmailOutbox.id == entry_id, EmailOutbox.status == OUTBOX_PENDING
+            ).update({EmailOutbox.status: OUTBOX_SENDING, EmailOutbox.updated_at: now}, synchronize_session=False)
+            db.commit()
+            if won:
+                claimed.append((entry_id, json.loads(entry_payload or "{}")))
+    return claimed
+
+
+def _record_result(entry_ids: List[int], sent: bool) -> None:
+    """Mark claimed rows sent, or schedule their retry with backoff"""
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        entries = db.query(EmailOutbox).filter(EmailOutbox.id.in_(entry_ids)).all()
+        retry_at = None
+        for entry in entries:
+            entry.attempts += 1
+            if sent:
+                entry.status = OUTBOX_SENT
+                entry.sent_at = now
+                entry.last_error = None
+                entry.digest_size = len(entry_ids)
+            elif entry.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+                entry.status = OUTBOX_FAILED
+                entry.last_error = "Email could not be sent"
+                print(f"Giving up on email notification {entry.idempotency_key} after {entry.attempts} attempts")
+            else:
+                entry.status = OUTBOX_PENDING
+                entry.last_error = "Email could not be sent"
+                delay = retry_delay(entry.attempts, settings.EMAIL_RETRY_BASE_SECONDS, settings.EMAIL_RETRY_MAX_SECONDS)
+                entry.next_attempt_at = now + timedelta(seconds=delay)
+                retry_at = min(retry_at or entry.next_attempt_at, entry.next_attempt_at)
+        if retry_at is not None:
+            enqueue_job(db, "email_outbox", {}, delay_seconds=(retry_at - now).total_seconds())
+        db.commit()
+
+
+def _defer_pending(reason: str) -> None:
+    """
+    Push due pending rows back without counting an attempt. The wait grows
+    with each row's age (so roughly doubles each time), capped at
+    EMAIL_RETRY_MAX_SECONDS.
+    """
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        entries = db.query(EmailOutbox).filter(
+            EmailOutbox.status == OUTBOX_PENDING, EmailOutbox.next_attempt_at <= now
+        ).all()
+        retry_at = None
+        for entry in entries:
+            age = (now - entry.created_at).total_seconds() if entry.created_at else 0
+            delay = min(max(age, settings.EMAIL_RETRY_BASE_SECONDS), settings.EMAIL_RETRY_MAX_SECONDS)
+            entry.last_error = reason
+            entry.next_attempt_at = now + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+            retry_at = min(retry_at or entry.next_attempt_at, entry.next_attempt_at)
+        if retry_at is not None:
+            enqueue_job(db, "email_outbox", {}, delay_seconds=(retry_at - now).total_seconds())
+        db.commit()
+
+
+def _release_stale(db: Session) -> None:
+    """Return rows left in sending by a worker that died mid-send"""
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+    db.query(EmailOutbox).filter(
+        EmailOutbox.status == OUTBOX_SENDING, EmailOutbox.updated_at < cutoff
+    ).update({EmailOutbox.status: OUTBOX_PENDING}, synchronize_session=False)
+    db.commit()
@@ -1,109 +1,323 @@
 """
 Email service for sending notifications via SMTP
+
+Mail goes through a shared SmtpMailer: an asyncio SMTP client running on its
+own event loop thread that keeps up to SMTP_POOL_SIZE authenticated
+connections open per server, reconnects when a server drops one, and sends
+queued messages in batches over the same connection. Callers can use the
+blocking send_admin_email() (e.g. from job handlers) or await
+SmtpMailer.send_async() from async code.
 """
-import smtplib
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List, Optional
+from email.message import Message
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import logging
 import os
 
+import aiosmtplib
+
+from config import settings
+
 logger = logging.getLogger(__name__)
 
-def send_email_notification(
+
+class SmtpConfig(NamedTuple):
+    """Server and credentials used for a connection (connections are pooled per config)"""
+    host: str
+    port: int
+    username: str
+    password: str
+
+
+def resolve_smtp_config(
+    smtp_sender_email: Optional[str] = None,
+    smtp_sender_password: Optional[str] = None,
+    smtp_host: Optional[str] = None,
+    smtp_port: Optional[int] = None
+) -> Optional[SmtpConfig]:
+    """
+    SMTP settings from the database (SiteSettings) if given, otherwise from environment variables.
+    Returns None when SMTP is disabled or incomplete.
+    """
+    # Check if SMTP is enabled - allow database settings to enable it even if env var is not set
+    # If database settings are provided, assume SMTP is enabled
+    smtp_enabled = os.getenv("SMTP_ENABLED", "false").lower() == "true"
+    has_database_smtp = smtp_sender_email and smtp_sender_password
+
+    if not smtp_enabled and not has_database_smtp:
+        logger.info("SMTP is disabled and no database SMTP settings provided. Skipping email notification.")
+        return None
+
+    # Use database settings if provided, otherwise fallback to environment variables
+    smtp_server = smtp_host or os.getenv("SMTP_SERVER", "smtp.gmail.com")
+    smtp_port_value = smtp_port or int(os.getenv("SMTP_PORT", "587"))
+    smtp_username = smtp_sender_email or os.getenv("SMTP_USERNAME")
+    smtp_password = smtp_sender_password or os.getenv("SMTP_PASSWORD")
+
+    if not smtp_username or not smtp_password:
+        logger.warning("Email configuration incomplete. Skipping email notification.")
+        return None
+    return SmtpConfig(smtp_server, int(smtp_port_value), smtp_username, smtp_password)
+
+
+class _PendingMessage:
+    """A queued message; started is set once a connection begins sending it"""
+
+    def __init__(self, message: Message, future: "asyncio.Future"):
+        self.message = message
+        self.future = future
+        self.started = False
+
+
+class _SmtpConnection:
+    """One pooled connection: sends queued messages, reconnecting when needed"""
+
+    def __init__(self, config: SmtpConfig, queue: "asyncio.Queue"):
+        self.config = config
+        self.queue = queue
+        self.client: Optional[aiosmtplib.SMTP] = None
+
+    async def run(self) -> None:
+        while True:
+            try:
+                first = await asyncio.wait_for(self.queue.get(), timeout=settings.SMTP_IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                # Don't hold a server connection open while idle
+                await self.close()
+                continue
+            batch = [first]
+            while len(batch) < settings.SMTP_BATCH_SIZE and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            await self.send_batch(batch)
+
+    async def send_batch(self, batch: List[_PendingMessage]) -> None:
+        for pending in batch:
+            if pending.future.cancelled():
+                continue  # withdrawn by a sender that gave up waiting
+            pending.started = True
+            try:
+                await self._send(pending.message)
+                pending.future.set_result(True)
+            except Exception as e:
+                pending.future.set_exception(e)
+
+    async def _send(self, message: Message) -> None:
+        for attempt in range(2):
+            try:
+                if self.client is None or not self.client.is_connected:
+                    await self._connect()
+                await self.client.send_message(message)
+                return
+            except (aiosmtplib.SMTPServerDisconnected, ConnectionError):
+                # The server closed an idle connection; reconnect once and retry
+                self.client = None
+                if attempt:
+                    raise
+
+    async def _connect(self) -> None:
+        use_tls = self.config.port == 465
+        self.client = aiosmtplib.SMTP(
+            hostname=self.config.host,
+            port=self.config.port,
+            username=self.config.username,
+            password=self.config.password,
+            use_tls=use_tls,
+            start_tls=None if use_tls or not settings.SMTP_REQUIRE_TLS else True,
+            timeout=settings.SMTP_TIMEOUT,
+        )
+        await self.client.connect()
+
+    async def close(self) -> None:
+        if self.client is not None and self.client.is_connected:
+            try:
+                await self.client.quit()
+            except Exception:
+                self.client.close()
+        self.client = None
+
+
+class SmtpMailer:
+    """Pooled SMTP client on a dedicated event loop thread"""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._queues: Dict[SmtpConfig, "asyncio.Queue"] = {}
+        self._connections: Dict[SmtpConfig, List[Tuple[_SmtpConnection, "asyncio.Task"]]] = {}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="smtp-mailer", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    async def _queue(self, config: SmtpConfig, message: Message) -> _PendingMessage:
+        queue = self._queues.get(config)
+        if queue is None:
+            queue = self._queues[config] = asyncio.Queue()
+            self._connections[config] = []
+            for _ in range(settings.SMTP_POOL_SIZE):
+                connection = _SmtpConnection(config, queue)
+                self._connections[config].append((connection, asyncio.ensure_future(connection.run())))
+        pending = _PendingMessage(message, asyncio.get_running_loop().create_future())
+        await queue.put(pending)
+        return pending
+
+    async def _enqueue(self, config: SmtpConfig, message: Message) -> bool:
+        return await self._wait(await self._queue(config, message))
+
+    async def _wait(self, pending: _PendingMessage) -> bool:
+        return await pending.future
+
+    async def _withdraw(self, pending: _PendingMessage) -> bool:
+        """Drop a message that no connection has started sending; False if it is already on its way"""
+        if pending.started:
+            return False
+        pending.future.cancel()
+        return True
+
+    def submit(self, config: SmtpConfig, message: Message) -> Future:
+        """Queue a message from any thread; the returned future resolves once the server accepts it"""
+        return asyncio.run_coroutine_threadsafe(self._enqueue(config, message), self._ensure_loop())
+
+    def send(self, config: SmtpConfig, message: Message) -> bool:
+        """
+        Send a message and wait for the result (for sync callers such as job handlers).
+        Raises TimeoutError only if the message was withdrawn unsent after
+        waiting SMTP_TIMEOUT * 2, so the caller can retry it without a duplicate.
+        """
+        loop = self._ensure_loop()
+        pending = asyncio.run_coroutine_threadsafe(self._queue(config, message), loop).result()
+        result = asyncio.run_coroutine_threadsafe(self._wait(pending), loop)
+        try:
+            return result.result(timeout=settings.SMTP_TIMEOUT * 2)
+        except FutureTimeoutError:
+            if asyncio.run_coroutine_threadsafe(self._withdraw(pending), loop).result():
+                raise
+            # Already being sent: its own SMTP timeouts bound the wait for the server's answer
+            return result.result()
+
+    async def send_async(self, config: SmtpConfig, message: Message) -> bool:
+        """Send a message from async code without blocking the caller's event loop"""
+        return await asyncio.wrap_future(self.submit(config, message))
+
+    def close(self) -> None:
+        """Quit all pooled connections and stop the mailer loop"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def shutdown():
+            for connections in self._connections.values():
+                tasks = [task for _, task in connections]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                for connection, _ in connections:
+                    await connection.close()
+            self._queues.clear()
+            self._connections.clear()
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=10)
+        except Exception as e:
+            logger.warning(f"Error closing SMTP connections: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+
+
+mailer = SmtpMailer()
+
+
+def notification_body(sender_name: str, sender_email: str, subject: Optional[str], message: str) -> str:
+    """Body of the contact form notification for one message"""
+    return f"""
+A new message has been received on your website.
+
+From: {sender_name} ({sender_email})
+Subject: {subject or 'No Subject'}
+
+Message:
+{message}
+
+---
+This is an automated notification from your website contact form.
+        """
+
+
+def digest_body(messages: List[dict]) -> str:
+    """Body of a digest notification; messages are dicts with name, email, subject and message"""
+    sections = [
+        f"""{index}. From: {item['name']} ({item['email']})
+Subject: {item.get('subject') or 'No Subject'}
+
+{item['message']}
+"""
+        for index, item in enumerate(messages, start=1)
+    ]
+    separator = "\n" + "-" * 40 + "\n\n"
+    return f"""
+{len(messages)} new messages have been received on your website.
+
+{separator.join(sections)}
+---
+This is an automated digest from your website contact form.
+        """
+
+
+def send_admin_email(
     admin_emails: str,
-    sender_name: str,
-    sender_email: str,
-    subject: Optional[str],
-    message: str,
+    subject: str,
+    body: str,
     smtp_sender_email: Optional[str] = None,
     smtp_sender_password: Optional[str] = None,
     smtp_host: Optional[str] = None,
     smtp_port: Optional[int] = None
 ) -> bool:
     """
-    Send email notification to admin emails when a new contact message is received
-    
-    Args:
-        admin_emails: Comma-separated list of admin email addresses
-        sender_name: Name of the person who sent the contact message
-        sender_email: Email of the person who sent the contact message
-        subject: Subject of the contact message
-        message: Message content
-        smtp_sender_email: SMTP sender email (from database, optional)
-        smtp_sender_password: SMTP sender password (from database, optional)
-        smtp_host: SMTP host (from database, optional)
-        smtp_port: SMTP port (from database, optional)
-    
+    Send a plain text email to a comma-separated list of admin addresses.
+    SMTP settings come from the database if given, otherwise from environment variables.
+
     Returns:
         bool: True if email was sent successfully, False otherwise
     """
     try:
-        # Check if SMTP is enabled - allow database settings to enable it even if env var is not set
-        # If database settings are provided, assume SMTP is enabled
-        smtp_enabled = os.getenv("SMTP_ENABLED", "false").lower() == "true"
-        has_database_smtp = smtp_sender_email and smtp_sender_password
-        
-        if not smtp_enabled and not has_database_smtp:
-            logger.info("SMTP is disabled and no database SMTP settings provided. Skipping email notification.")
-            return False
-        
-        # Use database settings if provided, otherwise fallback to environment variables
-        smtp_server = smtp_host or os.getenv("SMTP_SERVER", "smtp.gmail.com")
-        smtp_port_value = smtp_port or int(os.getenv("SMTP_PORT", "587"))
-        smtp_username = smtp_sender_email or os.getenv("SMTP_USERNAME")
-        smtp_password = smtp_sender_password or os.getenv("SMTP_PASSWORD")
-        
-        if not admin_emails or not smtp_username or not smtp_password:
-            logger.warning("Email configuration incomplete. Skipping email notification.")
+        config = resolve_smtp_config(smtp_sender_email, smtp_sender_password, smtp_host, smtp_port)
+        if config is None or not admin_emails:
             return False
-        
+
         # Parse admin emails
         recipient_list = [email.strip() for email in admin_emails.split(',') if email.strip()]
         if not recipient_list:
             logger.warning("No admin emails configured. Skipping email notification.")
             return False
-        
-        # Create email message
+
         msg = MIMEMultipart()
-        msg['From'] = smtp_username
+        msg['From'] = config.username
         msg['To'] = ', '.join(recipient_list)
-        msg['Subject'] = f"New Contact Message: {subject or 'No Subject'}"
-        
-        # Create email body
-        body = f"""
-A new message has been received on your website.
-
-From: {sender_name} ({sender_email})
-Subject: {subject or 'No Subject'}
-
-Message:
-{message}
-
----
-This is an automated notification from your website contact form.
-        """
-        
+        msg['Subject'] = subject
         msg.attach(MIMEText(body, 'plain'))
-        
-        # Send email using SMTP
+
+        # Send over a pooled SMTP connection
         try:
-            server = smtplib.SMTP(smtp_server, smtp_port_value)
-            server.starttls()  # Enable TLS encryption
-            server.login(smtp_username, smtp_password)
-            server.send_message(msg)
-            server.quit()
-            
+            mailer.send(config, msg)
             logger.info(f"Email notification sent successfully to {len(recipient_list)} admin(s)")
             return True
-            
-        except smtplib.SMTPException as e:
+
+        except aiosmtplib.SMTPException as e:
             logger.error(f"SMTP error while sending email: {e}")
             return False
         except Exception as e:
             logger.error(f"Error sending email: {e}")
             return False
-            
+
     except Exception as e:
-        logger.error(f"Unexpected error in send_email_notification: {e}")
+        logger.error(f"Unexpected error in send_admin_email: {e}")
         return False
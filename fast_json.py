@@ -0,0 +1,64 @@
+"""
+Fast JSON responses
+
+FastJSONResponse (the app's default response class) encodes with
+pydantic-core's Rust serializer instead of json.dumps. List endpoints go
+further with model_list_response: the ORM rows are validated and dumped
+to bytes in one pass through a cached TypeAdapter for List[<schema>],
+skipping FastAPI's per-row response_model validation and the intermediate
+dicts.
+
+Because these helpers return a ready Response, FastAPI does not apply the
+endpoint's response_model to it: the response_model is only documentation
+(the OpenAPI schema), and the model passed to the helper is what actually
+shapes the body. Keep the two the same.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode content as compact UTF-8 JSON, like JSONResponse does.
+    Pydantic models, lists and dicts are encoded natively; anything else
+    (e.g. ORM objects) falls back to jsonable_encoder.
+    """
+    return to_json(content, fallback=jsonable_encoder)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded by pydantic-core"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter for List[model], built once per schema"""
+    return TypeAdapter(List[model])
+
+
+def dump_model_list(model: Type[BaseModel], rows: Iterable[Any]) -> bytes:
+    """Validate ORM rows (or dicts) as model and serialize the whole list to JSON bytes"""
+    adapter = list_adapter(model)
+    return adapter.dump_json(adapter.validate_python(list(rows), from_attributes=True))
+
+
+def model_response(model: Type[BaseModel], row: Any) -> Response:
+    """A JSON response for one ORM row (or dict) validated as model (not as the route's response_model)"""
+    return Response(model.model_validate(row).model_dump_json().encode("utf-8"), media_type="application/json")
+
+
+def model_list_response(model: Type[BaseModel], rows: Iterable[Any],
+                        headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    A JSON list response for rows, serialized in bulk through model's TypeAdapter.
+    The route's response_model is not applied to it.
+    """
+    return Response(dump_model_list(model, rows), media_type="application/json", headers=headers)
@@ -0,0 +1,114 @@
+"""
+HTTP caching for public read endpoints (ETag, Last-Modified, Cache-Control)
+
+Payloads are serialized once and stored in the content cache together with
+their validators, so a repeat visitor sending If-None-Match gets a 304
+without the body being rebuilt or re-sent. Compressed bodies are kept on
+the payload as well, so each encoding is produced once per content version.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+from compression import compress, encoded_etag, negotiate, split_etag
+from config import settings
+from fast_json import dumps
+
+
+class CachedPayload:
+    """A serialized JSON body with its strong ETag and Last-Modified time"""
+
+    def __init__(self, body: bytes, last_modified: Optional[datetime] = None):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.last_modified = last_modified
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        """The body compressed with encoding (compressed on first use, then kept)"""
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = compress(self.body, encoding)
+        return body
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """Strong ETag of one representation: each encoding gets its own"""
+        return encoded_etag(self.etag, encoding)
+
+
+def build_payload(content: Any) -> CachedPayload:
+    """Serialize content like the app's JSON responses and compute its validators"""
+    return CachedPayload(dumps(content), _last_modified(content))
+
+
+def conditional_response(request: Request, payload: CachedPayload) -> Response:
+    """
+    Return 304 if the client's validators match the payload, otherwise the full
+    body, compressed if the client accepts it and it is at least COMPRESSION_MIN_SIZE
+    """
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if len(payload.body) < settings.COMPRESSION_MIN_SIZE:
+        encoding = None
+    headers = {
+        "ETag": payload.etag_for(encoding),
+        "Cache-Control": get_cache_control(request),
+        "Vary": "Accept-Encoding",
+    }
+    if payload.last_modified:
+        headers["Last-Modified"] = format_datetime(payload.last_modified, usegmt=True)
+    if _is_not_modified(request, payload):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=payload.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=payload.encoded(encoding), media_type="application/json", headers=headers)
+
+
+def get_cache_control(request: Request) -> str:
+    """Cache-Control value for the matched route (configurable via HTTP_CACHE_CONTROL)"""
+    route = request.scope.get("route")
+    path = getattr(route, "path", request.url.path)
+    return settings.HTTP_CACHE_CONTROL.get(path, settings.HTTP_CACHE_CONTROL_DEFAULT)
+
+
+def _is_not_modified(request: Request, payload: CachedPayload) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since (RFC 7232 section 6)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(split_etag(_strip_weak(tag))[0] == payload.etag for tag in tags)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and payload.last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return payload.last_modified <= since
+    return False
+
+
+def _strip_weak(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def _last_modified(content: Any) -> Optional[datetime]:
+    """
+    updated_at (or created_at) of a single model or dict.
+    Lists get no Last-Modified: deleting a row would not move the newest
+    timestamp, so only the ETag can validate them.
+    """
+    if isinstance(content, list):
+        return None
+    for field in ("updated_at", "created_at"):
+        value = content.get(field) if isinstance(content, dict) else getattr(content, field, None)
+        if isinstance(value, datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            return value.astimezone(timezone.utc).replace(microsecond=0)
+    return None
@@ -0,0 +1,180 @@
+"""
+Responsive image variants (resized copies in modern formats) for uploaded images
+
+Each new image gets an "image_variants" background job (see jobs.py), which
+resizes it to IMAGE_VARIANT_WIDTHS and encodes IMAGE_VARIANT_FORMATS on a
+process pool, next to the original: uploads/files/ab/<sha256>_<width>w.<format>.
+When the work finishes the
+srcset for each format is saved on the stored_files row, and responses for
+gallery images, blog posts and departments pick it up as `variants`.
+
+Pillow is optional: without it uploads are served at their original size only.
+"""
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from jobs import enqueue_job, job_handler
+from models import StoredFile
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # optional dependency
+    Image = None
+
+# Formats Pillow can resize; GIFs (animation) and SVGs are served as uploaded
+RESIZABLE_EXTENSIONS = {"jpg", "jpeg", "png", "webp", "avif"}
+# Namespaces whose responses include variants
+VARIANT_NAMESPACES = ("gallery", "blog", "departments")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variants_enabled() -> bool:
+    return Image is not None and bool(settings.IMAGE_VARIANT_WIDTHS) and bool(settings.IMAGE_VARIANT_FORMATS)
+
+
+def supported_formats() -> List[str]:
+    """Configured formats this Pillow build can encode"""
+    supported = []
+    for fmt in settings.IMAGE_VARIANT_FORMATS:
+        fmt = fmt.lower()
+        if fmt in ("webp", "avif") and not features.check(fmt):
+            print(f"Pillow was built without {fmt} support, skipping {fmt} image variants")
+            continue
+        supported.append(fmt)
+    return supported
+
+
+def render_variants(path: str, url: str, widths: List[int], formats: List[str], quality: int) -> Dict[str, str]:
+    """
+    Write resized copies of the image at path and return {format: srcset}.
+    Runs in a worker process.
+    """
+    base_path, _ = os.path.splitext(path)
+    base_url, _ = os.path.splitext(url)
+    with Image.open(path) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+    # Never upscale; an image narrower than every width gets one re-encoded copy
+    targets = sorted({w for w in widths if w < image.width}) or [image.width]
+
+    srcsets = {}
+    for fmt in formats:
+        entries = []
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+            if fmt == "jpeg" and resized.mode not in ("RGB", "L"):
+                resized = resized.convert("RGB")
+            extension = "jpg" if fmt == "jpeg" else fmt
+            variant_path = f"{base_path}_{width}w.{extension}"
+            if not os.path.exists(variant_path):
+                temp_path = variant_path + ".part"
+                resized.save(temp_path, format=fmt.upper(), quality=quality)
+                os.replace(temp_path, variant_path)
+            entries.append(f"{base_url}_{width}w.{extension} {width}w")
+        srcsets[fmt] = ", ".join(entries)
+    return srcsets
+
+
+def remove_variants(path: str) -> None:
+    """Delete the variant files of an image (called when the original is deleted)"""
+    base_path, _ = os.path.splitext(path)
+    directory = os.path.dirname(path)
+    prefix = os.path.basename(base_path) + "_"
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.startswith(prefix):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError as e:
+                print(f"Error deleting image variant {name}: {e}")
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawn rather than fork: forking this multithreaded server can copy held locks
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_VARIANT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def needs_variants(url: str) -> bool:
+    return variants_enabled() and url.rsplit(".", 1)[-1].lower() in RESIZABLE_EXTENSIONS
+
+
+def schedule_variants(db: Session, sha256: str, url: str) -> None:
+    """Queue variant generation for a newly stored image in the caller's transaction"""
+    if needs_variants(url):
+        enqueue_job(db, "image_variants", {"sha256": sha256, "url": url})
+
+
+@job_handler("image_variants", concurrency=settings.IMAGE_VARIANT_WORKERS)
+def generate_variants_job(payload: Dict[str, str]) -> None:
+    url = payload["url"]
+    path = url.replace("/uploads/", "uploads/", 1)
+    if not os.path.exists(path):
+        return  # deleted before the job ran
+    # Resizing is CPU bound, so it runs in a worker process rather than on the job thread
+    srcsets = _get_executor().submit(
+        render_variants, path, url, settings.IMAGE_VARIANT_WIDTHS, supported_formats(), settings.IMAGE_VARIANT_QUALITY
+    ).result()
+    save_variants(payload["sha256"], srcsets)
+
+
+def save_variants(sha256: str, srcsets: Dict[str, str]) -> None:
+    """Store the srcsets on the stored_files row and invalidate cached responses"""
+    from cache import bump_content_version
+
+    with SessionLocal() as db:
+        updated = db.query(StoredFile).filter(StoredFile.sha256 == sha256).update(
+            {StoredFile.variants: json.dumps(srcsets)}, synchronize_session=False
+        )
+        if updated:
+            bump_content_version(db, *VARIANT_NAMESPACES)
+        db.commit()
+
+
+def shutdown_variant_executor() -> None:
+    """Stop the image processing pool (called on app shutdown)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def generate_missing_variants() -> int:
+    """Synchronously create variants for every stored image that has none; returns the count"""
+    if not variants_enabled():
+        print("Image variants are disabled (Pillow not installed or no widths/formats configured)")
+        return 0
+    formats = supported_formats()
+    with SessionLocal() as db:
+        pending = db.query(StoredFile.sha256, StoredFile.url).filter(StoredFile.variants.is_(None)).all()
+    count = 0
+    for sha256, url in pending:
+        if not needs_variants(url):
+            continue
+        path = url.replace("/uploads/", "uploads/", 1)
+        try:
+            srcsets = render_variants(path, url, settings.IMAGE_VARIANT_WIDTHS, formats, settings.IMAGE_VARIANT_QUALITY)
+        except Exception as e:
+            print(f"Error generating image variants for {url}: {e}")
+            continue
+        save_variants(sha256, srcsets)
+        count += 1
+    return count
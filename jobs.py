@@ -0,0 +1,269 @@
+"""
+Durable background job queue backed by the jobs table
+
+Handlers enqueue work with enqueue_job(db, job_type, payload) inside their
+own transaction, so a job exists exactly when the write that caused it was
+committed. A JobWorker polls the table, claims due jobs with a conditional
+UPDATE (safe with several workers), and runs them on a thread pool with a
+concurrency limit per job type. Failed jobs are retried with exponential
+backoff until they run out of attempts. While a job runs, its worker
+refreshes locked_at every JOB_HEARTBEAT_SECONDS; only jobs whose worker
+stopped doing so for JOB_LOCK_TIMEOUT_SECONDS (it died) are requeued.
+
+Concurrency limits apply per worker process. The worker runs inside the API
+process when the server runs a single process; with several (WEB_CONCURRENCY
+> 1) each would run its own worker and multiply the limits, so it stays off
+unless JOB_WORKER_IN_PROCESS=true, and jobs are run by a separate process:
+    python -m manage run-worker
+"""
+import json
+import os
+import random
+import socket
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models import Job
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class JobType:
+    """A registered job handler and its concurrency limit"""
+
+    def __init__(self, name: str, handler: Callable[[Dict[str, Any]], None], concurrency: int, max_attempts: int):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+
+
+JOB_TYPES: Dict[str, JobType] = {}
+
+# Wakes the in-process worker as soon as a transaction that enqueued jobs commits
+_wakeup = threading.Event()
+
+
+def job_handler(name: str, concurrency: int = 1, max_attempts: Optional[int] = None):
+    """
+    Register a function as the handler for a job type.
+    The handler receives the job payload (a dict) and should raise to have the job retried.
+    Concurrency can be overridden per type with JOB_CONCURRENCY.
+    """
+    def decorator(func):
+        JOB_TYPES[name] = JobType(
+            name,
+            func,
+            settings.JOB_CONCURRENCY.get(name, concurrency),
+            max_attempts or settings.JOB_MAX_ATTEMPTS,
+        )
+        return func
+    return decorator
+
+
+def enqueue_job(db: Session, job_type: str, payload: Dict[str, Any], delay_seconds: float = 0) -> Job:
+    """Add a job in the caller's transaction; it becomes visible to workers on commit"""
+    job_type_config = JOB_TYPES.get(job_type)
+    job = Job(
+        type=job_type,
+        payload=json.dumps(jsonable_encoder(payload)),
+        status=JOB_PENDING,
+        attempts=0,
+        max_attempts=job_type_config.max_attempts if job_type_config else settings.JOB_MAX_ATTEMPTS,
+        run_at=datetime.utcnow() + timedelta(seconds=delay_seconds),
+    )
+    db.add(job)
+    db.info["enqueued_jobs"] = True
+    return job
+
+
+def worker_in_process() -> bool:
+    """Whether the API process should run a JobWorker (see the module docstring)"""
+    if settings.JOB_WORKER_IN_PROCESS is not None:
+        return settings.JOB_WORKER_IN_PROCESS
+    return settings.WEB_CONCURRENCY <= 1
+
+
+def retry_delay(attempts: int, base: Optional[float] = None, cap: Optional[float] = None) -> float:
+    """Exponential backoff with jitter: base * 2^(attempts - 1), capped"""
+    base = settings.JOB_RETRY_BASE_SECONDS if base is None else base
+    cap = settings.JOB_RETRY_MAX_SECONDS if cap is None else cap
+    delay = min(base * (2 ** (attempts - 1)), cap)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class JobWorker:
+    """Polls the jobs table and runs due jobs"""
+
+    def __init__(self, worker_id: Optional[str] = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running: Dict[str, int] = {}
+        self._running_ids: Set[int] = set()
+        self._running_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, sum(job_type.concurrency for job_type in JOB_TYPES.values())),
+            thread_name_prefix="job",
+        )
+        self._last_purge = datetime.min
+        self._last_heartbeat = datetime.min
+
+    def start(self) -> None:
+        """Run the poll loop on a daemon thread"""
+        self._thread = threading.Thread(target=self.run, name="job-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        _wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self) -> None:
+        print(f"Job worker {self.worker_id} started ({', '.join(sorted(JOB_TYPES))})")
+        while not self._stop.is_set():
+            try:
+                claimed = self.poll_once()
+            except Exception as e:
+                print(f"Job worker poll failed: {e}")
+                claimed = 0
+            if not claimed:
+                _wakeup.wait(settings.JOB_POLL_INTERVAL)
+                _wakeup.clear()
+
+    def poll_once(self) -> int:
+        """Claim and start as many due jobs as the concurrency limits allow"""
+        claimed = 0
+        with SessionLocal() as db:
+            self._heartbeat(db)
+            self._release_stale(db)
+            self._purge_finished(db)
+            now = datetime.utcnow()
+            for job_type in JOB_TYPES.values():
+                with self._running_lock:
+                    free = job_type.concurrency - self._running.get(job_type.name, 0)
+                if free <= 0:
+                    continue
+                candidates = (
+                    db.query(Job.id)
+                    .filter(Job.type == job_type.name, Job.status == JOB_PENDING, Job.run_at <= now)
+                    .order_by(Job.run_at, Job.id)
+                    .limit(free)
+                    .all()
+                )
+                for (job_id,) in candidates:
+                    # Only one worker's UPDATE can move a given job out of pending
+                    won = db.query(Job).filter(Job.id == job_id, Job.status == JOB_PENDING).update(
+                        {Job.status: JOB_RUNNING, Job.locked_by: self.worker_id, Job.locked_at: now},
+                        synchronize_session=False,
+                    )
+                    db.commit()
+                    if won:
+                        with self._running_lock:
+                            self._running[job_type.name] = self._running.get(job_type.name, 0) + 1
+                            self._running_ids.add(job_id)
+                        self._executor.submit(self._execute, job_id, job_type)
+                        claimed += 1
+        return claimed
+
+    def _execute(self, job_id: int, job_type: JobType) -> None:
+        try:
+            with SessionLocal() as db:
+                job = db.get(Job, job_id)
+                raw_payload = job.payload
+                attempts = job.attempts + 1
+                max_attempts = job.max_attempts
+            try:
+                # A payload that doesn't decode fails the attempt like a handler error
+                payload = json.loads(raw_payload) if raw_payload else {}
+                job_type.handler(payload)
+                error = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}"
+                print(f"Job {job_id} ({job_type.name}) failed on attempt {attempts}/{max_attempts}: {e}")
+            self._finish(job_id, attempts, max_attempts, error)
+        except Exception as e:
+            # Database unavailable: the job is no longer heartbeated, so it is requeued once stale
+            print(f"Job {job_id} ({job_type.name}) could not be loaded or finished: {e}")
+        finally:
+            with self._running_lock:
+                self._running[job_type.name] -= 1
+                self._running_ids.discard(job_id)
+            _wakeup.set()
+
+    def _finish(self, job_id: int, attempts: int, max_attempts: int, error: Optional[str]) -> None:
+        values = {Job.attempts: attempts, Job.locked_by: None, Job.locked_at: None, Job.last_error: error}
+        if error is None:
+            values[Job.status] = JOB_DONE
+        elif attempts >= max_attempts:
+            values[Job.status] = JOB_FAILED
+        else:
+            values[Job.status] = JOB_PENDING
+            values[Job.run_at] = datetime.utcnow() + timedelta(seconds=retry_delay(attempts))
+        with SessionLocal() as db:
+            # A job requeued as stale (and maybe claimed again elsewhere) is no longer ours to finish
+            db.query(Job).filter(Job.id == job_id, Job.locked_by == self.worker_id).update(
+                values, synchronize_session=False
+            )
+            db.commit()
+
+    def _heartbeat(self, db: Session) -> None:
+        """Refresh locked_at of the jobs this worker is running, so they aren't taken for stale"""
+        now = datetime.utcnow()
+        if now - self._last_heartbeat < timedelta(seconds=settings.JOB_HEARTBEAT_SECONDS):
+            return
+        self._last_heartbeat = now
+        with self._running_lock:
+            job_ids = list(self._running_ids)
+        if not job_ids:
+            return
+        db.query(Job).filter(
+            Job.id.in_(job_ids), Job.status == JOB_RUNNING, Job.locked_by == self.worker_id
+        ).update({Job.locked_at: now}, synchronize_session=False)
+        db.commit()
+
+    def _release_stale(self, db: Session) -> None:
+        """Return jobs whose worker died mid-run (stopped heartbeating) to the queue"""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+        released = db.query(Job).filter(Job.status == JOB_RUNNING, Job.locked_at < cutoff).update(
+            {Job.status: JOB_PENDING, Job.locked_by: None, Job.locked_at: None},
+            synchronize_session=False,
+        )
+        db.commit()
+        if released:
+            print(f"Requeued {released} stale jobs")
+
+    def _purge_finished(self, db: Session) -> None:
+        """Delete completed jobs older than JOB_RETENTION_DAYS (at most every 10 minutes)"""
+        now = datetime.utcnow()
+        if now - self._last_purge < timedelta(minutes=10):
+            return
+        self._last_purge = now
+        cutoff = now - timedelta(days=settings.JOB_RETENTION_DAYS)
+        db.query(Job).filter(Job.status == JOB_DONE, Job.updated_at < cutoff).delete(synchronize_session=False)
+        db.commit()
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _wake_worker_after_commit(session: Session) -> None:
+    if session.info.pop("enqueued_jobs", None):
+        _wakeup.set()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop("enqueued_jobs", None)
@@ -1,22 +1,24 @@
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form, Request, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import FrozenSet, List, Optional, Dict
 import os
 import shutil
 from datetime import datetime
 import asyncio
 import re
 
-from database import SessionLocal, engine, Base
+from database import SessionLocal, AsyncSessionLocal, engine, async_engine, Base, get_pool_metrics
 from models import (
     Branch, Department, BlogPost, ContactMessage, Event, GalleryImage, About, 
     NavigationItem, SiteSettings, User, Testimonial, Document,
-    HomePage, ContactPage, BlogPage, GalleryPage, BranchesPage, DepartmentsPage, EventsPage, DocumentsPage
+    HomePage, ContactPage, BlogPage, GalleryPage, BranchesPage, DepartmentsPage, EventsPage, DocumentsPage,
+    Job
 )
-from sqlalchemy import text, inspect
+from sqlalchemy import text, inspect, select, func
 from schemas import (
     BranchCreate, BranchResponse,
     DepartmentCreate, DepartmentResponse,
@@ -37,20 +39,53 @@ from schemas import (
     BranchesPageCreate, BranchesPageUpdate, BranchesPageResponse,
     DepartmentsPageCreate, DepartmentsPageUpdate, DepartmentsPageResponse,
     EventsPageCreate, EventsPageUpdate, EventsPageResponse,
-    DocumentsPageCreate, DocumentsPageUpdate, DocumentsPageResponse
+    DocumentsPageCreate, DocumentsPageUpdate, DocumentsPageResponse,
+    JobResponse, SearchResult
 )
-from auth import hash_password, verify_token, create_access_token, get_password_hash, verify_password, get_current_user
+from auth import hash_password, verify_token, create_access_token, get_password_hash, verify_password_async, get_current_user, shutdown_password_executor
 from config import settings
-from email_service import send_email_notification
+from email_service import mailer
+from email_outbox import queue_contact_notification
+from cache import content_cache, get_cached, get_cached_async, bump_content_version
+from http_cache import build_payload, conditional_response
+from compression import CompressionMiddleware
+from fast_json import FastJSONResponse, model_list_response, model_response
+from sparse_fields import parse_fields, load_options, partial_schema, narrow
+from pagination import paginate, set_next_cursor, NEXT_CURSOR_HEADER
+from upload_service import receive_upload, store_upload, run_with_uploads, release_upload, get_extension, UploadLimitMiddleware
+from image_variants import shutdown_variant_executor
+from document_text import schedule_text_extraction, shutdown_text_executor
+from metrics import MetricsMiddleware, metrics_response
+from query_stats import QueryStatsMiddleware
+import slow_queries  # noqa: F401  (installs the slow query log when enabled)
+from jobs import JobWorker, enqueue_job, job_handler, worker_in_process
+from search import SEARCH_KINDS, search
 
 # Database tables are created via Alembic migrations
 # Run: alembic upgrade head
 
-app = FastAPI(title="Glorious Church CMS API")
+app = FastAPI(title="Glorious Church CMS API", default_response_class=FastJSONResponse)
+job_worker = None
 
 @app.on_event("startup")
 async def startup_event():
-    pass
+    global job_worker
+    if worker_in_process():
+        job_worker = JobWorker()
+        job_worker.start()
+    elif settings.JOB_WORKER_IN_PROCESS is None:
+        print("Several server processes (WEB_CONCURRENCY > 1): background jobs need python -m manage run-worker")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Close pooled async connections cleanly when the worker stops
+    await async_engine.dispose()
+    shutdown_password_executor()
+    if job_worker:
+        job_worker.stop()
+    mailer.close()
+    shutdown_variant_executor()
+    shutdown_text_executor()
 
 # CORS middleware
 app.add_middleware(
@@ -59,8 +94,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Brotli/gzip for responses that aren't already compressed (cached payloads are)
+app.add_middleware(CompressionMiddleware)
+# SQL statement count and time per request (Server-Timing, query budget warnings)
+app.add_middleware(QueryStatsMiddleware)
+# 413 for oversized uploads before Starlette spools their body to disk
+app.add_middleware(UploadLimitMiddleware)
+# Request count, latency and response size per route, served at /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Mount static files for uploaded images
 os.makedirs("uploads", exist_ok=True)
 os.makedirs("uploads/gallery", exist_ok=True)
@@ -78,6 +123,12 @@ def get_db():
     finally:
         db.close()
 
+# Dependency to get an async DB session (public read endpoints)
+# Shared sync query helpers can be reused through db.run_sync(load_*)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Helper function to update .env file with SMTP settings
 def update_env_file(smtp_sender_email: Optional[str] = None, 
                     smtp_sender_password: Optional[str] = None,
@@ -153,14 +204,41 @@ def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "Glorious Church CMS API"}
 
+@app.get("/api/health/db")
+def database_pool_health(token: str = Depends(verify_token)):
+    """Connection pool metrics (in use, overflow, checkout latency) for sizing DB_POOL_SIZE (Admin only; also on /metrics)"""
+    return get_pool_metrics()
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics(request: Request):
+    """Prometheus scrape endpoint (per-route request metrics)"""
+    return metrics_response(request)
+
+# ============ JOB QUEUE ENDPOINTS ============
+@app.get("/api/jobs")
+def get_job_counts(db: Session = Depends(get_db), token: str = Depends(verify_token)):
+    """Number of background jobs per type and status (Admin only)"""
+    counts = {}
+    for job_type, status, count in db.query(Job.type, Job.status, func.count(Job.id)).group_by(Job.type, Job.status):
+        counts.setdefault(job_type, {})[status] = count
+    return counts
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+def get_job(job_id: int, db: Session = Depends(get_db), token: str = Depends(verify_token)):
+    """Status of a background job (Admin only)"""
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 # ============ AUTH ENDPOINTS ============
 @app.post("/api/auth/login", response_model=TokenResponse)
-def login(login_data: UserLogin, db: Session = Depends(get_db)):
+async def login(login_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """User login - supports both User model and legacy admin"""
     # Try User model first
-    user = db.query(User).filter(User.username == login_data.username).first()
+    user = (await db.execute(select(User).filter(User.username == login_data.username))).scalars().first()
     if user:
-        if verify_password(login_data.password, user.password_hash):
+        if await verify_password_async(login_data.password, user.password_hash):
             if user.is_active == 0:
                 raise HTTPException(status_code=401, detail="User account is inactive")
             token = create_access_token({
@@ -176,7 +254,7 @@ def login(login_data: UserLogin, db: Session = Depends(get_db)):
     
     # Fallback to legacy admin (for backward compatibility)
     if login_data.username == settings.ADMIN_USERNAME: 
-        if verify_password(login_data.password, settings.ADMIN_PASSWORD_HASH):
+        if await verify_password_async(login_data.password, settings.ADMIN_PASSWORD_HASH):
             # Create a temporary user response for legacy admin
             from schemas import UserResponse as LegacyUserResponse
             legacy_user = type('obj', (object,), {
@@ -205,16 +283,21 @@ def login(login_data: UserLogin, db: Session = Depends(get_db)):
 
 # ============ BRANCHES ENDPOINTS ============
 @app.get("/api/branches", response_model=List[BranchResponse])
-def get_branches(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all branches"""
-    branches = db.query(Branch).offset(skip).limit(limit).all()
-    return branches
+def get_branches(skip: int = 0, limit: int = 100, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    """Get all branches (fields: comma-separated subset of fields to return)"""
+    fieldset = parse_fields(fields, BranchResponse)
+    return model_list_response(partial_schema(BranchResponse, fieldset), load_branches(db, skip, limit, fieldset))
+
+def load_branches(db: Session, skip: int = 0, limit: int = 100, fields: Optional[FrozenSet[str]] = None):
+    """Load branches"""
+    return db.query(Branch).options(*load_options(Branch, fields)).offset(skip).limit(limit).all()
 
 @app.post("/api/branches", response_model=BranchResponse)
 def create_branch(branch: BranchCreate, db: Session = Depends(get_db), token: str = Depends(verify_token)):
     """Create a new branch (Admin only)"""
     db_branch = Branch(**branch.dict())
     db.add(db_branch)
+    bump_content_version(db, "branches")
     db.commit()
     db.refresh(db_branch)
     return db_branch
@@ -227,6 +310,7 @@ def update_branch(branch_id: int, branch: BranchCreate, db: Session = Depends(ge
         raise HTTPException(status_code=404, detail="Branch not found")
     for key, value in branch.dict().items():
         setattr(db_branch, key, value)
+    bump_content_version(db, "branches")
     db.commit()
     db.refresh(db_branch)
     return db_branch
@@ -238,24 +322,34 @@ def delete_branch(branch_id: int, db: Session = Depends(get_db), token: str = De
     if not db_branch:
         raise HTTPException(status_code=404, detail="Branch not found")
     db.delete(db_branch)
+    bump_content_version(db, "branches")
     db.commit()
     return {"message": "Branch deleted successfully"}
 
 # ============ DEPARTMENTS ENDPOINTS ============
 @app.get("/api/departments", response_model=List[DepartmentResponse])
-def get_departments(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all departments"""
-    departments = db.query(Department).offset(skip).limit(limit).all()
-    return departments
+def get_departments(skip: int = 0, limit: int = 100, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    """Get all departments (fields: comma-separated subset of fields to return)"""
+    fieldset = parse_fields(fields, DepartmentResponse)
+    return model_list_response(partial_schema(DepartmentResponse, fieldset), load_departments(db, skip, limit, fieldset))
+
+def load_departments(db: Session, skip: int = 0, limit: int = 100, fields: Optional[FrozenSet[str]] = None):
+    """Load departments"""
+    return db.query(Department).options(*load_options(Department, fields)).offset(skip).limit(limit).all()
 
 @app.get("/api/departments/{id}", response_model=DepartmentResponse)
-def get_departments(id:int, db: Session = Depends(get_db)):
+def get_departments(id:int, fields: Optional[str] = None, db: Session = Depends(get_db)):
     """Get all departments"""
-    departments = db.query(Department).filter(Department.id == id).first()
-    return departments
+    fieldset = parse_fields(fields, DepartmentResponse)
+    departments = db.query(Department).options(*load_options(Department, fieldset)).filter(Department.id == id).first()
+    if not departments:
+        raise HTTPException(status_code=404, detail="Department not found")
+    if fieldset is None:
+        return departments
+    return model_response(partial_schema(DepartmentResponse, fieldset), departments)
 
 @app.post("/api/departments", response_model=DepartmentResponse)
-def create_department(
+async def create_department(
     name: str = Form(...),
     description: Optional[str] = Form(None),
     icon: Optional[str] = Form(None),
@@ -264,22 +358,21 @@ def create_department(
     token: str = Depends(verify_token)
 ):
     """Create a new department (Admin only)"""
-    image_url = None
-    if image:
-        filename = f"dept_{datetime.now().timestamp()}_{image.filename}"
-        filepath = os.path.join("uploads/departments", filename)
-        with open(filepath, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        image_url = f"/uploads/departments/{filename}"
-    
-    db_department = Department(name=name, description=description, icon=icon, image_url=image_url)
-    db.add(db_department)
-    db.commit()
-    db.refresh(db_department)
-    return db_department
+    staged = await receive_upload(image, "departments") if image else None
+    
+    def write():
+        image_url = store_upload(db, staged).url if staged else None
+        db_department = Department(name=name, description=description, icon=icon, image_url=image_url)
+        db.add(db_department)
+        bump_content_version(db, "departments")
+        db.commit()
+        db.refresh(db_department)
+        return db_department
+    
+    return await run_with_uploads(write, staged)
 
 @app.put("/api/departments/{dept_id}", response_model=DepartmentResponse)
-def update_department(
+async def update_department(
     dept_id: int,
     name: str = Form(...),
     description: Optional[str] = Form(None),
@@ -290,40 +383,36 @@ def update_department(
     token: str = Depends(verify_token)
 ):
     """Update a department (Admin only)"""
-    db_department = db.query(Department).filter(Department.id == dept_id).first()
-    if not db_department:
-        raise HTTPException(status_code=404, detail="Department not found")
+    staged = await receive_upload(image, "departments") if image else None
     
-    # Update basic fields
-    db_department.name = name
-    db_department.description = description
-    db_department.icon = icon
-    
-    # Handle image upload
-    if image:
-        # Delete old image if exists
-        if db_department.image_url:
-            old_path = db_department.image_url.replace("/uploads/", "uploads/")
-            if os.path.exists(old_path):
-                os.remove(old_path)
-        # Save new image
-        filename = f"dept_{datetime.now().timestamp()}_{image.filename}"
-        filepath = os.path.join("uploads/departments", filename)
-        with open(filepath, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        db_department.image_url = f"/uploads/departments/{filename}"
-    
-    # Handle image deletion (empty string means delete)
-    if image_url is not None and image_url == '':
-        if db_department.image_url:
-            old_path = db_department.image_url.replace("/uploads/", "uploads/")
-            if os.path.exists(old_path):
-                os.remove(old_path)
-        db_department.image_url = None
+    def write():
+        db_department = db.query(Department).filter(Department.id == dept_id).first()
+        if not db_department:
+            raise HTTPException(status_code=404, detail="Department not found")
+        
+        # Update basic fields
+        db_department.name = name
+        db_department.description = description
+        db_department.icon = icon
+        
+        # Handle image upload
+        if staged:
+            # Release old image if exists
+            release_upload(db, db_department.image_url)
+            # Save new image
+            db_department.image_url = store_upload(db, staged).url
+        
+        # Handle image deletion (empty string means delete)
+        if image_url is not None and image_url == '':
+            release_upload(db, db_department.image_url)
+            db_department.image_url = None
+        
+        bump_content_version(db, "departments")
+        db.commit()
+        db.refresh(db_department)
+        return db_department
     
-    db.commit()
-    db.refresh(db_department)
-    return db_department
+    return await run_with_uploads(write, staged)
 
 @app.delete("/api/departments/{dept_id}")
 def delete_department(dept_id: int, db: Session = Depends(get_db), token: str = Depends(verify_token)):
@@ -332,33 +421,46 @@ def delete_department(dept_id: int, db: Session = Depends(get_db), token: str =
     if not db_department:
         raise HTTPException(status_code=404, detail="Department not found")
     
-    # Delete associated image file if exists
-    if db_department.image_url:
-        old_path = db_department.image_url.replace("/uploads/", "uploads/")
-        if os.path.exists(old_path):
-            os.remove(old_path)
+    # Delete associated image file once nothing else uses it
+    release_upload(db, db_department.image_url)
     
     db.delete(db_department)
+    bump_content_version(db, "departments")
     db.commit()
     return {"message": "Department deleted successfully"}
 
 # ============ BLOG ENDPOINTS ============
 @app.get("/api/blog", response_model=List[BlogPostResponse])
-def get_blog_posts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all blog posts"""
-    posts = db.query(BlogPost).order_by(BlogPost.created_at.desc()).offset(skip).limit(limit).all()
-    return posts
+async def get_blog_posts(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get all blog posts (pass the X-Next-Cursor header back as cursor for the next page).
+    fields: comma-separated subset of fields to return, e.g. id,title,created_at for an index
+    """
+    fieldset = parse_fields(fields, BlogPostResponse)
+    posts, next_cursor = await db.run_sync(load_blog_posts, skip, limit, cursor, fieldset)
+    response = model_list_response(partial_schema(BlogPostResponse, fieldset), posts)
+    set_next_cursor(response, next_cursor)
+    return response
+
+def load_blog_posts(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                    fields: Optional[FrozenSet[str]] = None):
+    """Load a page of blog posts, newest first"""
+    query = db.query(BlogPost).options(*load_options(BlogPost, fields, BlogPost.created_at))
+    return paginate(query, BlogPost.created_at, BlogPost.id, cursor, skip, limit, descending=True)
 
 @app.get("/api/blog/{post_id}", response_model=BlogPostResponse)
-def get_blog_post(post_id: int, db: Session = Depends(get_db)):
+async def get_blog_post(post_id: int, fields: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
     """Get a single blog post"""
-    post = db.query(BlogPost).filter(BlogPost.id == post_id).first()
+    fieldset = parse_fields(fields, BlogPostResponse)
+    post = await db.get(BlogPost, post_id, options=load_options(BlogPost, fieldset))
     if not post:
         raise HTTPException(status_code=404, detail="Blog post not found")
-    return post
+    if fieldset is None:
+        return post
+    return model_response(partial_schema(BlogPostResponse, fieldset), post)
 
 @app.post("/api/blog", response_model=BlogPostResponse)
-def create_blog_post(
+async def create_blog_post(
     title: str = Form(...),
     content: str = Form(...),
     category: Optional[str] = Form(None),
@@ -368,22 +470,21 @@ def create_blog_post(
     token: str = Depends(verify_token)
 ):
     """Create a new blog post (Admin only)"""
-    image_url = None
-    if image:
-        filename = f"blog_{datetime.now().timestamp()}_{image.filename}"
-        filepath = os.path.join("uploads/blog", filename)
-        with open(filepath, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        image_url = f"/uploads/blog/{filename}"
-    
-    db_post = BlogPost(title=title, content=content, image_url=image_url, category=category, author=author)
-    db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
-    return db_post
+    staged = await receive_upload(image, "blog") if image else None
+    
+    def write():
+        image_url = store_upload(db, staged).url if staged else None
+        db_post = BlogPost(title=title, content=content, image_url=image_url, category=category, author=author)
+        db.add(db_post)
+        bump_content_version(db, "blog")
+        db.commit()
+        db.refresh(db_post)
+        return db_post
+    
+    return await run_with_uploads(write, staged)
 
 @app.put("/api/blog/{post_id}", response_model=BlogPostResponse)
-def update_blog_post(
+async def update_blog_post(
     post_id: int,
     title: str = Form(...),
     content: str = Form(...),
@@ -394,31 +495,30 @@ def update_blog_post(
     token: str = Depends(verify_token)
 ):
     """Update a blog post (Admin only)"""
-    db_post = db.query(BlogPost).filter(BlogPost.id == post_id).first()
-    if not db_post:
-        raise HTTPException(status_code=404, detail="Blog post not found")
+    staged = await receive_upload(image, "blog") if image else None
     
-    db_post.title = title
-    db_post.content = content
-    if category is not None:
-        db_post.category = category
-    if author is not None:
-        db_post.author = author
-    
-    if image:
-        if db_post.image_url:
-            old_path = db_post.image_url.replace("/uploads/", "uploads/")
-            if os.path.exists(old_path):
-                os.remove(old_path)
-        filename = f"blog_{datetime.now().timestamp()}_{image.filename}"
-        filepath = os.path.join("uploads/blog", filename)
-        with open(filepath, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        db_post.image_url = f"/uploads/blog/{filename}"
+    def write():
+        db_post = db.query(BlogPost).filter(BlogPost.id == post_id).first()
+        if not db_post:
+            raise HTTPException(status_code=404, detail="Blog post not found")
+        
+        db_post.title = title
+        db_post.content = content
+        if category is not None:
+            db_post.category = category
+        if author is not None:
+            db_post.author = author
+        
+        if staged:
+            release_upload(db, db_post.image_url)
+            db_post.image_url = store_upload(db, staged).url
+        
+        bump_content_version(db, "blog")
+        db.commit()
+        db.refresh(db_post)
+        return db_post
     
-    db.commit()
-    db.refresh(db_post)
-    return db_post
+    return await run_with_uploads(write, staged)
 
 @app.delete("/api/blog/{post_id}")
 def delete_blog_post(post_id: int, db: Session = Depends(get_db), token: str = Depends(verify_token)):
@@ -426,61 +526,46 @@ def delete_blog_post(post_id: int, db: Session = Depends(get_db), token: str = D
     db_post = db.query(BlogPost).filter(BlogPost.id == post_id).first()
     if not db_post:
         raise HTTPException(status_code=404, detail="Blog post not found")
-    if db_post.image_url:
-        old_path = db_post.image_url.replace("/uploads/", "uploads/")
-        if os.path.exists(old_path):
-            os.remove(old_path)
+    release_upload(db, db_post.image_url)
     db.delete(db_post)
+    bump_content_version(db, "blog")
     db.commit()
     return {"message": "Blog post deleted successfully"}
 
 # ============ CONTACT ENDPOINTS ============
 @app.post("/api/contact", response_model=ContactMessageResponse)
-async def create_contact_message(
+def create_contact_message(
     message: ContactMessageCreate, 
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Create a contact message and send email notification to admins"""
     db_message = ContactMessage(**message.dict())
     db.add(db_message)
+    db.flush()
+    
+    # Notify the admins through the email outbox (committed together with the message)
+    queue_contact_notification(db, db_message)
     db.commit()
     db.refresh(db_message)
     
-    # Send email notification in background
-    background_tasks.add_task(send_notification_email, db_message, db)
-    
     return db_message
 
-def send_notification_email(message: ContactMessage, db: Session):
-    """Background task to send email notification"""
-    try:
-        # Get admin emails from database
-        settings = db.query(SiteSettings).first()
-        if not settings or not settings.admin_emails:
-            return
-        
-        # Send email notification (synchronous)
-        # SMTP settings are read from database (SiteSettings) or fallback to environment variables
-        send_email_notification(
-            admin_emails=settings.admin_emails,
-            sender_name=message.name,
-            sender_email=message.email,
-            subject=message.subject,
-            message=message.message,
-            smtp_sender_email=settings.smtp_sender_email,
-            smtp_sender_password=settings.smtp_sender_password,
-            smtp_host=settings.smtp_host,
-            smtp_port=settings.smtp_port
-        )
-    except Exception as e:
-        print(f"Error sending notification email: {e}")
-
 @app.get("/api/contact", response_model=List[ContactMessageResponse])
-def get_contact_messages(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), token: str = Depends(verify_token)):
-    """Get all contact messages (Admin only)"""
-    messages = db.query(ContactMessage).order_by(ContactMessage.created_at.desc()).offset(skip).limit(limit).all()
-    return messages
+def get_contact_messages(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    token: str = Depends(verify_token)
+):
+    """Get all contact messages (Admin only). Pass the X-Next-Cursor header back as cursor for the next page"""
+    messages, next_cursor = paginate(
+        db.query(ContactMessage), ContactMessage.created_at, ContactMessage.id,
+        cursor, skip, limit, descending=True
+    )
+    response = model_list_response(ContactMessageResponse, messages)
+    set_next_cursor(response, next_cursor)
+    return response
 
 
 @app.delete("/api/contact/{message_id}")
@@ -495,25 +580,41 @@ def delete_contact_message(message_id: int, db: Session = Depends(get_db), token
 
 # ============ EVENTS ENDPOINTS ============
 @app.get("/api/events", response_model=List[EventResponse])
-def get_events(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all events"""
-    events = db.query(Event).order_by(Event.date.asc()).offset(skip).limit(limit).all()
-    return events
+async def get_events(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get all events (pass the X-Next-Cursor header back as cursor for the next page).
+    fields: comma-separated subset of fields to return
+    """
+    fieldset = parse_fields(fields, EventResponse)
+    events, next_cursor = await db.run_sync(load_events, skip, limit, cursor, fieldset)
+    response = model_list_response(partial_schema(EventResponse, fieldset), events)
+    set_next_cursor(response, next_cursor)
+    return response
+
+def load_events(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                fields: Optional[FrozenSet[str]] = None):
+    """Load a page of events ordered by date"""
+    query = db.query(Event).options(*load_options(Event, fields, Event.date))
+    return paginate(query, Event.date, Event.id, cursor, skip, limit)
 
 
 @app.get("/api/events/{event_id}", response_model=EventResponse)
-def get_event(event_id: int, db: Session = Depends(get_db)):
+async def get_event(event_id: int, fields: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
     """Get an event by ID"""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    fieldset = parse_fields(fields, EventResponse)
+    event = await db.get(Event, event_id, options=load_options(Event, fieldset))
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
-    return event
+    if fieldset is None:
+        return event
+    return model_response(partial_schema(EventResponse, fieldset), event)
 
 @app.post("/api/events", response_model=EventResponse)
 def create_event(event: EventCreate, db: Session = Depends(get_db), token: str = Depends(verify_token)):
     """Create a new event (Admin only)"""
     db_event = Event(**event.dict())
     db.add(db_event)
+    bump_content_version(db, "events")
     db.commit()
     db.refresh(db_event)
     return db_event
@@ -526,6 +627,7 @@ def update_event(event_id: int, event: EventCreate, db: Session = Depends(get_db
         raise HTTPException(status_code=404, detail="Event not found")
     for key, value in event.dict().items():
         setattr(db_event, key, value)
+    bump_content_version(db, "events")
     db.commit()
     db.refresh(db_event)
     return db_event
@@ -537,21 +639,41 @@ def delete_event(event_id: int, db: Session = Depends(get_db), token: str = Depe
     if not db_event:
         raise HTTPException(status_code=404, detail="Event not found")
     db.delete(db_event)
+    bump_content_version(db, "events")
     db.commit()
     return {"message": "Event deleted successfully"}
 
 # ============ GALLERY ENDPOINTS ============
 @app.get("/api/gallery", response_model=List[GalleryImageResponse])
-def get_gallery_images(category: Optional[str] = None, db: Session = Depends(get_db)):
-    """Get all gallery images"""
-    query = db.query(GalleryImage)
+async def get_gallery_images(
+    category: Optional[str] = None,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get all gallery images (use limit and the X-Next-Cursor header to page through them).
+    fields: comma-separated subset of fields to return
+    """
+    fieldset = parse_fields(fields, GalleryImageResponse)
+    images, next_cursor = await db.run_sync(load_gallery_images, category, skip, limit, cursor, fieldset)
+    response = model_list_response(partial_schema(GalleryImageResponse, fieldset), images)
+    set_next_cursor(response, next_cursor)
+    return response
+
+def load_gallery_images(db: Session, category: Optional[str] = None, skip: int = 0,
+                        limit: Optional[int] = None, cursor: Optional[str] = None,
+                        fields: Optional[FrozenSet[str]] = None):
+    """Load a page of gallery images, newest first (all of them when limit is None)"""
+    query = db.query(GalleryImage).options(*load_options(GalleryImage, fields, GalleryImage.created_at))
     if category:
         query = query.filter(GalleryImage.category == category)
-    images = query.order_by(GalleryImage.created_at.desc()).all()
-    return images
+    return paginate(query, GalleryImage.created_at, GalleryImage.id, cursor, skip, limit, descending=True)
 
 @app.post("/api/gallery", response_model=GalleryImageResponse)
-def create_gallery_image(
+async def create_gallery_image(
     title: str = Form(...),
     description: Optional[str] = Form(None),
     category: str = Form(...),
@@ -560,17 +682,18 @@ def create_gallery_image(
     token: str = Depends(verify_token)
 ):
     """Upload a gallery image (Admin only)"""
-    filename = f"gallery_{datetime.now().timestamp()}_{image.filename}"
-    filepath = os.path.join("uploads/gallery", filename)
-    with open(filepath, "wb") as buffer:
-        shutil.copyfileobj(image.file, buffer)
-    image_url = f"/uploads/gallery/{filename}"
-    
-    db_image = GalleryImage(title=title, description=description, category=category, image_url=image_url)
-    db.add(db_image)
-    db.commit()
-    db.refresh(db_image)
-    return db_image
+    staged = await receive_upload(image, "gallery")
+    
+    def write():
+        image_url = store_upload(db, staged).url
+        db_image = GalleryImage(title=title, description=description, category=category, image_url=image_url)
+        db.add(db_image)
+        bump_content_version(db, "gallery")
+        db.commit()
+        db.refresh(db_image)
+        return db_image
+    
+    return await run_with_uploads(write, staged)
 
 @app.delete("/api/gallery/{image_id}")
 def delete_gallery_image(image_id: int, db: Session = Depends(get_db), token: str = Depends(verify_token)):
@@ -578,26 +701,32 @@ def delete_gallery_image(image_id: int, db: Session = Depends(get_db), token: st
     db_image = db.query(GalleryImage).filter(GalleryImage.id == image_id).first()
     if not db_image:
         raise HTTPException(status_code=404, detail="Gallery image not found")
-    if db_image.image_url:
-        old_path = db_image.image_url.replace("/uploads/", "uploads/")
-        if os.path.exists(old_path):
-            os.remove(old_path)
+    release_upload(db, db_image.image_url)
     db.delete(db_image)
+    bump_content_version(db, "gallery")
     db.commit()
     return {"message": "Gallery image deleted successfully"}
 
 # ============ TESTIMONIALS ENDPOINTS ============
+def load_testimonials(db: Session) -> List[TestimonialResponse]:
+    """Load active testimonials ordered by order field"""
+    testimonials = db.query(Testimonial).filter(Testimonial.is_active == 1).order_by(Testimonial.order.asc()).all()
+    return [TestimonialResponse.model_validate(t) for t in testimonials]
+
 @app.get("/api/testimonials", response_model=List[TestimonialResponse])
-def get_testimonials(db: Session = Depends(get_db)):
+async def get_testimonials(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get all active testimonials ordered by order field"""
-    testimonials = db.query(Testimonial).filter(Testimonial.is_active == 1).order_by(Testimonial.order.asc()).all()
-    return testimonials
+    payload = await get_cached_async(db, ("testimonials",))
+    if payload is None:
+        generation = content_cache.generation(("testimonials",))
+        payload = content_cache.set(("testimonials",), build_payload(await db.run_sync(load_testimonials)), generation)
+    return conditional_response(request, payload)
 
 @app.get("/api/testimonials/all", response_model=List[TestimonialResponse])
 def get_all_testimonials(db: Session = Depends(get_db), token: str = Depends(verify_token)):
     """Get all testimonials including inactive (Admin only)"""
     testimonials = db.query(Testimonial).order_by(Testimonial.order.asc(), Testimonial.created_at.desc()).all()
-    return testimonials
+    return model_list_response(TestimonialResponse, testimonials)
 
 @app.get("/api/testimonials/{testimonial_id}", response_model=TestimonialResponse)
 def get_testimonial(testimonial_id: int, db: Session = Depends(get_db)):
@@ -612,6 +741,7 @@ def create_testimonial(testimonial: TestimonialCreate, db: Session = Depends(get
     """Create a new testimonial (Admin only)"""
     db_testimonial = Testimonial(**testimonial.dict())
     db.add(db_testimonial)
+    bump_content_version(db, "testimonials")
     db.commit()
     db.refresh(db_testimonial)
     return db_testimonial
@@ -626,6 +756,7 @@ def update_testimonial(testimonial_id: int, testimonial: TestimonialUpdate, db:
     for key, value in testimonial.dict(exclude_unset=True).items():
         setattr(db_testimonial, key, value)
     
+    bump_content_version(db, "testimonials")
     db.commit()
     db.refresh(db_testimonial)
     return db_testimonial
@@ -638,21 +769,30 @@ def delete_testimonial(testimonial_id: int, db: Session = Depends(get_db), token
         raise HTTPException(status_code=404, detail="Testimonial not found")
     
     db.delete(db_testimonial)
+    bump_content_version(db, "testimonials")
     db.commit()
     return {"message": "Testimonial deleted successfully"}
 
 # ============ DOCUMENTS ENDPOINTS ============
+def load_documents(db: Session) -> List[DocumentResponse]:
+    """Load visible documents ordered by order field"""
+    documents = db.query(Document).filter(Document.is_visible == 1).order_by(Document.order.asc(), Document.created_at.desc()).all()
+    return [DocumentResponse.model_validate(d) for d in documents]
+
 @app.get("/api/documents", response_model=List[DocumentResponse])
-def get_documents(db: Session = Depends(get_db)):
+async def get_documents(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get all visible documents"""
-    documents = db.query(Document).filter(Document.is_visible == 1).order_by(Document.order.asc(), Document.created_at.desc()).all()
-    return documents
+    payload = await get_cached_async(db, ("documents",))
+    if payload is None:
+        generation = content_cache.generation(("documents",))
+        payload = content_cache.set(("documents",), build_payload(await db.run_sync(load_documents)), generation)
+    return conditional_response(request, payload)
 
 @app.get("/api/documents/all", response_model=List[DocumentResponse])
 def get_all_documents(db: Session = Depends(get_db), token: str = Depends(verify_token)):
     """Get all documents including hidden (Admin only)"""
     documents = db.query(Document).order_by(Document.order.asc(), Document.created_at.desc()).all()
-    return documents
+    return model_list_response(DocumentResponse, documents)
 
 @app.get("/api/documents/{document_id}", response_model=DocumentResponse)
 def get_document(document_id: int, db: Session = Depends(get_db)):
@@ -699,7 +839,7 @@ def download_document(document_id: int, db: Session = Depends(get_db)):
     )
 
 @app.post("/api/documents", response_model=DocumentResponse)
-def create_document(
+async def create_document(
     title: str = Form(...),
     description: Optional[str] = Form(None),
     is_downloadable: int = Form(1),
@@ -712,36 +852,32 @@ def create_document(
     token: str = Depends(verify_token)
 ):
     """Upload a new document (Admin only)"""
-    # Get file extension
-    file_extension = os.path.splitext(file.filename)[1].lower().lstrip('.')
-    file_size = 0
-    
-    # Save file
-    filename = f"doc_{datetime.now().timestamp()}_{file.filename}"
-    filepath = os.path.join("uploads/documents", filename)
-    
-    with open(filepath, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-        file_size = os.path.getsize(filepath)
-    
-    file_url = f"/uploads/documents/{filename}"
-    
-    db_document = Document(
-        title=title,
-        file_url=file_url,
-        file_type=file_extension,
-        file_size=file_size,
-        description=description,
-        is_downloadable=is_downloadable,
-        is_viewable=is_viewable,
-        prevent_screenshots=prevent_screenshots,
-        is_visible=is_visible,
-        order=order
-    )
-    db.add(db_document)
-    db.commit()
-    db.refresh(db_document)
-    return db_document
+    file_extension = get_extension(file.filename)
+    staged = await receive_upload(file, "documents")
+    
+    def write():
+        stored = store_upload(db, staged)
+        db_document = Document(
+            title=title,
+            file_url=stored.url,
+            file_type=file_extension,
+            file_size=stored.size,
+            description=description,
+            is_downloadable=is_downloadable,
+            is_viewable=is_viewable,
+            prevent_screenshots=prevent_screenshots,
+            is_visible=is_visible,
+            order=order
+        )
+        db.add(db_document)
+        db.flush()
+        schedule_text_extraction(db, db_document)
+        bump_content_version(db, "documents")
+        db.commit()
+        db.refresh(db_document)
+        return db_document
+    
+    return await run_with_uploads(write, staged)
 
 @app.put("/api/documents/{document_id}", response_model=DocumentResponse)
 def update_document(
@@ -776,6 +912,7 @@ def update_document(
     if order is not None:
         db_document.order = order
     
+    bump_content_version(db, "documents")
     db.commit()
     db.refresh(db_document)
     return db_document
@@ -787,13 +924,11 @@ def delete_document(document_id: int, db: Session = Depends(get_db), token: str
     if not db_document:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    # Delete file
-    if db_document.file_url:
-        file_path = db_document.file_url.replace("/uploads/", "uploads/")
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    # Delete file once nothing else uses it
+    release_upload(db, db_document.file_url)
     
     db.delete(db_document)
+    bump_content_version(db, "documents")
     db.commit()
     return {"message": "Document deleted successfully"}
 
@@ -893,6 +1028,7 @@ def create_about(
     
     db_about = About(**create_data)
     db.add(db_about)
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_about)
     return db_about
@@ -924,28 +1060,38 @@ def update_about(
             if hasattr(db_about, key):
                 setattr(db_about, key, value)
     
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_about)
     return db_about
 
 # ============ NAVIGATION ENDPOINTS ============
+def load_navigation(db: Session) -> List[NavigationItemResponse]:
+    """Load active navigation items ordered by order"""
+    items = db.query(NavigationItem).filter(NavigationItem.is_active == 1).order_by(NavigationItem.order.asc()).all()
+    return [NavigationItemResponse.model_validate(item) for item in items]
+
 @app.get("/api/navigation", response_model=List[NavigationItemResponse])
-def get_navigation(db: Session = Depends(get_db)):
+async def get_navigation(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get all active navigation items ordered by order"""
-    items = db.query(NavigationItem).filter(NavigationItem.is_active == 1).order_by(NavigationItem.order.asc()).all()
-    return items
+    payload = await get_cached_async(db, ("navigation",))
+    if payload is None:
+        generation = content_cache.generation(("navigation",))
+        payload = content_cache.set(("navigation",), build_payload(await db.run_sync(load_navigation)), generation)
+    return conditional_response(request, payload)
 
 @app.get("/api/navigation/all", response_model=List[NavigationItemResponse])
 def get_all_navigation(db: Session = Depends(get_db), token: str = Depends(verify_token)):
     """Get all navigation items including inactive (Admin only)"""
     items = db.query(NavigationItem).order_by(NavigationItem.order.asc()).all()
-    return items
+    return model_list_response(NavigationItemResponse, items)
 
 @app.post("/api/navigation", response_model=NavigationItemResponse)
 def create_navigation_item(item: NavigationItemCreate, db: Session = Depends(get_db), token: str = Depends(verify_token)):
     """Create a navigation item (Admin only)"""
     db_item = NavigationItem(**item.dict())
     db.add(db_item)
+    bump_content_version(db, "navigation")
     db.commit()
     db.refresh(db_item)
     return db_item
@@ -961,6 +1107,7 @@ def update_navigation_item(item_id: int, item: NavigationItemUpdate, db: Session
     for key, value in update_data.items():
         setattr(db_item, key, value)
     
+    bump_content_version(db, "navigation")
     db.commit()
     db.refresh(db_item)
     return db_item
@@ -972,6 +1119,7 @@ def delete_navigation_item(item_id: int, db: Session = Depends(get_db), token: s
     if not db_item:
         raise HTTPException(status_code=404, detail="Navigation item not found")
     db.delete(db_item)
+    bump_content_version(db, "navigation")
     db.commit()
     return {"message": "Navigation item deleted successfully"}
 
@@ -1095,6 +1243,7 @@ def update_html_file_content(page_name: str, file_data: dict, token: str = Depen
         # Note: html_content field was removed, so we'll just save to file
         if page and hasattr(page, 'html_content'):
             page.html_content = content
+            bump_content_version(db, "pages")
             db.commit()
             db.refresh(page)
             print(f"Page {page_name} HTML content saved to database")
@@ -1140,9 +1289,8 @@ def update_html_file_content(page_name: str, file_data: dict, token: str = Depen
         raise HTTPException(status_code=500, detail=f"Error writing file: {str(e)}")
 
 # ============ SITE SETTINGS ENDPOINTS ============
-@app.get("/api/settings", response_model=SiteSettingsResponse)
-def get_site_settings(db: Session = Depends(get_db)):
-    """Get site settings"""
+def load_site_settings(db: Session) -> SiteSettingsResponse:
+    """Load site settings, creating the default row if none exists"""
     settings = db.query(SiteSettings).first()
     
     if not settings:
@@ -1169,10 +1317,22 @@ def get_site_settings(db: Session = Depends(get_db)):
     if settings.social_section_visible is None:
         settings.social_section_visible = 0
     
-    return settings
+    return SiteSettingsResponse.model_validate(settings)
+
+@app.get("/api/settings", response_model=SiteSettingsResponse)
+async def get_site_settings(request: Request, fields: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """Get site settings (fields: comma-separated subset of fields to return)"""
+    fieldset = parse_fields(fields, SiteSettingsResponse)
+    cache_key = ("settings",) if fieldset is None else ("settings", fieldset)
+    payload = await get_cached_async(db, cache_key)
+    if payload is None:
+        generation = content_cache.generation(cache_key)
+        site_settings = await db.run_sync(load_site_settings)
+        payload = content_cache.set(cache_key, build_payload(narrow(SiteSettingsResponse, site_settings, fieldset)), generation)
+    return conditional_response(request, payload)
 
 @app.put("/api/settings", response_model=SiteSettingsResponse)
-def update_site_settings(
+async def update_site_settings(
     hero_title: Optional[str] = Form(None),
     hero_subtitle: Optional[str] = Form(None),
     hero_button1_text: Optional[str] = Form(None),
@@ -1255,195 +1415,181 @@ def update_site_settings(
     token: str = Depends(verify_token)
 ):
     """Update site settings (Admin only)"""
-    settings = db.query(SiteSettings).first()
-    if not settings:
-        settings = SiteSettings()
-        db.add(settings)
+    hero_staged = await receive_upload(hero_image, "hero") if hero_image else None
+    try:
+        background_staged = await receive_upload(hero_background_image, "hero") if hero_background_image else None
+    except BaseException:
+        if hero_staged:
+            hero_staged.discard()
+        raise
     
-    # Handle hero image upload
-    if hero_image:
-        if settings.hero_image_url:
-            old_path = settings.hero_image_url.replace("/uploads/", "uploads/")
-            if os.path.exists(old_path):
-                os.remove(old_path)
-        filename = f"hero_{datetime.now().timestamp()}_{hero_image.filename}"
-        filepath = os.path.join("uploads/hero", filename)
-        with open(filepath, "wb") as buffer:
-            shutil.copyfileobj(hero_image.file, buffer)
-        settings.hero_image_url = f"/uploads/hero/{filename}"
-    
-    # Handle hero background image upload
-    if hero_background_image:
-        if settings.hero_background_image_url:
-            old_path = settings.hero_background_image_url.replace("/uploads/", "uploads/")
-            if os.path.exists(old_path):
-                os.remove(old_path)
-        filename = f"hero_bg_{datetime.now().timestamp()}_{hero_background_image.filename}"
-        filepath = os.path.join("uploads/hero", filename)
-        with open(filepath, "wb") as buffer:
-            shutil.copyfileobj(hero_background_image.file, buffer)
-        settings.hero_background_image_url = f"/uploads/hero/{filename}"
-    
-    # Handle image deletion (empty string means delete)
-    # Check if hero_image_url is explicitly set to empty string (deletion request)
-    if hero_image_url is not None:
-        if hero_image_url == '':
-            # Delete the image file
-            if settings.hero_image_url:
-                old_path = settings.hero_image_url.replace("/uploads/", "uploads/")
-                if os.path.exists(old_path):
-                    try:
-                        os.remove(old_path)
-                    except Exception as e:
-                        print(f"Error deleting hero image: {e}")
-            settings.hero_image_url = None
-            settings.hero_image_visible = 0  # Hide when deleted
-    
-    if hero_background_image_url is not None:
-        if hero_background_image_url == '':
-            # Delete the image file
-            if settings.hero_background_image_url:
-                old_path = settings.hero_background_image_url.replace("/uploads/", "uploads/")
-                if os.path.exists(old_path):
-                    try:
-                        os.remove(old_path)
-                    except Exception as e:
-                        print(f"Error deleting background image: {e}")
-            settings.hero_background_image_url = None
-            settings.hero_background_image_visible = 0  # Hide when deleted
-    
-    # Update all other fields
-    update_fields = {
-        'hero_title': hero_title,
-        'hero_subtitle': hero_subtitle,
-        'hero_button1_text': hero_button1_text,
-        'hero_button1_url': hero_button1_url,
-        'hero_button1_visible': int(hero_button1_visible) if hero_button1_visible else None,
-        'hero_button2_text': hero_button2_text,
-        'hero_button2_url': hero_button2_url,
-        'hero_button2_visible': int(hero_button2_visible) if hero_button2_visible else None,
-        'hero_image_visible': int(hero_image_visible) if hero_image_visible else None,
-        'hero_background_image_visible': int(hero_background_image_visible) if hero_background_image_visible else None,
-        'hero_layout_direction': hero_layout_direction if hero_layout_direction else None,
-        'site_name': site_name,
-        'tagline': tagline,
-        'site_name_font_family': site_name_font_family,
-        'site_name_font_size': site_name_font_size,
-        'site_name_font_weight': site_name_font_weight,
-        'site_name_color': site_name_color,
-        'tagline_font_family': tagline_font_family,
-        'tagline_font_size': tagline_font_size,
-        'tagline_font_weight': tagline_font_weight,
-        'tagline_color': tagline_color,
-        'theme_primary': theme_primary,
-        'theme_secondary': theme_secondary,
-        'theme_success': theme_success,
-        'theme_danger': theme_danger,
-        'theme_warning': theme_warning,
-        'theme_info': theme_info,
-        'theme_light': theme_light,
-        'theme_dark': theme_dark,
-        'admin_emails': admin_emails,
-        # SMTP server configuration
-        'smtp_sender_email': smtp_sender_email,
-        'smtp_sender_password': smtp_sender_password,
-        'smtp_host': smtp_host,
-        'smtp_port': int(smtp_port) if smtp_port and smtp_port.strip() else None,
-        'admin_panel_title': admin_panel_title,
-        # Social media links
-        'social_facebook_url': social_facebook_url,
-        'social_twitter_url': social_twitter_url,
-        'social_instagram_url': social_instagram_url,
-        'social_youtube_url': social_youtube_url,
-        'social_linkedin_url': social_linkedin_url,
-        'social_section_visible': int(social_section_visible) if social_section_visible is not None and social_section_visible != '' else None,
-        # Quick links
-        'quick_links_section_visible': int(quick_links_section_visible) if (quick_links_section_visible is not None and str(quick_links_section_visible).strip() != '') else None,
-        'quick_links_pages': quick_links_pages if quick_links_pages is not None else None,
-        # Contact information
-        'contact_email': contact_email,
-        'contact_phone': contact_phone,
-        'contact_address': contact_address,
-        'contact_office_hours': contact_office_hours,
-        'contact_section_visible': int(contact_section_visible) if contact_section_visible is not None and contact_section_visible != '' else None,
-        # Partner section (Become a Partner)
-        'partner_section_visible': int(partner_section_visible) if partner_section_visible is not None and partner_section_visible != '' else None,
-        'partner_section_title': partner_section_title,
-        'partner_section_content': partner_section_content,
-        'partner_section_button_text': partner_section_button_text,
-        'partner_section_button_url': partner_section_button_url,
-        # Statistics section (Our Numbers)
-        'statistics_section_visible': int(statistics_section_visible) if statistics_section_visible is not None and statistics_section_visible != '' else None,
-        'statistics_section_title': statistics_section_title
-    }
+    def write():
+        settings = db.query(SiteSettings).first()
+        if not settings:
+            settings = SiteSettings()
+            db.add(settings)
+    
+        # Handle hero image upload
+        if hero_staged:
+            release_upload(db, settings.hero_image_url)
+            settings.hero_image_url = store_upload(db, hero_staged).url
+    
+        # Handle hero background image upload
+        if background_staged:
+            release_upload(db, settings.hero_background_image_url)
+            settings.hero_background_image_url = store_upload(db, background_staged).url
+    
+        # Handle image deletion (empty string means delete)
+        # Check if hero_image_url is explicitly set to empty string (deletion request)
+        if hero_image_url is not None:
+            if hero_image_url == '':
+                # Delete the image file once nothing else uses it
+                release_upload(db, settings.hero_image_url)
+                settings.hero_image_url = None
+                settings.hero_image_visible = 0  # Hide when deleted
+    
+        if hero_background_image_url is not None:
+            if hero_background_image_url == '':
+                # Delete the image file once nothing else uses it
+                release_upload(db, settings.hero_background_image_url)
+                settings.hero_background_image_url = None
+                settings.hero_background_image_visible = 0  # Hide when deleted
+    
+        # Update all other fields
+        update_fields = {
+            'hero_title': hero_title,
+            'hero_subtitle': hero_subtitle,
+            'hero_button1_text': hero_button1_text,
+            'hero_button1_url': hero_button1_url,
+            'hero_button1_visible': int(hero_button1_visible) if hero_button1_visible else None,
+            'hero_button2_text': hero_button2_text,
+            'hero_button2_url': hero_button2_url,
+            'hero_button2_visible': int(hero_button2_visible) if hero_button2_visible else None,
+            'hero_image_visible': int(hero_image_visible) if hero_image_visible else None,
+            'hero_background_image_visible': int(hero_background_image_visible) if hero_background_image_visible else None,
+            'hero_layout_direction': hero_layout_direction if hero_layout_direction else None,
+            'site_name': site_name,
+            'tagline': tagline,
+            'site_name_font_family': site_name_font_family,
+            'site_name_font_size': site_name_font_size,
+            'site_name_font_weight': site_name_font_weight,
+            'site_name_color': site_name_color,
+            'tagline_font_family': tagline_font_family,
+            'tagline_font_size': tagline_font_size,
+            'tagline_font_weight': tagline_font_weight,
+            'tagline_color': tagline_color,
+            'theme_primary': theme_primary,
+            'theme_secondary': theme_secondary,
+            'theme_success': theme_success,
+            'theme_danger': theme_danger,
+            'theme_warning': theme_warning,
+            'theme_info': theme_info,
+            'theme_light': theme_light,
+            'theme_dark': theme_dark,
+            'admin_emails': admin_emails,
+            # SMTP server configuration
+            'smtp_sender_email': smtp_sender_email,
+            'smtp_sender_password': smtp_sender_password,
+            'smtp_host': smtp_host,
+            'smtp_port': int(smtp_port) if smtp_port and smtp_port.strip() else None,
+            'admin_panel_title': admin_panel_title,
+            # Social media links
+            'social_facebook_url': social_facebook_url,
+            'social_twitter_url': social_twitter_url,
+            'social_instagram_url': social_instagram_url,
+            'social_youtube_url': social_youtube_url,
+            'social_linkedin_url': social_linkedin_url,
+            'social_section_visible': int(social_section_visible) if social_section_visible is not None and social_section_visible != '' else None,
+            # Quick links
+            'quick_links_section_visible': int(quick_links_section_visible) if (quick_links_section_visible is not None and str(quick_links_section_visible).strip() != '') else None,
+            'quick_links_pages': quick_links_pages if quick_links_pages is not None else None,
+            # Contact information
+            'contact_email': contact_email,
+            'contact_phone': contact_phone,
+            'contact_address': contact_address,
+            'contact_office_hours': contact_office_hours,
+            'contact_section_visible': int(contact_section_visible) if contact_section_visible is not None and contact_section_visible != '' else None,
+            # Partner section (Become a Partner)
+            'partner_section_visible': int(partner_section_visible) if partner_section_visible is not None and partner_section_visible != '' else None,
+            'partner_section_title': partner_section_title,
+            'partner_section_content': partner_section_content,
+            'partner_section_button_text': partner_section_button_text,
+            'partner_section_button_url': partner_section_button_url,
+            # Statistics section (Our Numbers)
+            'statistics_section_visible': int(statistics_section_visible) if statistics_section_visible is not None and statistics_section_visible != '' else None,
+            'statistics_section_title': statistics_section_title
+        }
     
-    # Update feature flags
-    feature_flags = {
-        'feature_dashboard': feature_dashboard,
-        'feature_blog': feature_blog,
-        'feature_branches': feature_branches,
-        'feature_departments': feature_departments,
-        'feature_events': feature_events,
-        'feature_gallery': feature_gallery,
-        'feature_contact': feature_contact,
-        'feature_pages': feature_pages,
-        'feature_about': feature_about,
-        'feature_navigation': feature_navigation,
-        'feature_users': feature_users,
-        'feature_settings': feature_settings,
-    }
+        # Update feature flags
+        feature_flags = {
+            'feature_dashboard': feature_dashboard,
+            'feature_blog': feature_blog,
+            'feature_branches': feature_branches,
+            'feature_departments': feature_departments,
+            'feature_events': feature_events,
+            'feature_gallery': feature_gallery,
+            'feature_contact': feature_contact,
+            'feature_pages': feature_pages,
+            'feature_about': feature_about,
+            'feature_navigation': feature_navigation,
+            'feature_users': feature_users,
+            'feature_settings': feature_settings,
+        }
     
-    for flag_name, flag_value in feature_flags.items():
-        if flag_value is not None:
-            # Convert string "1" or "0" to int
-            setattr(settings, flag_name, 1 if flag_value == '1' or flag_value == 'true' else 0)
-    
-    for key, value in update_fields.items():
-        # Always update if value is provided (including empty strings and '0' for visibility flags)
-        if value is not None:
-            # Handle empty strings for URL fields - convert to None
-            if isinstance(value, str) and value == '' and key.endswith('_url'):
-                setattr(settings, key, None)
-            # Handle quick_links_pages - ensure it's a valid JSON string
-            elif key == 'quick_links_pages':
-                # If it's an empty string, set to empty JSON array
-                if value == '':
-                    setattr(settings, key, '[]')
-                else:
-                    # Validate it's valid JSON, if not, set to empty array
-                    try:
-                        import json
-                        json.loads(value)  # Validate JSON
-                        setattr(settings, key, value)
-                    except (json.JSONDecodeError, TypeError):
+        for flag_name, flag_value in feature_flags.items():
+            if flag_value is not None:
+                # Convert string "1" or "0" to int
+                setattr(settings, flag_name, 1 if flag_value == '1' or flag_value == 'true' else 0)
+    
+        for key, value in update_fields.items():
+            # Always update if value is provided (including empty strings and '0' for visibility flags)
+            if value is not None:
+                # Handle empty strings for URL fields - convert to None
+                if isinstance(value, str) and value == '' and key.endswith('_url'):
+                    setattr(settings, key, None)
+                # Handle quick_links_pages - ensure it's a valid JSON string
+                elif key == 'quick_links_pages':
+                    # If it's an empty string, set to empty JSON array
+                    if value == '':
                         setattr(settings, key, '[]')
-            # For visibility flags (including quick_links_section_visible), ensure 0 is saved
-            elif key == 'quick_links_section_visible' or key == 'social_section_visible' or key == 'contact_section_visible' or key == 'partner_section_visible' or key == 'statistics_section_visible':
-                # Explicitly set the value (0 or 1) - value is already int from update_fields dict
-                # Ensure we save 0 when checkbox is unchecked
-                setattr(settings, key, int(value) if value is not None else 0)
-            elif key.endswith('_section_visible') or key.endswith('_visible'):
-                # Explicitly set the value (0 or 1) - don't skip 0
-                setattr(settings, key, value)
-            else:
-                setattr(settings, key, value)
+                    else:
+                        # Validate it's valid JSON, if not, set to empty array
+                        try:
+                            import json
+                            json.loads(value)  # Validate JSON
+                            setattr(settings, key, value)
+                        except (json.JSONDecodeError, TypeError):
+                            setattr(settings, key, '[]')
+                # For visibility flags (including quick_links_section_visible), ensure 0 is saved
+                elif key == 'quick_links_section_visible' or key == 'social_section_visible' or key == 'contact_section_visible' or key == 'partner_section_visible' or key == 'statistics_section_visible':
+                    # Explicitly set the value (0 or 1) - value is already int from update_fields dict
+                    # Ensure we save 0 when checkbox is unchecked
+                    setattr(settings, key, int(value) if value is not None else 0)
+                elif key.endswith('_section_visible') or key.endswith('_visible'):
+                    # Explicitly set the value (0 or 1) - don't skip 0
+                    setattr(settings, key, value)
+                else:
+                    setattr(settings, key, value)
     
-    # Update .env file with SMTP settings if they were provided
-    if smtp_sender_email is not None or smtp_sender_password is not None or smtp_host is not None or smtp_port is not None:
-        try:
-            update_env_file(
-                smtp_sender_email=smtp_sender_email if smtp_sender_email else None,
-                smtp_sender_password=smtp_sender_password if smtp_sender_password else None,
-                smtp_host=smtp_host if smtp_host else None,
-                smtp_port=int(smtp_port) if smtp_port and smtp_port.strip() else None
-            )
-        except Exception as e:
-            # Log error but don't fail the request
-            print(f"Warning: Failed to update .env file: {e}")
+        # Update .env file with SMTP settings if they were provided
+        if smtp_sender_email is not None or smtp_sender_password is not None or smtp_host is not None or smtp_port is not None:
+            try:
+                update_env_file(
+                    smtp_sender_email=smtp_sender_email if smtp_sender_email else None,
+                    smtp_sender_password=smtp_sender_password if smtp_sender_password else None,
+                    smtp_host=smtp_host if smtp_host else None,
+                    smtp_port=int(smtp_port) if smtp_port and smtp_port.strip() else None
+                )
+            except Exception as e:
+                # Log error but don't fail the request
+                print(f"Warning: Failed to update .env file: {e}")
     
-    db.commit()
-    db.refresh(settings)
-    return settings
+        bump_content_version(db, "settings")
+        db.commit()
+        db.refresh(settings)
+        return settings
+    
+    return await run_with_uploads(write, hero_staged, background_staged)
 
 # ============ PERMISSION HELPERS ============
 def check_permission(user: dict, required_permission: str):
@@ -1470,12 +1616,12 @@ def require_role(user: dict, allowed_roles: list):
 # ============ UPDATED AUTH ENDPOINTS ============
 # Keep old login for backward compatibility, but also support new user system
 @app.post("/api/auth/login")
-def login(username: str = Form(None), password: str = Form(None), login_data: UserLogin = None, db: Session = Depends(get_db)):
+async def login(username: str = Form(None), password: str = Form(None), login_data: UserLogin = None, db: AsyncSession = Depends(get_async_db)):
     """User login - supports both Form (legacy) and JSON (new)"""
     # Handle form data (legacy)
     if username and password:
-        user = db.query(User).filter(User.username == username).first()
-        if user and verify_password(password, user.password_hash):
+        user = (await db.execute(select(User).filter(User.username == username))).scalars().first()
+        if user and await verify_password_async(password, user.password_hash):
             if user.is_active == 0:
                 raise HTTPException(status_code=401, detail="User account is inactive")
             token = create_access_token({
@@ -1486,7 +1632,7 @@ def login(username: str = Form(None), password: str = Form(None), login_data: Us
             return {"access_token": token, "token_type": "bearer", "user": user}
         
         # Fallback to legacy admin
-        if username == settings.ADMIN_USERNAME and verify_password(password, settings.ADMIN_PASSWORD_HASH):
+        if username == settings.ADMIN_USERNAME and await verify_password_async(password, settings.ADMIN_PASSWORD_HASH):
             token = create_access_token({
                 "sub": settings.ADMIN_USERNAME,
                 "user_id": 0,
@@ -1496,8 +1642,8 @@ def login(username: str = Form(None), password: str = Form(None), login_data: Us
     
     # Handle JSON data (new)
     if login_data:
-        user = db.query(User).filter(User.username == login_data.username).first()
-        if user and verify_password(login_data.password, user.password_hash):
+        user = (await db.execute(select(User).filter(User.username == login_data.username))).scalars().first()
+        if user and await verify_password_async(login_data.password, user.password_hash):
             if user.is_active == 0:
                 raise HTTPException(status_code=401, detail="User account is inactive")
             token = create_access_token({
@@ -1532,9 +1678,8 @@ def get_page_config(page_name: str):
     raise HTTPException(status_code=404, detail=f"Page type '{page_name}' not found")
 
 # ============ PAGES ENDPOINTS ============
-@app.get("/api/pages/{page_name}")
-def get_page(page_name: str, include_draft: bool = False, db: Session = Depends(get_db)):
-    """Get a page by name (public endpoint, only returns published unless include_draft=True)"""
+def load_page(db: Session, page_name: str, include_draft: bool = False):
+    """Load a page by name, falling back to default content when missing or unpublished"""
     try:
         config = get_page_config(page_name)
         model = config['model']
@@ -1634,15 +1779,96 @@ def get_page(page_name: str, include_draft: bool = False, db: Session = Depends(
     
     return page
 
+@app.get("/api/pages/{page_name}")
+async def get_page(page_name: str, request: Request, include_draft: bool = False, db: AsyncSession = Depends(get_async_db)):
+    """Get a page by name (public endpoint, only returns published unless include_draft=True)"""
+    if include_draft:
+        return await db.run_sync(load_page, page_name, True)
+    
+    # Published content is served from the cache; drafts always hit the database
+    cache_key = ("pages", page_name)
+    payload = await get_cached_async(db, cache_key)
+    if payload is None:
+        generation = content_cache.generation(cache_key)
+        payload = content_cache.set(cache_key, build_payload(await db.run_sync(load_page, page_name)), generation)
+    return conditional_response(request, payload)
+
+# ============ SEARCH ENDPOINT ============
+@app.get("/api/search", response_model=List[SearchResult])
+async def search_content(q: str, type: Optional[str] = None, skip: int = 0, limit: int = 20, db: AsyncSession = Depends(get_async_db)):
+    """Full-text search over blog posts, events, documents and published pages, best matches first"""
+    kinds = None
+    if type:
+        kinds = sorted({kind.strip() for kind in type.split(",") if kind.strip()})
+        unknown = set(kinds) - SEARCH_KINDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown types: {', '.join(sorted(unknown))}")
+    limit = max(1, min(limit, settings.SEARCH_MAX_LIMIT))
+    results = await db.run_sync(search, q, kinds, max(0, skip), limit)
+    return model_list_response(SearchResult, results)
+
+# ============ BOOTSTRAP ENDPOINT ============
+# Content lists each public page renders, in addition to settings, navigation and the page itself
+BOOTSTRAP_SECTIONS = {
+    'home': ['testimonials', 'events', 'blog'],
+    'index': ['testimonials', 'events', 'blog'],
+    'blog': ['blog'],
+    'events': ['events'],
+    'gallery': ['gallery'],
+    'documents': ['documents'],
+    'departments': ['departments'],
+    'branches': ['branches'],
+}
+
+BOOTSTRAP_LOADERS = {
+    'testimonials': load_testimonials,
+    'events': lambda db: [EventResponse.model_validate(e) for e in load_events(db)[0]],
+    'blog': lambda db: [BlogPostResponse.model_validate(p) for p in load_blog_posts(db)[0]],
+    'gallery': lambda db: [GalleryImageResponse.model_validate(i) for i in load_gallery_images(db)[0]],
+    'documents': load_documents,
+    'departments': lambda db: [DepartmentResponse.model_validate(d) for d in load_departments(db)],
+    'branches': lambda db: [BranchResponse.model_validate(b) for b in load_branches(db)],
+}
+
+@app.get("/api/bootstrap/{page_name}")
+async def get_bootstrap(page_name: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Get everything a public page needs (settings, navigation, page content and its lists) in one response"""
+    cache_key = ("bootstrap", page_name)
+    payload = await get_cached_async(db, cache_key)
+    if payload is None:
+        generation = content_cache.generation(cache_key)
+        data = await db.run_sync(load_bootstrap, page_name)
+        payload = content_cache.set(cache_key, build_payload(data), generation)
+    return conditional_response(request, payload)
+
+def load_bootstrap(db: Session, page_name: str):
+    """Load the bootstrap data for a page"""
+    page = load_page(db, page_name)  # 404s for unknown page names
+    data = {
+        "settings": load_site_settings(db),
+        "navigation": load_navigation(db),
+        "page": page,
+    }
+    for section in BOOTSTRAP_SECTIONS.get(page_name.lower().replace('_', '-'), []):
+        data[section] = BOOTSTRAP_LOADERS[section](db)
+    return data
+
 @app.get("/api/pages/drafts/count")
 def get_drafts_count(db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
     """Get count of unpublished pages (Admin only)"""
     require_role(current_user, CONTRIBUTORS_ROLES)
-    count = 0
-    for page_name, config in PAGE_ROUTING.items():
-        model = config['model']
-        count += db.query(model).filter(model.is_published == 0).count()
-    return {"count": count}
+    # One statement for all page tables ('home' and 'index' share a model, count it once)
+    models = {config['model'] for config in PAGE_ROUTING.values()}
+    counts = db.execute(select(*[
+        select(func.count()).select_from(model).where(model.is_published == 0).scalar_subquery()
+        for model in models
+    ])).one()
+    return {"count": sum(counts)}
+
+@job_handler("html_sections")
+def update_html_sections_job(payload: Dict):
+    """Background job wrapper for update_html_sections"""
+    update_html_sections(payload["page_name"], payload["page_data"])
 
 def update_html_sections(page_name: str, page_data: Dict):
     """Update specific sections in HTML file using regex, without replacing entire file"""
@@ -1784,6 +2010,7 @@ def update_page(page_name: str, page_data: dict, publish: bool = False, db: Sess
             create_data['updated_by'] = current_user["user_id"]
         db_page = model(**create_data)
         db.add(db_page)
+        html_data = create_data
     else:
         # Update existing - validate with schema
         try:
@@ -1814,19 +2041,15 @@ def update_page(page_name: str, page_data: dict, publish: bool = False, db: Sess
                 db_page.is_published = 0
         
         db_page.updated_by = current_user["user_id"]
+        html_data = validated_data
     
+    # Update HTML file with structured data (only update specific sections, not entire file)
+    # from the job queue, so disk speed doesn't add to the request
+    enqueue_job(db, "html_sections", {"page_name": page_name, "page_data": html_data})
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_page)
     
-    # Update HTML file with structured data (only update specific sections, not entire file)
-    try:
-        update_html_sections(page_name, validated_data if db_page else create_data)
-    except Exception as e:
-        # Log error but don't fail the request
-        print(f"Warning: Could not update HTML file for {page_name}: {e}")
-        import traceback
-        traceback.print_exc()
-    
     return db_page
 
 # ============ USERS ENDPOINTS ============
@@ -1835,7 +2058,7 @@ def get_users(db: Session = Depends(get_db), current_user: dict = Depends(get_cu
     """Get all users (Super Admin only)"""
     require_role(current_user, SUPER_ADMIN_ROLE)
     users = db.query(User).all()
-    return users
+    return model_list_response(UserResponse, users)
 
 @app.post("/api/users", response_model=UserResponse)
 def create_user(user: UserCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
@@ -1968,6 +2191,7 @@ def create_about_content(
     
     db_about = About(**create_data)
     db.add(db_about)
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_about)
     return db_about
@@ -2000,18 +2224,30 @@ def update_about_content(
         db_about.updated_by = current_user["user_id"]
         db_about.updated_at = datetime.now()
     
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_about)
     return db_about
 
 # ============ HOME PAGE ENDPOINTS ============
 @app.get("/api/home", response_model=HomePageResponse)
-def get_home(db: Session = Depends(get_db)):
-    """Get home page content"""
+async def get_home(request: Request, fields: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """Get home page content (fields: comma-separated subset of fields to return)"""
+    fieldset = parse_fields(fields, HomePageResponse)
+    cache_key = ("pages", "home-content") if fieldset is None else ("pages", "home-content", fieldset)
+    payload = await get_cached_async(db, cache_key)
+    if payload is None:
+        generation = content_cache.generation(cache_key)
+        home = await db.run_sync(load_home)
+        payload = content_cache.set(cache_key, build_payload(narrow(HomePageResponse, home, fieldset)), generation)
+    return conditional_response(request, payload)
+
+def load_home(db: Session) -> HomePageResponse:
+    """Load home page content, or default content if none exists"""
     home = db.query(HomePage).first()
     if not home:
         # Return default/empty home if none exists
-        return HomePageResponse(
+        home = HomePageResponse(
             id=0,
             title="Home",
             page_header_title=None,
@@ -2050,7 +2286,7 @@ def get_home(db: Session = Depends(get_db)):
             created_by=None,
             updated_by=None
         )
-    return home
+    return HomePageResponse.model_validate(home)
 
 @app.post("/api/home", response_model=HomePageResponse)
 def create_home(home: HomePageCreate, db: Session = Depends(get_db), token: str = Depends(verify_token)):
@@ -2062,6 +2298,7 @@ def create_home(home: HomePageCreate, db: Session = Depends(get_db), token: str
     
     db_home = HomePage(**home.dict())
     db.add(db_home)
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_home)
     return db_home
@@ -2082,6 +2319,7 @@ def update_home(home: HomePageUpdate, db: Session = Depends(get_db), token: str
             if value is not None:
                 setattr(db_home, key, value)
     
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_home)
     return db_home
@@ -2125,6 +2363,7 @@ def create_contact_page(contact_page: ContactPageCreate, db: Session = Depends(g
     
     db_contact_page = ContactPage(**contact_page.dict())
     db.add(db_contact_page)
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_contact_page)
     return db_contact_page
@@ -2145,6 +2384,7 @@ def update_contact_page(contact_page: ContactPageUpdate, db: Session = Depends(g
             if value is not None:
                 setattr(db_contact_page, key, value)
     
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_contact_page)
     return db_contact_page
@@ -2186,6 +2426,7 @@ def create_blog_page(blog_page: BlogPageCreate, db: Session = Depends(get_db), t
     
     db_blog_page = BlogPage(**blog_page.dict())
     db.add(db_blog_page)
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_blog_page)
     return db_blog_page
@@ -2206,6 +2447,7 @@ def update_blog_page(blog_page: BlogPageUpdate, db: Session = Depends(get_db), t
             if value is not None:
                 setattr(db_blog_page, key, value)
     
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_blog_page)
     return db_blog_page
@@ -2244,6 +2486,7 @@ def create_gallery_page(gallery_page: GalleryPageCreate, db: Session = Depends(g
     
     db_gallery_page = GalleryPage(**gallery_page.dict())
     db.add(db_gallery_page)
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_gallery_page)
     return db_gallery_page
@@ -2264,6 +2507,7 @@ def update_gallery_page(gallery_page: GalleryPageUpdate, db: Session = Depends(g
             if value is not None:
                 setattr(db_gallery_page, key, value)
     
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_gallery_page)
     return db_gallery_page
@@ -2301,6 +2545,7 @@ def create_branches_page(branches_page: BranchesPageCreate, db: Session = Depend
     
     db_branches_page = BranchesPage(**branches_page.dict())
     db.add(db_branches_page)
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_branches_page)
     return db_branches_page
@@ -2321,6 +2566,7 @@ def update_branches_page(branches_page: BranchesPageUpdate, db: Session = Depend
             if value is not None:
                 setattr(db_branches_page, key, value)
     
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_branches_page)
     return db_branches_page
@@ -2358,6 +2604,7 @@ def create_departments_page(departments_page: DepartmentsPageCreate, db: Session
     
     db_departments_page = DepartmentsPage(**departments_page.dict())
     db.add(db_departments_page)
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_departments_page)
     return db_departments_page
@@ -2378,6 +2625,7 @@ def update_departments_page(departments_page: DepartmentsPageUpdate, db: Session
             if value is not None:
                 setattr(db_departments_page, key, value)
     
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_departments_page)
     return db_departments_page
@@ -2415,6 +2663,7 @@ def create_events_page(events_page: EventsPageCreate, db: Session = Depends(get_
     
     db_events_page = EventsPage(**events_page.dict())
     db.add(db_events_page)
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_events_page)
     return db_events_page
@@ -2435,6 +2684,7 @@ def update_events_page(events_page: EventsPageUpdate, db: Session = Depends(get_
             if value is not None:
                 setattr(db_events_page, key, value)
     
+    bump_content_version(db, "pages")
     db.commit()
     db.refresh(db_events_page)
     return db_events_page
@@ -0,0 +1,146 @@
+"""
+Management commands
+
+Usage:
+    python -m manage provision-db [--root-user root] [--root-password ...] [--host localhost] [--port 3306]
+    python -m manage dedupe-uploads
+    python -m manage generate-variants
+    python -m manage run-worker
+    python -m manage rebuild-search-index
+    python -m manage extract-document-text
+"""
+import argparse
+import getpass
+import sys
+
+from config import settings
+
+
+def provision_db(args):
+    """Create the MySQL database and application user, and grant privileges"""
+    if (settings.DB_TYPE or "").lower() != "mysql":
+        print(f"provision-db only supports MySQL (DB_TYPE is '{settings.DB_TYPE}')")
+        return 1
+
+    from sql_helper import SqlHelper
+
+    root_password = args.root_password
+    if root_password is None and args.prompt_password:
+        root_password = getpass.getpass(f"Password for MySQL user {args.root_user}: ")
+
+    SqlHelper.create_user_and_grant_privileges(
+        settings.DB_USER,
+        settings.DB_PASSWORD,
+        settings.DB_NAME,
+        root_user=args.root_user,
+        root_password=root_password or "",
+        host=args.host or settings.DB_HOST,
+        port=args.port or settings.DB_PORT or 3306,
+    )
+    return 0
+
+
+def dedupe_uploads(args):
+    """Move existing uploads into the content-addressed store, removing duplicates"""
+    from database import SessionLocal
+    from upload_service import migrate_legacy_uploads
+
+    with SessionLocal() as db:
+        updated, removed = migrate_legacy_uploads(db)
+    print(f"Updated {updated} references, moved {removed} files into uploads/files")
+    return 0
+
+
+def generate_variants(args):
+    """Create responsive image variants for stored images that have none"""
+    from image_variants import generate_missing_variants
+
+    count = generate_missing_variants()
+    print(f"Generated variants for {count} images")
+    return 0
+
+
+def run_worker(args):
+    """Run the background job worker in the foreground until interrupted"""
+    import main as api  # noqa: F401 - registers the job handlers defined alongside the API
+    from jobs import JobWorker
+
+    worker = JobWorker()
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+    return 0
+
+
+def rebuild_search(args):
+    """Re-index all searchable content"""
+    from database import SessionLocal
+    from search import rebuild_search_index
+
+    with SessionLocal() as db:
+        count = rebuild_search_index(db)
+    print(f"Indexed {count} entries")
+    return 0
+
+
+def extract_document_text(args):
+    """Extract the text of documents uploaded before text extraction existed"""
+    from document_text import extract_missing_text
+
+    count = extract_missing_text()
+    print(f"Extracted text from {count} documents")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m manage", description="Glorious Church CMS management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    provision = subparsers.add_parser(
+        "provision-db",
+        help="Create the database and DB_USER with privileges on DB_NAME (run once, as the MySQL root user)",
+    )
+    provision.add_argument("--root-user", default="root")
+    provision.add_argument("--root-password", default=None)
+    provision.add_argument("-p", "--prompt-password", action="store_true", help="Prompt for the root password")
+    provision.add_argument("--host", default=None, help="Defaults to DB_HOST")
+    provision.add_argument("--port", type=int, default=None, help="Defaults to DB_PORT")
+    provision.set_defaults(handler=provision_db)
+
+    dedupe = subparsers.add_parser(
+        "dedupe-uploads",
+        help="Move files uploaded before content-addressed storage into uploads/files (run after alembic upgrade)",
+    )
+    dedupe.set_defaults(handler=dedupe_uploads)
+
+    variants = subparsers.add_parser(
+        "generate-variants",
+        help="Create resized WebP/AVIF copies of stored images that don't have them yet",
+    )
+    variants.set_defaults(handler=generate_variants)
+
+    worker = subparsers.add_parser(
+        "run-worker",
+        help="Process background jobs (needed when the API runs several processes; see jobs.py)",
+    )
+    worker.set_defaults(handler=run_worker)
+
+    search = subparsers.add_parser(
+        "rebuild-search-index",
+        help="Re-index blog posts, events, documents and pages for /api/search (run after alembic upgrade)",
+    )
+    search.set_defaults(handler=rebuild_search)
+
+    extract = subparsers.add_parser(
+        "extract-document-text",
+        help="Extract searchable text from PDF, DOCX and text documents that have none yet",
+    )
+    extract.set_defaults(handler=extract_document_text)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
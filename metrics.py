@@ -0,0 +1,150 @@
+"""
+Prometheus metrics for the API
+
+MetricsMiddleware counts requests and records latency and response size
+per route template (e.g. /api/blog/{post_id}) and status code, and
+/metrics serves them in the Prometheus text format. Outside development,
+/metrics answers only when METRICS_TOKEN is set, to scrapers that send it.
+
+Each worker process keeps its own counters. When the server runs several
+workers, set METRICS_MULTIPROC_DIR to a directory they all share; each
+worker then writes its samples there and /metrics (on any worker) reports
+the sum across all of them. The directory must be emptied before the
+server starts.
+
+Connection pool usage (see database.get_pool_metrics) is read when
+/metrics is scraped, so in multiprocess mode it describes the worker that
+answered the scrape.
+"""
+import os
+import secrets
+import time
+
+from fastapi import HTTPException, Request, Response
+
+from config import settings
+
+if settings.METRICS_MULTIPROC_DIR:
+    # prometheus_client picks its storage when it is imported
+    os.makedirs(settings.METRICS_MULTIPROC_DIR, exist_ok=True)
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.METRICS_MULTIPROC_DIR)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily  # noqa: E402
+
+from database import get_pool_metrics  # noqa: E402
+
+LABELS = ("method", "route", "status")
+# Response sizes from 100 B to 10 MB
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+REQUESTS = Counter("http_requests_total", "HTTP requests", LABELS)
+LATENCY = Histogram(
+    "http_request_duration_seconds", "Time to send the full response", LABELS,
+    buckets=settings.METRICS_LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram("http_response_size_bytes", "Response body size", LABELS, buckets=SIZE_BUCKETS)
+
+# Label for requests no route matched, so scanners can't create unbounded series
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope: dict, root_path: str) -> str:
+    """The path template of the route that handled the request"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mounted apps (e.g. /uploads) extend root_path by their mount path
+    mounted = scope.get("root_path", "")
+    if mounted != root_path:
+        return mounted[len(root_path):] + "/{path}"
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count, latency and response size"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        root_path = scope.get("root_path", "")
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            labels = (scope["method"], route_template(scope, root_path), str(status))
+            REQUESTS.labels(*labels).inc()
+            LATENCY.labels(*labels).observe(time.perf_counter() - start)
+            RESPONSE_SIZE.labels(*labels).observe(size)
+
+
+# get_pool_metrics() key -> (metric name, help, kind)
+POOL_METRICS = {
+    "pool_size": ("db_pool_size", "Configured pool size", "gauge"),
+    "checked_out": ("db_pool_checked_out", "Connections in use", "gauge"),
+    "checked_in": ("db_pool_checked_in", "Idle connections in the pool", "gauge"),
+    "overflow": ("db_pool_overflow", "Connections open beyond pool_size", "gauge"),
+    "checkout_count": ("db_pool_checkouts", "Connection checkouts", "counter"),
+    "checkout_seconds_total": ("db_pool_checkout_seconds", "Time spent waiting for connections", "counter"),
+    "checkout_seconds_max": ("db_pool_checkout_seconds_max", "Longest wait for a connection", "gauge"),
+    "checkout_timeouts": ("db_pool_checkout_timeouts", "Checkouts that timed out", "counter"),
+}
+
+
+class PoolCollector:
+    """Connection pool usage of this process's engines, labelled by engine (sync, async)"""
+
+    def collect(self):
+        families = {}
+        for key, (name, documentation, kind) in POOL_METRICS.items():
+            family_class = CounterMetricFamily if kind == "counter" else GaugeMetricFamily
+            families[key] = family_class(name, documentation, labels=["engine"])
+        for engine_name, values in get_pool_metrics().items():
+            for key, value in values.items():
+                families[key].add_metric([engine_name], value)
+        return list(families.values())
+
+
+POOL_COLLECTOR = PoolCollector()
+REGISTRY.register(POOL_COLLECTOR)
+
+
+def metrics_response(request: Request) -> Response:
+    """Current metrics in the Prometheus text format (summed over all workers in multiprocess mode)"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not settings.METRICS_TOKEN:
+        # Only development serves metrics to anyone who asks
+        if settings.ENVIRONMENT != "development":
+            raise HTTPException(status_code=404, detail="Not Found")
+    elif not secrets.compare_digest(request.headers.get("authorization", ""), f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(generate_latest(_registry()), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+
+def _registry() -> CollectorRegistry:
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(POOL_COLLECTOR)
+    return registry
+
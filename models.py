@@ -1,6 +1,26 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Date
+from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Index
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
+from datetime import datetime
+import json
+
+def stored_image(model_name: str):
+    """The stored_files row behind a model's image_url (loaded with the row in one extra query)"""
+    return relationship(
+        "StoredFile",
+        primaryjoin=f"foreign({model_name}.image_url) == StoredFile.url",
+        viewonly=True,
+        uselist=False,
+        lazy="selectin",
+    )
+
+class ImageVariantsMixin:
+    @property
+    def variants(self):
+        """Responsive variants of image_url, e.g. {"webp": "<url> 320w, <url> 640w"}"""
+        return self.stored_image.variant_map if self.stored_image else {}
 
 class Branch(Base):
     __tablename__ = "branches"
@@ -12,7 +32,7 @@ class Branch(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-class Department(Base):
+class Department(ImageVariantsMixin, Base):
     __tablename__ = "departments"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -22,9 +42,13 @@ class Department(Base):
     image_url = Column(String(255))  # Department image URL
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    stored_image = stored_image("Department")
 
-class BlogPost(Base):
+class BlogPost(ImageVariantsMixin, Base):
     __tablename__ = "blog_posts"
+    __table_args__ = (
+        Index("ix_blog_posts_created_at_id", "created_at", "id"),  # blog list, newest first
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -34,9 +58,13 @@ class BlogPost(Base):
     author = Column(String(255))  # Optional author name
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    stored_image = stored_image("BlogPost")
 
 class ContactMessage(Base):
     __tablename__ = "contact_messages"
+    __table_args__ = (
+        Index("ix_contact_messages_created_at_id", "created_at", "id"),  # inbox, newest first
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -47,6 +75,9 @@ class ContactMessage(Base):
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        Index("ix_events_date_id", "date", "id"),  # events list by date
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -57,8 +88,12 @@ class Event(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-class GalleryImage(Base):
+class GalleryImage(ImageVariantsMixin, Base):
     __tablename__ = "gallery_images"
+    __table_args__ = (
+        Index("ix_gallery_images_created_at_id", "created_at", "id"),  # gallery, newest first
+        Index("ix_gallery_images_category_created_at_id", "category", "created_at", "id"),  # gallery filtered by category
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -66,9 +101,13 @@ class GalleryImage(Base):
     category = Column(String(255), nullable=False)  # events, worship, community, institutions
     image_url = Column(String(255), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    stored_image = stored_image("GalleryImage")
 
 class Testimonial(Base):
     __tablename__ = "testimonials"
+    __table_args__ = (
+        Index("ix_testimonials_is_active_order", "is_active", "order"),  # active testimonials by order
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)  # Testimonial title/heading
@@ -95,6 +134,17 @@ class Document(Base):
     order = Column(Integer, default=0)  # For ordering documents
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Text extracted from the file for search (see document_text.py); loaded only when accessed
+    extracted_text = relationship(
+        "DocumentText",
+        primaryjoin="foreign(DocumentText.document_id) == Document.id",
+        uselist=False,
+        cascade="all, delete-orphan",
+        back_populates="document",
+    )
+
+# Visible documents by order, newest first within an order (declared with the columns for the DESC)
+Index("ix_documents_is_visible_order_created_at_desc", Document.is_visible, Document.order, Document.created_at.desc())
 
 class About(Base):
     __tablename__ = "about"
@@ -135,6 +185,9 @@ class About(Base):
 
 class NavigationItem(Base):
     __tablename__ = "navigation_items"
+    __table_args__ = (
+        Index("ix_navigation_items_is_active_order", "is_active", "order"),  # active menu items by order
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     label = Column(String(255), nullable=False)
@@ -430,6 +483,91 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     created_by = Column(Integer)  # User ID who created this user
 
+class ContentVersion(Base):
+    __tablename__ = "content_versions"
+    
+    # One row per kind of public content (settings, navigation, pages, blog, ...)
+    # Bumped in the same transaction as every write so each worker can drop stale cache entries
+    namespace = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class StoredFile(Base):
+    __tablename__ = "stored_files"
+    
+    # One row per unique uploaded file, stored once under its SHA-256 digest
+    # ref_count is the number of rows (gallery images, blog posts, ...) whose URL points at it
+    sha256 = Column(String(64), primary_key=True)
+    url = Column(String(255), nullable=False, unique=True)  # /uploads/files/ab/<sha256>.<ext>
+    size = Column(Integer, nullable=False)
+    content_type = Column(String(100))
+    ref_count = Column(Integer, nullable=False, default=0)
+    variants = Column(Text)  # JSON map of format -> srcset, filled in by image_variants
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    @property
+    def variant_map(self):
+        return json.loads(self.variants) if self.variants else {}
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_type_status_run_at", "type", "status", "run_at"),  # worker: due jobs per type
+    )
+    
+    # Background job queue (see jobs.py); times are naive UTC
+    id = Column(Integer, primary_key=True, index=True)
+    type = Column(String(50), nullable=False)
+    payload = Column(Text)  # JSON
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # not before this time
+    locked_by = Column(String(100))  # worker running the job
+    locked_at = Column(DateTime)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),  # due notifications
+    )
+    
+    # Admin notifications waiting to be sent (see email_outbox.py); times are naive UTC
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String(100), nullable=False, unique=True)  # e.g. contact_message:42
+    kind = Column(String(50), nullable=False)  # contact_notification
+    payload = Column(Text)  # JSON: name, email, subject, message
+    status = Column(String(20), nullable=False, default="pending")  # pending, sending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text)
+    sent_at = Column(DateTime)
+    digest_size = Column(Integer)  # number of notifications in the email this one was sent with
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class DocumentText(Base):
+    __tablename__ = "document_texts"
+    
+    # Text extracted from a document's file (see document_text.py), indexed for search with the document
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, nullable=False, unique=True)
+    file_url = Column(String(500), nullable=False)  # the file the text came from
+    status = Column(String(20), nullable=False, default="done")  # done, failed
+    text = Column(Text().with_variant(mysql.LONGTEXT(), "mysql"))
+    error = Column(Text)
+    extracted_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    document = relationship(
+        "Document",
+        primaryjoin="foreign(DocumentText.document_id) == Document.id",
+        uselist=False,
+        back_populates="extracted_text",
+    )
+
 # DEPRECATED: AboutContent model - Use About model instead
 # This model is kept for backward compatibility with existing migrations
 # All new code should use the About model (about table)
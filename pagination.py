@@ -0,0 +1,91 @@
+"""
+Keyset (cursor) pagination helpers for list endpoints
+
+Cursors are opaque to clients: a URL-safe base64 encoding of the sort value
+and id of the last row returned. Passing one back continues the listing with
+a WHERE clause on (sort column, id) instead of an OFFSET, so deep pages cost
+the same as the first one.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import String, and_, literal, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(value: Any, row_id: int) -> str:
+    """Encode the sort value and id of the last row on a page"""
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    raw = json.dumps([value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_column) -> Tuple[Any, int]:
+    """Decode a cursor produced by encode_cursor for the given sort column"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+        python_type = sort_column.type.python_type
+        if python_type is datetime:
+            value = datetime.fromisoformat(value)
+        elif python_type is date:
+            value = date.fromisoformat(value)
+        return value, int(row_id)
+    except (ValueError, TypeError, NotImplementedError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(query, sort_column, id_column, cursor: Optional[str] = None, skip: int = 0,
+             limit: Optional[int] = 100, descending: bool = False):
+    """
+    Order query by (sort_column, id_column) and return one page of rows.
+    Uses keyset pagination when a cursor is given, offset pagination otherwise.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_column)
+        past, same = _sort_bounds(query, sort_column, value, descending)
+        query = query.filter(or_(past, and_(same, id_column < last_id if descending else id_column > last_id)))
+    elif skip:
+        query = query.offset(skip)
+
+    if limit is None:
+        return query.all(), None
+
+    # Fetch one extra row to find out whether there is another page
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+
+def _sort_bounds(query, sort_column, value, descending: bool):
+    """(rows sorting past value, rows equal to value) as filters on sort_column"""
+    dialect = query.session.get_bind().dialect.name
+    if dialect == "sqlite" and isinstance(value, datetime) and not value.microsecond:
+        # SQLite compares datetimes as text: CURRENT_TIMESTAMP defaults are stored as
+        # "YYYY-MM-DD HH:MM:SS" but SQLAlchemy writes "YYYY-MM-DD HH:MM:SS.000000",
+        # so the same second can be stored either way. Match both forms.
+        short = literal(value.strftime("%Y-%m-%d %H:%M:%S"), String)
+        full = literal(value.strftime("%Y-%m-%d %H:%M:%S.%f"), String)
+        return (sort_column < short if descending else sort_column > full), sort_column.in_([short, full])
+    return (sort_column < value if descending else sort_column > value), sort_column == value
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """Expose the cursor for the next page as a response header"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,119 @@
+"""
+Per-request SQL statistics
+
+Engine event hooks count and time every statement run on behalf of the
+current request (on the sync and the async engine). QueryStatsMiddleware
+reports the totals in a Server-Timing header, records them as Prometheus
+histograms per route, and logs a warning when a route runs more queries
+than its budget (SQL_QUERY_BUDGET, per route SQL_QUERY_BUDGET_ROUTES) -
+usually the sign of an N+1 query.
+
+Statements run outside a request (jobs, startup) are not counted.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import Histogram
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from config import settings
+from database import engine, async_engine
+from metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT = Histogram(
+    "http_request_db_queries", "SQL statements per request", ("method", "route"),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+QUERY_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request", ("method", "route"),
+    buckets=settings.METRICS_LATENCY_BUCKETS,
+)
+
+
+class QueryStats:
+    """Statements run so far for one request"""
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.root_path = scope.get("root_path", "")
+        self.count = 0
+        self.seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        """Method and route template of the request, e.g. GET /api/blog/{post_id}"""
+        return f"{self.scope['method']} {route_template(self.scope, self.root_path)}"
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Statistics of the request being handled, or None outside a request"""
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_stats_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - context._query_stats_start
+
+
+for _engine in (engine, async_engine.sync_engine):
+    event.listen(_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def get_query_budget(route: str) -> int:
+    return settings.SQL_QUERY_BUDGET_ROUTES.get(route, settings.SQL_QUERY_BUDGET)
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware collecting the SQL statements of each request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope)
+        token = _current.set(stats)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.SERVER_TIMING_ENABLED:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", '
+                    f"app;dur={(time.perf_counter() - start) * 1000:.1f}",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = route_template(scope, stats.root_path)
+            if settings.METRICS_ENABLED:
+                QUERY_COUNT.labels(scope["method"], route).observe(stats.count)
+                QUERY_SECONDS.labels(scope["method"], route).observe(stats.seconds)
+            budget = get_query_budget(route)
+            if budget and stats.count > budget:
+                logger.warning(
+                    "Query budget exceeded: %s %s ran %d queries (budget %d) taking %.1f ms",
+                    scope["method"], route, stats.count, budget, stats.seconds * 1000,
+                )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import date, datetime
 
 class BranchBase(BaseModel):
@@ -31,6 +31,7 @@ class DepartmentResponse(DepartmentBase):
     id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    variants: Dict[str, str] = {}  # format -> srcset of resized copies of image_url
     
     class Config:
         from_attributes = True
@@ -49,6 +50,7 @@ class BlogPostResponse(BlogPostBase):
     id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    variants: Dict[str, str] = {}  # format -> srcset of resized copies of image_url
     
     class Config:
         from_attributes = True
@@ -99,6 +101,7 @@ class GalleryImageCreate(GalleryImageBase):
 class GalleryImageResponse(GalleryImageBase):
     id: int
     created_at: datetime
+    variants: Dict[str, str] = {}  # format -> srcset of resized copies of image_url
     
     class Config:
         from_attributes = True
@@ -791,3 +794,25 @@ class TokenResponse(BaseModel):
 #     
 #     class Config:
 #         from_attributes = True
+
+class JobResponse(BaseModel):
+    id: int
+    type: str
+    status: str  # pending, running, done, failed
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class SearchResult(BaseModel):
+    type: str  # blog, event, document, page
+    id: int
+    page: Optional[str] = None  # page name (home, about, ...) for type "page"
+    title: str
+    snippet: Optional[str] = None  # HTML-escaped matched text, with <mark> around the terms
+    score: float
@@ -0,0 +1,262 @@
+"""
+Full-text search over blog posts, events, documents and published pages
+
+Documents are found by their description and by the text extracted from
+their files (see document_text.py).
+
+Searchable text is copied into one search_index table, created by the
+add_search_index migration with each dialect's full-text facility:
+an FTS5 virtual table on SQLite, a FULLTEXT index on MySQL, and a
+weighted tsvector column with a GIN index on PostgreSQL. The table is
+kept in sync by a session hook: every flush that writes an indexed row
+updates its entry in the same transaction.
+
+Rebuild the whole index (e.g. after upgrading) with:
+    python -m manage rebuild-search-index
+"""
+import html
+import re
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Column, Integer, MetaData, String, Table, Text, and_, delete, event, insert, text
+from sqlalchemy.orm import Session, selectinload
+
+from database import SessionLocal
+from models import (
+    BlogPost, Event, Document, DocumentText, HomePage, About, ContactPage, BlogPage, GalleryPage,
+    BranchesPage, DepartmentsPage, EventsPage, DocumentsPage,
+)
+
+# Not part of Base.metadata: the table's definition differs per dialect (see the migration)
+search_index = Table(
+    "search_index", MetaData(),
+    Column("kind", String(20)),
+    Column("ref_id", Integer),
+    Column("page", String(50)),
+    Column("title", Text),
+    Column("body", Text),
+)
+
+
+class SearchSource(NamedTuple):
+    """An indexed model: how to get its title and body, and whether a row is public"""
+    kind: str
+    model: Any
+    title: Callable[[Any], Optional[str]]
+    body: Callable[[Any], Iterable[Optional[str]]]
+    visible: Callable[[Any], bool] = lambda row: True
+    page: Optional[str] = None
+    options: Tuple = ()  # loader options for the relationships body reads, when indexing in bulk
+
+
+def _page_text(row) -> List[Optional[str]]:
+    """Header subtitle, section titles and all long text of a page"""
+    values = []
+    for column in row.__table__.columns:
+        if column.name == "page_header_title":
+            continue  # indexed as the title
+        if isinstance(column.type, Text) or column.name.endswith(("_title", "_subtitle")):
+            values.append(getattr(row, column.name))
+    return values
+
+
+SEARCH_PAGES = {
+    "home": HomePage,
+    "about": About,
+    "contact": ContactPage,
+    "blog": BlogPage,
+    "gallery": GalleryPage,
+    "branches": BranchesPage,
+    "departments": DepartmentsPage,
+    "events": EventsPage,
+    "documents": DocumentsPage,
+}
+
+SEARCH_SOURCES = [
+    SearchSource("blog", BlogPost, lambda p: p.title, lambda p: [p.content, p.category, p.author]),
+    SearchSource("event", Event, lambda e: e.title, lambda e: [e.description, e.location]),
+    SearchSource(
+        "document", Document, lambda d: d.title,
+        lambda d: [d.description, d.extracted_text.text if d.extracted_text else None],
+        visible=lambda d: d.is_visible == 1, options=(selectinload(Document.extracted_text),),
+    ),
+] + [
+    SearchSource(
+        "page", model, lambda p: p.page_header_title or p.title, _page_text,
+        visible=lambda p: p.is_published == 1, page=name,
+    )
+    for name, model in SEARCH_PAGES.items()
+]
+
+SOURCES_BY_MODEL = {source.model: source for source in SEARCH_SOURCES}
+# Rows stored beside an indexed row -> that row; writing them re-indexes it
+SEARCH_DEPENDENTS = {
+    DocumentText: lambda row: row.document,
+}
+SEARCH_KINDS = {source.kind for source in SEARCH_SOURCES}
+
+_TAG = re.compile(r"<[^>]+>")
+_WORD = re.compile(r"\w+", re.UNICODE)
+# Highlight markers put in snippets by the database, turned into <mark> after escaping
+_MARK_START, _MARK_END = "\x02", "\x03"
+SNIPPET_LENGTH = 200  # characters of body around the match, where the database can't pick them
+# Dialects the add_search_index migration creates the search table for
+SEARCH_DIALECTS = ("sqlite", "mysql", "postgresql")
+# Text search configuration of the document column built by the add_search_index migration
+PG_TEXT_SEARCH_CONFIG = "simple"
+
+
+def plain_text(value: Optional[str]) -> str:
+    """Text without HTML tags and entities"""
+    if not value:
+        return ""
+    return " ".join(html.unescape(_TAG.sub(" ", value)).split())
+
+
+def _entry(source: SearchSource, row) -> Dict[str, Any]:
+    return {
+        "kind": source.kind,
+        "ref_id": row.id,
+        "page": source.page,
+        "title": plain_text(source.title(row)),
+        "body": " ".join(filter(None, (plain_text(value) for value in source.body(row)))),
+    }
+
+
+def _entry_filter(source: SearchSource, ref_id: int):
+    # Page tables each number their rows from 1, so page entries are told apart by page name
+    page = search_index.c.page == source.page if source.page else search_index.c.page.is_(None)
+    return and_(search_index.c.kind == source.kind, search_index.c.ref_id == ref_id, page)
+
+
+def index_rows(connection, changed: List[Tuple[SearchSource, Any]], deleted: List[Tuple[SearchSource, Any]]) -> None:
+    """Replace the index entries of changed rows and drop those of deleted ones"""
+    for source, row in changed + deleted:
+        connection.execute(delete(search_index).where(_entry_filter(source, row.id)))
+    entries = [_entry(source, row) for source, row in changed if source.visible(row)]
+    if entries:
+        connection.execute(insert(search_index), entries)
+
+
+def rebuild_search_index(db: Session) -> int:
+    """Re-index every searchable row; returns the number of entries"""
+    db.execute(delete(search_index))
+    count = 0
+    for source in SEARCH_SOURCES:
+        entries = [_entry(source, row) for row in db.query(source.model).options(*source.options) if source.visible(row)]
+        if entries:
+            db.execute(insert(search_index), entries)
+        count += len(entries)
+    db.commit()
+    return count
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _index_after_flush(session: Session, flush_context) -> None:
+    changed = set()
+    for row in list(session.new) + list(session.dirty):
+        if type(row) in SEARCH_DEPENDENTS:
+            row = SEARCH_DEPENDENTS[type(row)](row)
+            if row is None or row in session.deleted:
+                continue
+        if type(row) in SOURCES_BY_MODEL:
+            changed.add(row)
+    deleted = [(SOURCES_BY_MODEL[type(row)], row) for row in session.deleted if type(row) in SOURCES_BY_MODEL]
+    if changed or deleted:
+        index_rows(session.connection(), [(SOURCES_BY_MODEL[type(row)], row) for row in changed], deleted)
+
+
+# ---- Queries ----
+
+def _fts5_query(q: str) -> Optional[str]:
+    """An FTS5 MATCH expression for free text: every word, the last one as a prefix"""
+    words = _WORD.findall(q)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _snippet(window: str, q: str, start: int, body_length: int) -> str:
+    """
+    Mark the query words in a window of a body, the window starting at
+    offset start of body_length characters (for dialects without a snippet function)
+    """
+    words = _WORD.findall(q)
+    if words:
+        pattern = re.compile(r"\b(" + "|".join(re.escape(word) for word in words) + r")", re.IGNORECASE)
+        window = pattern.sub(_MARK_START + r"\1" + _MARK_END, window)
+    return ("…" if start else "") + window + ("…" if start + SNIPPET_LENGTH < body_length else "")
+
+
+def _highlight(snippet: Optional[str]) -> Optional[str]:
+    """Escape a snippet for HTML and turn the highlight markers into <mark> tags"""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+def search(db: Session, q: str, kinds: Optional[List[str]] = None, skip: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+    """Ranked search results (best first) as dicts with type, id, page, title, snippet and score"""
+    dialect = db.get_bind().dialect.name
+    if dialect not in SEARCH_DIALECTS:
+        raise HTTPException(status_code=501, detail=f"Search is not supported on {dialect}")
+    params = {"q": q, "limit": limit, "skip": skip, "mark_start": _MARK_START, "mark_end": _MARK_END}
+    kind_filter = ""
+    if kinds:
+        kind_filter = " AND kind IN (" + ", ".join(f":kind{i}" for i in range(len(kinds))) + ")"
+        params.update({f"kind{i}": kind for i, kind in enumerate(kinds)})
+
+    if dialect == "sqlite":
+        params["q"] = _fts5_query(q)
+        if params["q"] is None:
+            return []
+        # bm25 is lower for better matches; titles weigh 10x the body
+        sql = (
+            "SELECT kind, ref_id, page, title, "
+            "snippet(search_index, 4, :mark_start, :mark_end, '…', 24) AS snippet, "
+            "-bm25(search_index, 0, 0, 0, 10.0, 1.0) AS score "
+            "FROM search_index WHERE search_index MATCH :q" + kind_filter +
+            " ORDER BY score DESC LIMIT :limit OFFSET :skip"
+        )
+    elif dialect == "mysql":
+        # Only a window of the body around the first query word leaves the database
+        words = _WORD.findall(q)
+        params.update({"word": words[0] if words else "", "lead": SNIPPET_LENGTH // 4, "length": SNIPPET_LENGTH})
+        sql = (
+            "SELECT kind, ref_id, page, title, "
+            "SUBSTRING(body, GREATEST(LOCATE(:word, body) - :lead, 1), :length) AS snippet, "
+            "GREATEST(LOCATE(:word, body) - :lead, 1) - 1 AS snippet_start, "
+            "CHAR_LENGTH(body) AS body_length, "
+            "MATCH(title, body) AGAINST (:q IN NATURAL LANGUAGE MODE) AS score "
+            "FROM search_index WHERE MATCH(title, body) AGAINST (:q IN NATURAL LANGUAGE MODE)" + kind_filter +
+            " ORDER BY score DESC LIMIT :limit OFFSET :skip"
+        )
+    else:  # postgresql
+        params["config"] = PG_TEXT_SEARCH_CONFIG
+        params["headline_options"] = f'StartSel="{_MARK_START}", StopSel="{_MARK_END}", MaxWords=35, MinWords=15'
+        sql = (
+            "SELECT kind, ref_id, page, title, "
+            "ts_headline(CAST(:config AS regconfig), body, query, :headline_options) AS snippet, "
+            "ts_rank(document, query) AS score "
+            "FROM search_index, websearch_to_tsquery(CAST(:config AS regconfig), :q) AS query "
+            "WHERE document @@ query" + kind_filter +
+            " ORDER BY score DESC LIMIT :limit OFFSET :skip"
+        )
+
+    results = []
+    for row in db.execute(text(sql), params):
+        snippet = row.snippet
+        if dialect == "mysql":
+            snippet = _snippet(row.snippet or "", q, row.snippet_start, row.body_length or 0)
+        results.append({
+            "type": row.kind,
+            "id": row.ref_id,
+            "page": row.page,
+            "title": row.title,
+            "snippet": _highlight(snippet),
+            "score": float(row.score or 0),
+        })
+    return results
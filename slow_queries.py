@@ -0,0 +1,151 @@
+"""
+Slow query log (opt-in with SLOW_QUERY_LOG_ENABLED)
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS on the sync or async engine
+are written as JSON lines to SLOW_QUERY_LOG_FILE (or stderr if it is empty),
+with the route that ran them, the shape of their bound parameters (types
+and lengths, never the values) and the database's EXPLAIN output:
+EXPLAIN QUERY PLAN on SQLite, EXPLAIN on MySQL and PostgreSQL.
+
+All workers append to the same file, so it is rotated outside the app (e.g.
+by logrotate); each worker reopens the file once it has been moved.
+
+EXPLAIN runs on a background thread over the sync engine, at most once per
+statement every SLOW_QUERY_EXPLAIN_INTERVAL seconds, so logging never
+delays the request that ran the slow statement.
+"""
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from logging.handlers import WatchedFileHandler
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+from cache import TTLCache
+from config import settings
+from database import engine, async_engine
+from query_stats import current_query_stats
+
+EXPLAIN_PREFIXES = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "mysql": "EXPLAIN ",
+    "postgresql": "EXPLAIN ",
+}
+
+logger = logging.getLogger("slow_queries")
+logger.propagate = False
+
+# Statements explained recently (statement text -> plan), so a hot slow query isn't explained on every run
+_explained = TTLCache(maxsize=256, ttl=settings.SLOW_QUERY_EXPLAIN_INTERVAL)
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def parameter_shape(value: Any) -> str:
+    """Type of a bound parameter, with the length of strings and bytes"""
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}({len(value)})"
+    return type(value).__name__
+
+
+def parameters_shape(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return {key: parameter_shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: the shape of the first row and the row count
+            return {"rows": len(parameters), "first": parameters_shape(parameters[0])}
+        return [parameter_shape(value) for value in parameters]
+    return None
+
+
+def _explain_statement(context) -> Optional[tuple]:
+    """The statement and parameters to EXPLAIN on the sync engine, or None if it can't be"""
+    compiled = context.compiled
+    if compiled is not None and compiled.statement is not None and context.compiled_parameters:
+        # Re-compile for the sync engine's driver (async drivers use other parameter styles)
+        sync_compiled = compiled.statement.compile(dialect=engine.dialect)
+        params = sync_compiled.construct_params(context.compiled_parameters[0])
+        if sync_compiled.positional:
+            params = tuple(params[name] for name in sync_compiled.positiontup)
+        return sync_compiled.string, params
+    if context.engine is engine:
+        return context.statement, context.parameters[0] if context.parameters else None
+    return None
+
+
+def explain(statement: str, parameters: Any) -> List[Dict[str, Any]]:
+    """EXPLAIN output of a statement as a list of rows"""
+    prefix = EXPLAIN_PREFIXES.get(engine.dialect.name)
+    if prefix is None:
+        return []
+    with engine.connect().execution_options(slow_query_log=False) as conn:
+        result = conn.exec_driver_sql(prefix + statement, parameters or ())
+        return [{key: str(value) for key, value in row._mapping.items()} for row in result]
+
+
+def _write(record: Dict[str, Any], explain_args: Optional[tuple]) -> None:
+    if explain_args is not None:
+        plan = _explained.get(explain_args[0])
+        if plan is None:
+            try:
+                plan = explain(*explain_args)
+            except Exception as e:
+                plan = [{"error": f"{type(e).__name__}: {e}"}]
+            _explained.set(explain_args[0], plan)
+        record["explain"] = plan
+    logger.warning(json.dumps(record, default=str))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._slow_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - context._slow_query_start) * 1000
+    if duration_ms < settings.SLOW_QUERY_THRESHOLD_MS or not context.execution_options.get("slow_query_log", True):
+        return
+    stats = current_query_stats()
+    record = {
+        "time": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(duration_ms, 1),
+        "route": stats.route if stats else None,
+        "engine": "sync" if context.engine is engine else "async",
+        "dialect": conn.dialect.name,
+        "statement": statement,
+        "parameters": parameters_shape(parameters),
+    }
+    explain_args = None
+    if settings.SLOW_QUERY_EXPLAIN and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        try:
+            explain_args = _explain_statement(context)
+        except Exception as e:
+            record["explain"] = [{"error": f"{type(e).__name__}: {e}"}]
+    _executor.submit(_write, record, explain_args)
+
+
+def install() -> None:
+    """Start logging slow statements on both engines"""
+    global _executor
+    if _executor is not None:
+        return
+    if settings.SLOW_QUERY_LOG_FILE:
+        log_dir = os.path.dirname(settings.SLOW_QUERY_LOG_FILE)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        handler = WatchedFileHandler(settings.SLOW_QUERY_LOG_FILE, encoding="utf-8")
+    else:
+        handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-log")
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+if settings.SLOW_QUERY_LOG_ENABLED:
+    install()
@@ -0,0 +1,78 @@
+"""
+Sparse fieldsets: ?fields=id,title,created_at
+
+parse_fields validates the requested names against the response schema.
+load_options narrows the SQL SELECT to the columns those fields are built
+from (and skips eager relationships they don't need), and partial_schema
+returns a schema with only those fields, so unselected columns are never
+loaded, validated or serialized.
+"""
+from functools import lru_cache
+from typing import Any, FrozenSet, List, Optional, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, noload
+
+# Schema fields computed from other attributes -> the attributes they need
+FIELD_SOURCES = {
+    "variants": ("image_url", "stored_image"),
+}
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[FrozenSet[str]]:
+    """
+    The fieldset requested with ?fields= (comma-separated), or None for all fields.
+    id is always included. Raises 400 for names the schema doesn't have.
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    if "id" in schema.model_fields:
+        requested.add("id")
+    return frozenset(requested)
+
+
+def load_options(model, fields: Optional[FrozenSet[str]], *always: Any) -> List[Any]:
+    """
+    Loader options restricting a query on model to the columns needed for fields.
+    always: extra column attributes to load regardless (e.g. pagination sort keys).
+    """
+    if fields is None:
+        return []
+    needed = {attr.key for attr in always}
+    for name in fields:
+        needed.update(FIELD_SOURCES.get(name, (name,)))
+    mapper = inspect(model)
+    columns = [attr.class_attribute for attr in mapper.column_attrs if attr.key in needed]
+    options = [load_only(*columns)]
+    options.extend(
+        noload(relationship.class_attribute)
+        for relationship in mapper.relationships if relationship.key not in needed
+    )
+    return options
+
+
+@lru_cache(maxsize=256)
+def partial_schema(schema: Type[BaseModel], fields: Optional[FrozenSet[str]]) -> Type[BaseModel]:
+    """schema restricted to fields (schema itself when fields is None)"""
+    if fields is None:
+        return schema
+    definitions = {
+        name: (field.annotation, field)
+        for name, field in schema.model_fields.items() if name in fields
+    }
+    return create_model(
+        f"{schema.__name__}Fields", __config__=ConfigDict(from_attributes=True), **definitions
+    )
+
+
+def narrow(schema: Type[BaseModel], content: Any, fields: Optional[FrozenSet[str]]) -> Any:
+    """content (a schema instance or ORM row) with only the requested fields"""
+    if fields is None:
+        return content
+    return partial_schema(schema, fields).model_validate(content, from_attributes=True)
@@ -2,15 +2,12 @@ import pymysql
 
 
 class SqlHelper:
-    def create_user_and_grant_privileges(username, password, database_name):
-        root_user = "root"
-        # root_password= ""
-        port=3306
-        host="localhost"
-
+    def create_user_and_grant_privileges(username, password, database_name,
+                                         root_user="root", root_password="", host="localhost", port=3306):
         conn = pymysql.connect(
             host=host,
             user=root_user,
+            password=root_password,
             port=port,
             autocommit=True
         )
@@ -0,0 +1,75 @@
+"""
+Test setup: every test session runs in a temporary directory (so uploads/
+and logs/ land there) against a fresh SQLite database, configured before
+config is imported, with the background job worker off.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_DIR = tempfile.mkdtemp(prefix="church-cms-tests-")
+
+os.environ["ENVIRONMENT"] = "development"
+os.environ["SQLITE_DB_PATH"] = os.path.join(TEST_DIR, "test.db")
+os.environ["JOB_WORKER_IN_PROCESS"] = "false"
+# Required settings normally read from .env
+for name, value in {
+    "SECRET_KEY": "test-secret",
+    "ADMIN_USERNAME": "admin",
+    "ADMIN_PASSWORD_HASH": "unused",
+    "SMTP_SERVER": "localhost",
+    "SMTP_PORT": "25",
+    "SMTP_USERNAME": "cms@example.com",
+    "SMTP_PASSWORD": "unused",
+}.items():
+    os.environ.setdefault(name, value)
+sys.path.insert(0, ROOT)
+os.chdir(TEST_DIR)
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def schema():
+    """Create all tables with create_all, plus the search index (created by its migration)"""
+    from database import Base, engine
+    import models  # noqa: F401
+
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE VIRTUAL TABLE search_index USING fts5("
+            "kind UNINDEXED, ref_id UNINDEXED, page UNINDEXED, title, body, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    yield engine
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE search_index")
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def db(schema):
+    from database import SessionLocal
+
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def client(schema):
+    from fastapi.testclient import TestClient
+    import main
+
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def admin_client(client):
+    """A client whose requests pass verify_token"""
+    from auth import verify_token
+
+    client.app.dependency_overrides[verify_token] = lambda: "admin"
+    yield client
+    client.app.dependency_overrides.pop(verify_token, None)
@@ -0,0 +1,21 @@
+import asyncio
+
+import pytest
+
+import auth
+from config import settings
+
+
+@pytest.fixture
+def process_hash_pool(monkeypatch):
+    auth.shutdown_password_executor()
+    monkeypatch.setattr(settings, "PASSWORD_HASH_EXECUTOR", "process")
+    yield
+    auth.shutdown_password_executor()
+
+
+def test_passwords_verify_on_a_spawned_process_pool(process_hash_pool):
+    hashed = auth.get_password_hash("correct horse")
+    assert asyncio.run(auth.verify_password_async("correct horse", hashed))
+    assert not asyncio.run(auth.verify_password_async("wrong horse", hashed))
+    assert auth._get_hash_executor()._mp_context.get_start_method() == "spawn"
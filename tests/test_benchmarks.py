@@ -0,0 +1,59 @@
+"""
+Serialization benchmark for the 1,000-row blog list. Prints both timings
+(run with -s to see them) and fails if the bulk path is slower than
+FastAPI's response_model path or their output differs.
+"""
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from fast_json import dump_model_list
+from main import load_blog_posts
+from models import BlogPost
+from schemas import BlogPostResponse
+
+ROWS = 1000
+
+
+@pytest.fixture
+def blog_posts(db):
+    start = datetime(2026, 1, 1)
+    db.add_all(
+        BlogPost(title=f"Post {i}", content="Grace and peace to you. " * 40, author="Pastor Émile",
+                 category="Sermons", created_at=start + timedelta(minutes=i))
+        for i in range(ROWS)
+    )
+    db.commit()
+    posts, _ = load_blog_posts(db, limit=ROWS)
+    assert len(posts) == ROWS
+    yield posts
+    db.query(BlogPost).delete()
+    db.commit()
+
+
+def response_model_path(posts):
+    """What FastAPI does for a response_model list: validate each row, jsonable_encoder, json.dumps"""
+    validated = [BlogPostResponse.model_validate(post, from_attributes=True) for post in posts]
+    content = jsonable_encoder(validated)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def best_of(runs, function, *args):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def test_blog_list_serialization(blog_posts):
+    assert dump_model_list(BlogPostResponse, blog_posts) == response_model_path(blog_posts)
+
+    bulk = best_of(5, dump_model_list, BlogPostResponse, blog_posts)
+    per_row = best_of(5, response_model_path, blog_posts)
+    print(f"\n{ROWS}-row blog list: bulk adapter {bulk * 1000:.1f} ms, response_model path {per_row * 1000:.1f} ms")
+    assert bulk < per_row
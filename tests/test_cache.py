@@ -0,0 +1,38 @@
+import main
+from cache import TTLCache, content_cache, invalidate_content
+
+
+def test_set_skips_values_loaded_before_an_invalidation():
+    cache = TTLCache()
+    generation = cache.generation(("pages", "home"))
+    cache.invalidate("pages")
+    cache.set(("pages", "home"), "stale", generation)
+    assert cache.get(("pages", "home")) is None
+
+    generation = cache.generation(("pages", "home"))
+    cache.invalidate("events")
+    cache.set(("pages", "home"), "fresh", generation)
+    assert cache.get(("pages", "home")) == "fresh"
+
+    generation = cache.generation(("pages", "home"))
+    cache.invalidate()
+    cache.set(("pages", "home"), "stale", generation)
+    assert cache.get(("pages", "home")) is None
+
+
+def test_read_racing_a_write_does_not_cache_its_payload(client, monkeypatch):
+    load_navigation = main.load_navigation
+
+    def load_then_write_commits(db):
+        items = load_navigation(db)
+        invalidate_content("navigation")  # what an admin write's after_commit does
+        return items
+
+    content_cache.invalidate()
+    monkeypatch.setattr(main, "load_navigation", load_then_write_commits)
+    assert client.get("/api/navigation").status_code == 200
+    assert content_cache.get(("navigation",)) is None
+
+    monkeypatch.setattr(main, "load_navigation", load_navigation)
+    assert client.get("/api/navigation").status_code == 200
+    assert content_cache.get(("navigation",)) is not None
@@ -0,0 +1,56 @@
+import os
+
+import anyio
+import pytest
+
+import compression
+from config import settings
+
+TEXT = ("In the beginning was the Word. " * 200).encode()
+
+
+@pytest.fixture
+def text_upload(client):
+    os.makedirs("uploads", exist_ok=True)
+    path = os.path.join("uploads", "sermon-notes.txt")
+    with open(path, "wb") as f:
+        f.write(TEXT)
+    yield "/uploads/sermon-notes.txt"
+    os.remove(path)
+
+
+def test_compressed_static_file_has_its_own_etag(client, text_upload):
+    identity = client.get(text_upload, headers={"Accept-Encoding": "identity"})
+    gzipped = client.get(text_upload, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in identity.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.content == TEXT
+    assert gzipped.headers["etag"] == compression.encoded_etag(identity.headers["etag"], "gzip")
+    assert gzipped.headers["etag"] != identity.headers["etag"]
+
+    # The app still validates the suffixed tag, and the 304 repeats it
+    revalidated = client.get(text_upload, headers={
+        "Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"],
+    })
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == gzipped.headers["etag"]
+
+
+def test_vary_is_not_repeated(client):
+    response = client.get("/api/navigation", headers={"Accept-Encoding": "gzip"})
+    assert response.headers.get_list("vary") == ["Accept-Encoding"]
+
+
+def test_large_bodies_are_compressed_on_a_thread(client, text_upload, monkeypatch):
+    calls = []
+    run_sync = anyio.to_thread.run_sync
+
+    async def recording_run_sync(function, *args, **kwargs):
+        calls.append(function)
+        return await run_sync(function, *args, **kwargs)
+
+    monkeypatch.setattr(anyio.to_thread, "run_sync", recording_run_sync)
+    monkeypatch.setattr(settings, "COMPRESSION_THREAD_MIN_SIZE", len(TEXT))
+    response = client.get(text_upload, headers={"Accept-Encoding": "gzip"})
+    assert response.content == TEXT
+    assert compression.compress in calls
@@ -0,0 +1,27 @@
+import document_text
+from document_text import extract_plain, extract_text
+
+
+def test_plain_text_cut_inside_a_character_stays_utf8(tmp_path):
+    path = tmp_path / "notes.txt"
+    # max_chars=2 reads 8 bytes, ending after the first byte of the three-byte euro sign
+    data = "Offerin€ received".encode("utf-8")
+    assert data[:8] == b"Offerin\xe2"
+    path.write_bytes(data)
+    assert extract_plain(str(path), 2) == "Offerin"  # not cp1252 "Offerinâ"
+
+
+def test_plain_text_falls_back_to_cp1252(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes("Café".encode("cp1252"))
+    assert extract_plain(str(path), 100) == "Café"
+
+
+def test_text_is_extracted_on_a_spawned_process_pool(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("  Sunday notes  ", encoding="utf-8")
+    try:
+        text = document_text._get_executor().submit(extract_text, str(path), "txt", 100).result(timeout=60)
+    finally:
+        document_text.shutdown_text_executor()
+    assert text == "Sunday notes"
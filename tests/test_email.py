@@ -0,0 +1,151 @@
+import asyncio
+import socket
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
+from email.message import EmailMessage
+
+import pytest
+
+aiosmtpd = pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller  # noqa: E402
+from aiosmtpd.smtp import AuthResult  # noqa: E402
+
+import email_service  # noqa: E402
+from cache import bump_content_version  # noqa: E402
+from config import settings  # noqa: E402
+from email_outbox import (  # noqa: E402
+    OUTBOX_PENDING, OUTBOX_SENT, drain_email_outbox, get_notification_settings, queue_contact_notification,
+)
+from models import ContactMessage, EmailOutbox, Job, SiteSettings  # noqa: E402
+
+
+class Inbox:
+    """aiosmtpd handler that keeps every message it accepts"""
+
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return "250 OK"
+
+
+def accept_any_login(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=True)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    inbox = Inbox()
+    controller = Controller(
+        inbox, hostname="127.0.0.1", port=free_port(),
+        authenticator=accept_any_login, auth_require_tls=False,
+    )
+    controller.start()
+    monkeypatch.setattr(settings, "SMTP_REQUIRE_TLS", False)
+    yield controller, inbox
+    email_service.mailer.close()
+    controller.stop()
+
+
+@pytest.fixture
+def notification_settings(db, smtp_server):
+    controller, _ = smtp_server
+    row = SiteSettings(
+        admin_emails="admin@example.com, pastor@example.com",
+        smtp_sender_email="site@example.com",
+        smtp_sender_password="secret",
+        smtp_host=controller.hostname,
+        smtp_port=controller.port,
+    )
+    db.add(row)
+    bump_content_version(db, "settings")
+    db.commit()
+    yield row
+    db.query(EmailOutbox).delete()
+    db.query(Job).delete()
+    db.query(ContactMessage).delete()
+    db.delete(row)
+    bump_content_version(db, "settings")
+    db.commit()
+
+
+def test_contact_notification_is_delivered(db, smtp_server, notification_settings, monkeypatch):
+    _, inbox = smtp_server
+    monkeypatch.setattr(settings, "EMAIL_DIGEST_ENABLED", False)
+    message = ContactMessage(name="Ada", email="ada@example.com", subject="Prayer request", message="Hello there")
+    db.add(message)
+    db.flush()
+    entry = queue_contact_notification(db, message)
+    db.commit()
+
+    drain_email_outbox({})
+
+    assert len(inbox.envelopes) == 1
+    envelope = inbox.envelopes[0]
+    assert envelope.mail_from == "site@example.com"
+    assert sorted(envelope.rcpt_tos) == ["admin@example.com", "pastor@example.com"]
+    content = envelope.content.decode()
+    assert "Subject: New Contact Message: Prayer request" in content
+    assert "From: Ada (ada@example.com)" in content
+    db.refresh(entry)
+    assert entry.status == OUTBOX_SENT
+
+
+def test_unconfigured_notifications_stay_pending(db, smtp_server, notification_settings):
+    notification_settings.admin_emails = None
+    bump_content_version(db, "settings")
+    message = ContactMessage(name="Ada", email="ada@example.com", message="Hello there")
+    db.add(message)
+    db.flush()
+    entry = queue_contact_notification(db, message)
+    db.commit()
+
+    drain_email_outbox({})
+
+    db.refresh(entry)
+    assert entry.status == OUTBOX_PENDING
+    assert entry.attempts == 0
+    assert entry.next_attempt_at > datetime.utcnow()
+    assert db.query(Job).filter(Job.type == "email_outbox", Job.run_at > datetime.utcnow()).count() == 1
+
+
+def test_cached_notification_settings_leave_out_the_password(db, notification_settings):
+    assert "secret" not in repr(get_notification_settings(db))
+
+
+def test_timed_out_message_is_withdrawn_not_sent_later(smtp_server, monkeypatch):
+    controller, inbox = smtp_server
+    mailer = email_service.SmtpMailer()
+    config = email_service.SmtpConfig(controller.hostname, controller.port, "site@example.com", "secret")
+
+    def message(subject):
+        msg = EmailMessage()
+        msg["From"], msg["To"], msg["Subject"] = "site@example.com", "admin@example.com", subject
+        msg.set_content("...")
+        return msg
+
+    # No connections: the message waits in the queue until send gives up
+    monkeypatch.setattr(settings, "SMTP_POOL_SIZE", 0)
+    monkeypatch.setattr(settings, "SMTP_TIMEOUT", 0.1)
+    try:
+        with pytest.raises(FutureTimeoutError):
+            mailer.send(config, message("Timed out"))
+
+        async def start_connection():
+            queue = mailer._queues[config]
+            connection = email_service._SmtpConnection(config, queue)
+            mailer._connections[config].append((connection, asyncio.ensure_future(connection.run())))
+
+        asyncio.run_coroutine_threadsafe(start_connection(), mailer._ensure_loop()).result()
+        monkeypatch.setattr(settings, "SMTP_TIMEOUT", 5)
+        assert mailer.send(config, message("Delivered"))
+    finally:
+        mailer.close()
+    assert [envelope.content.decode().count("Subject: Delivered") for envelope in inbox.envelopes] == [1]
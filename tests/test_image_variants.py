@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+import image_variants
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def test_variants_render_on_a_spawned_process_pool(tmp_path):
+    path = str(tmp_path / "photo.png")
+    Image.new("RGB", (800, 400), "navy").save(path)
+    try:
+        srcsets = image_variants._get_executor().submit(
+            image_variants.render_variants, path, "/uploads/images/photo.png", [200], ["png"], 80
+        ).result(timeout=60)
+    finally:
+        image_variants.shutdown_variant_executor()
+    assert srcsets == {"png": "/uploads/images/photo_200w.png 200w"}
+    with Image.open(os.path.join(tmp_path, "photo_200w.png")) as variant:
+        assert variant.size == (200, 100)
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import jobs
+from config import settings
+from jobs import JOB_PENDING, JOB_RUNNING, JobWorker, job_handler, worker_in_process
+from models import Job
+
+STALE = datetime.utcnow() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS * 2)
+
+
+@job_handler("test_noop")
+def noop(payload):
+    pass
+
+
+@pytest.fixture
+def worker():
+    worker = JobWorker(worker_id="test-worker")
+    yield worker
+    worker.stop()
+
+
+def running_job(db, locked_by):
+    job = Job(type="test_noop", payload="{}", status=JOB_RUNNING, attempts=0, max_attempts=3,
+              run_at=STALE, locked_by=locked_by, locked_at=STALE)
+    db.add(job)
+    db.commit()
+    return job.id
+
+
+def test_running_job_is_heartbeated_not_requeued(db, worker):
+    alive = running_job(db, "test-worker")
+    dead = running_job(db, "dead-worker")
+    worker._running_ids.add(alive)
+
+    worker._heartbeat(db)
+    worker._release_stale(db)
+
+    db.expire_all()
+    assert db.get(Job, alive).status == JOB_RUNNING
+    assert db.get(Job, alive).locked_at > STALE
+    assert db.get(Job, dead).status == JOB_PENDING
+
+
+def test_undecodable_payload_fails_the_attempt(db, worker):
+    job = Job(type="test_noop", payload="{not json", status=JOB_RUNNING, attempts=0, max_attempts=3,
+              run_at=datetime.utcnow(), locked_by="test-worker", locked_at=datetime.utcnow())
+    db.add(job)
+    db.commit()
+    worker._running["test_noop"] = 1
+    worker._running_ids.add(job.id)
+
+    worker._execute(job.id, jobs.JOB_TYPES["test_noop"])
+
+    db.expire_all()
+    job = db.get(Job, job.id)
+    assert job.status == JOB_PENDING
+    assert job.attempts == 1
+    assert "JSONDecodeError" in job.last_error
+    assert job.id not in worker._running_ids
+
+
+@pytest.mark.parametrize("configured,processes,expected", [
+    (None, 1, True), (None, 4, False), (True, 4, True), (False, 1, False),
+])
+def test_worker_in_process(monkeypatch, configured, processes, expected):
+    monkeypatch.setattr(settings, "JOB_WORKER_IN_PROCESS", configured)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", processes)
+    assert worker_in_process() is expected
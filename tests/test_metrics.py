@@ -0,0 +1,21 @@
+from config import settings
+
+
+def test_pool_metrics_are_published(client):
+    client.get("/api/health")
+    body = client.get("/metrics").text
+    assert 'db_pool_checked_out{engine="sync"}' in body
+    assert 'db_pool_checkouts_total{engine="sync"}' in body
+
+
+def test_pool_health_requires_login(client):
+    assert client.get("/api/health/db").status_code in (401, 403)
+
+
+def test_metrics_need_a_token_outside_development(client, monkeypatch):
+    monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-token")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-token"}).status_code == 200
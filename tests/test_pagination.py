@@ -0,0 +1,44 @@
+from sqlalchemy import func, update
+
+import main
+from models import BlogPost
+from pagination import NEXT_CURSOR_HEADER
+
+
+def same_default_timestamp_posts(db, count):
+    db.add_all(BlogPost(title=f"Post {i}", content="...") for i in range(count))
+    db.commit()
+    # One statement, so every row gets the same CURRENT_TIMESTAMP value
+    db.execute(update(BlogPost).values(created_at=func.current_timestamp()))
+    db.commit()
+    return sorted((post.id for post in db.query(BlogPost)), reverse=True)
+
+
+def pages(fetch, max_pages=10):
+    """Every id returned by fetch(cursor) -> (ids, next_cursor), following cursors to the end"""
+    ids, cursor = [], None
+    for _ in range(max_pages):
+        page, cursor = fetch(cursor)
+        ids.extend(page)
+        if cursor is None:
+            return ids
+    raise AssertionError(f"still paging after {max_pages} pages: {ids}")
+
+
+def test_cursor_pages_through_rows_sharing_a_server_default_timestamp(db, client):
+    expected = same_default_timestamp_posts(db, 5)
+    try:
+        def load(cursor):
+            posts, next_cursor = main.load_blog_posts(db, limit=2, cursor=cursor)
+            return [post.id for post in posts], next_cursor
+
+        def get(cursor):
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/api/blog", params=params)
+            return [post["id"] for post in response.json()], response.headers.get(NEXT_CURSOR_HEADER)
+
+        assert pages(load) == expected
+        assert pages(get) == expected
+    finally:
+        db.query(BlogPost).delete()
+        db.commit()
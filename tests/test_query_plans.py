@@ -0,0 +1,75 @@
+"""
+The list queries must use the indexes added for them (add_query_indexes);
+a query that falls back to a full table scan plus a temporary sort fails here.
+"""
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event
+
+import main
+from models import ContactMessage
+from pagination import encode_cursor, paginate
+
+
+@contextmanager
+def captured_statements(engine):
+    """Collect the SQL statements (with parameters) executed on engine"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def query_plans(db, load):
+    """EXPLAIN QUERY PLAN of each SELECT run by load(db), as text"""
+    engine = db.get_bind()
+    with captured_statements(engine) as statements:
+        load(db)
+    assert statements, "the loader ran no SELECT"
+    plans = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+            plans.append("\n".join(row.detail for row in rows))
+    return plans
+
+
+def contact_messages(db, cursor=None):
+    return paginate(db.query(ContactMessage), ContactMessage.created_at, ContactMessage.id, cursor, 0, 20, descending=True)
+
+
+CURSOR = encode_cursor(datetime(2026, 1, 1), 10)
+DATE_CURSOR = encode_cursor(date(2026, 1, 1), 10)
+
+LIST_QUERIES = [
+    ("blog", lambda db: main.load_blog_posts(db), "ix_blog_posts_created_at_id"),
+    ("blog cursor", lambda db: main.load_blog_posts(db, cursor=CURSOR), "ix_blog_posts_created_at_id"),
+    ("events", lambda db: main.load_events(db), "ix_events_date_id"),
+    ("events cursor", lambda db: main.load_events(db, cursor=DATE_CURSOR), "ix_events_date_id"),
+    ("gallery", lambda db: main.load_gallery_images(db, limit=20), "ix_gallery_images_created_at_id"),
+    ("gallery cursor", lambda db: main.load_gallery_images(db, limit=20, cursor=CURSOR), "ix_gallery_images_created_at_id"),
+    ("gallery category", lambda db: main.load_gallery_images(db, category="worship", limit=20),
+     "ix_gallery_images_category_created_at_id"),
+    ("testimonials", main.load_testimonials, "ix_testimonials_is_active_order"),
+    ("documents", main.load_documents, "ix_documents_is_visible_order_created_at_desc"),
+    ("navigation", main.load_navigation, "ix_navigation_items_is_active_order"),
+    ("contact messages", contact_messages, "ix_contact_messages_created_at_id"),
+    ("contact messages cursor", lambda db: contact_messages(db, CURSOR), "ix_contact_messages_created_at_id"),
+]
+
+
+@pytest.mark.parametrize("load,index", [(load, index) for _, load, index in LIST_QUERIES],
+                         ids=[name for name, _, _ in LIST_QUERIES])
+def test_list_query_uses_index(db, load, index):
+    plan = query_plans(db, load)[0]
+    assert index in plan, plan
+    assert "USE TEMP B-TREE" not in plan, plan
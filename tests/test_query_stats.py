@@ -0,0 +1,36 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from config import settings
+from database import engine
+from query_stats import QueryStatsMiddleware
+
+app = FastAPI()
+app.add_middleware(QueryStatsMiddleware)
+
+
+@app.get("/two-queries")
+def two_queries():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 2"))
+    return {}
+
+
+def test_query_budget_warning_is_logged(monkeypatch, caplog):
+    client = TestClient(app)
+    monkeypatch.setattr(settings, "SQL_QUERY_BUDGET", 2)
+    with caplog.at_level(logging.WARNING, logger="query_stats"):
+        response = client.get("/two-queries")
+    assert response.headers["server-timing"].startswith('db;dur=')
+    assert '"2 queries"' in response.headers["server-timing"]
+    assert not caplog.records
+
+    monkeypatch.setattr(settings, "SQL_QUERY_BUDGET_ROUTES", {"/two-queries": 1})
+    with caplog.at_level(logging.WARNING, logger="query_stats"):
+        client.get("/two-queries")
+    assert [record.name for record in caplog.records] == ["query_stats"]
+    assert "Query budget exceeded: GET /two-queries ran 2 queries (budget 1)" in caplog.text
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from database import engine
+from models import BlogPost, Document, DocumentText
+from search import SNIPPET_LENGTH, _snippet, rebuild_search_index, search
+
+
+def test_blog_post_is_found_with_highlighted_snippet(db):
+    post = BlogPost(title="Sunday service", content="<p>Amazing jubilee, how sweet the sound</p>")
+    db.add(post)
+    db.commit()
+    try:
+        results = search(db, "jubilee")
+        assert [(result["type"], result["id"]) for result in results] == [("blog", post.id)]
+        assert "<mark>jubilee</mark>" in results[0]["snippet"]
+    finally:
+        db.delete(post)
+        db.commit()
+    assert search(db, "jubilee") == []
+
+
+def test_snippet_window_marks_words_and_elides_the_rest():
+    window = "amazing Grace, how sweet"
+    assert _snippet(window, "grace", 0, len(window)) == "amazing \x02Grace\x03, how sweet"
+    assert _snippet(window, "grace", 10, 10 + SNIPPET_LENGTH + 1).startswith("…amazing")
+    assert _snippet(window, "grace", 10, 10 + SNIPPET_LENGTH + 1).endswith("sweet…")
+
+
+def test_rebuild_loads_document_texts_in_one_query(db):
+    documents = [Document(title=f"Bulletin {i}", file_url=f"/uploads/documents/{i}.txt") for i in range(3)]
+    db.add_all(documents)
+    db.flush()
+    db.add_all(DocumentText(document_id=d.id, file_url=d.file_url, text=f"Psalm {d.id}") for d in documents)
+    db.commit()
+    db.expunge_all()
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        rebuild_search_index(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+        for document in db.query(Document):
+            db.delete(document)
+        db.query(DocumentText).delete()
+        db.commit()
+    assert len([s for s in statements if s.startswith("SELECT") and "FROM document_texts" in s]) == 1
+
+
+def test_search_on_an_unsupported_database_is_a_501():
+    db = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=SimpleNamespace(name="mssql")))
+    with pytest.raises(HTTPException) as raised:
+        search(db, "jubilee")
+    assert raised.value.status_code == 501
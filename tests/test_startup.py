@@ -0,0 +1,37 @@
+"""
+Importing the app must not touch the database (no provisioning or
+connections at import time), so a worker starts quickly even when the
+database is slow or down.
+"""
+import os
+import subprocess
+import sys
+import time
+
+from conftest import ROOT, TEST_DIR
+
+# Override with STARTUP_BUDGET_SECONDS on slow machines
+STARTUP_BUDGET_SECONDS = float(os.environ.get("STARTUP_BUDGET_SECONDS", "3"))
+
+
+def test_import_main_without_database_is_fast():
+    env = dict(
+        os.environ,
+        ENVIRONMENT="production",
+        DB_TYPE="mysql",
+        DB_HOST="192.0.2.1",  # TEST-NET-1: never routable, so any connection attempt would hang
+        DB_PORT="3306",
+        DB_USER="cms",
+        DB_PASSWORD="secret",
+        DB_NAME="cms",
+        METRICS_MULTIPROC_DIR="",
+        SLOW_QUERY_LOG_FILE=os.path.join(TEST_DIR, "slow_queries.log"),
+    )
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", "import main"], cwd=ROOT, env=env, capture_output=True, text=True,
+        timeout=STARTUP_BUDGET_SECONDS * 5,
+    )
+    elapsed = time.perf_counter() - start
+    assert result.returncode == 0, result.stderr
+    assert elapsed < STARTUP_BUDGET_SECONDS, f"import main took {elapsed:.2f}s (budget {STARTUP_BUDGET_SECONDS}s)"
@@ -0,0 +1,169 @@
+import asyncio
+import os
+import threading
+
+from sqlalchemy import event
+
+import main
+import upload_service
+from config import settings
+from models import StoredFile
+from upload_service import FILES_DIR
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 64
+
+
+def stored_files():
+    """Files in the upload store, excluding image variants"""
+    found = []
+    for directory, _, names in os.walk(FILES_DIR):
+        found.extend(os.path.join(directory, name) for name in names if "_" not in name)
+    return found
+
+
+def test_upload_handler_runs_database_work_off_the_event_loop(admin_client, schema, monkeypatch):
+    loop_threads, query_threads = set(), set()
+    receive_upload = main.receive_upload
+
+    async def tracking_receive_upload(*args, **kwargs):
+        loop_threads.add(threading.get_ident())
+        return await receive_upload(*args, **kwargs)
+
+    def before_cursor_execute(*args):
+        query_threads.add(threading.get_ident())
+
+    monkeypatch.setattr(main, "receive_upload", tracking_receive_upload)
+    event.listen(schema, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = admin_client.post(
+            "/api/blog", data={"title": "Easter", "content": "He is risen"},
+            files={"image": ("cover.png", PNG, "image/png")},
+        )
+    finally:
+        event.remove(schema, "before_cursor_execute", before_cursor_execute)
+
+    assert response.status_code == 200, response.text
+    assert loop_threads and query_threads
+    assert not loop_threads & query_threads
+
+
+def test_failed_handler_leaves_no_temporary_file(admin_client, db):
+    before = set(stored_files())
+    response = admin_client.put(
+        "/api/departments/999999", data={"name": "Choir"},
+        files={"image": ("choir.png", PNG + b"choir", "image/png")},
+    )
+    assert response.status_code == 404
+    assert set(stored_files()) == before
+    assert not [name for name in os.listdir(FILES_DIR) if name.endswith(".part")]
+
+
+def test_site_settings_stores_both_hero_images(admin_client, db):
+    response = admin_client.put(
+        "/api/settings", data={"site_name": "Glory"},
+        files={
+            "hero_image": ("hero.png", PNG + b"hero", "image/png"),
+            "hero_background_image": ("background.png", PNG + b"background", "image/png"),
+        },
+    )
+    assert response.status_code == 200, response.text
+    settings = response.json()
+    assert settings["site_name"] == "Glory"
+    for key in ("hero_image_url", "hero_background_image_url"):
+        url = settings[key]
+        assert db.query(StoredFile).filter(StoredFile.url == url).one().ref_count == 1
+        assert os.path.exists(url.lstrip("/"))
+
+
+def stage(data):
+    """A StagedUpload of data, as receive_upload would leave it"""
+    import hashlib
+    import tempfile
+    from upload_service import StagedUpload
+
+    os.makedirs(FILES_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=FILES_DIR, prefix=".upload-", suffix=".part")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return StagedUpload(temp_path, hashlib.sha256(data).hexdigest(), "png", len(data), "image/png")
+
+
+def test_upload_is_stored_only_when_its_transaction_commits(schema):
+    from database import SessionLocal
+    from upload_service import store_upload
+
+    staged = stage(PNG + b"rolled back")
+    with SessionLocal() as session:
+        stored = store_upload(session, staged)
+        assert not os.path.exists(stored.path)
+        # closed without committing
+    assert not os.path.exists(staged.temp_path)
+    assert not os.path.exists(stored.path)
+
+    staged = stage(PNG + b"committed")
+    with SessionLocal() as session:
+        stored = store_upload(session, staged)
+        session.commit()
+    assert os.path.exists(stored.path)
+    assert not os.path.exists(staged.temp_path)
+
+
+def test_concurrent_uploads_of_the_same_file_share_one_entry(schema, monkeypatch):
+    from database import SessionLocal
+    from upload_service import store_upload
+
+    data = PNG + b"twice"
+    with SessionLocal() as first, SessionLocal() as second:
+        earlier = stage(PNG + b"earlier in the transaction")
+        store_upload(second, earlier)
+        stored = store_upload(first, stage(data))
+        first.commit()
+        # second looked the file up before first committed: its insert hits the unique key
+        get = second.get
+        monkeypatch.setattr(second, "get", lambda model, key, **kw: None if key == stored.sha256 else get(model, key, **kw))
+        stored_again = store_upload(second, stage(data))
+        second.commit()
+
+    assert stored_again.url == stored.url
+    assert not os.path.exists(earlier.temp_path)
+    with SessionLocal() as session:
+        assert session.get(StoredFile, stored.sha256).ref_count == 2
+        # the savepoint rolled back by the conflict kept the earlier upload
+        assert os.path.exists(session.get(StoredFile, earlier.sha256).url.lstrip("/"))
+
+
+def test_oversized_upload_is_rejected_before_its_body_is_read(admin_client, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_MB", {"gallery": 0.5})
+    monkeypatch.setattr(upload_service, "FORM_FIELDS_MAX_BYTES", 1024)
+    big = PNG + b"\0" * (1024 * 1024)
+
+    response = admin_client.post("/api/gallery", data={"title": "Too big"}, files={"image": ("big.png", big, "image/png")})
+    assert response.status_code == 413
+    assert "limited to 0.5 MB" in response.json()["detail"]
+
+    # Without a Content-Length the body stream is cut off once it passes the limit
+    boundary = "limit-test"
+    chunks = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="big.png"\r\n'
+        "Content-Type: image/png\r\n\r\n".encode(),
+        *[b"\0" * (64 * 1024)] * 32,
+        f"\r\n--{boundary}--\r\n".encode(),
+    ]
+    scope = {
+        "type": "http", "method": "POST", "path": "/api/gallery", "root_path": "", "query_string": b"",
+        "scheme": "http", "http_version": "1.1", "server": ("testserver", 80), "client": ("test", 1),
+        "headers": [(b"host", b"testserver"), (b"content-type", f"multipart/form-data; boundary={boundary}".encode())],
+    }
+    received, sent = [], []
+
+    async def receive():
+        chunk = chunks[len(received)]
+        received.append(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": len(received) < len(chunks)}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(main.app(scope, receive, send))
+    assert sent[0]["status"] == 413
+    assert len(received) < len(chunks)
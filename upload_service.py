@@ -0,0 +1,431 @@
+"""
+Upload service for saving files under uploads/
+
+Uploads are streamed in chunks to a temporary file, checked against the
+category's size limit and allowed types as they arrive, hashed
+incrementally, and atomically renamed into place once the transaction
+that references them commits. A rejected or interrupted upload, or one
+whose transaction fails, never leaves a file behind.
+
+Starlette spools the whole multipart body to disk before a handler runs, so
+UploadLimitMiddleware enforces the limits earlier: it answers 413 when the
+Content-Length of an upload request is over the route's limit, and stops
+reading the body once it grows past that limit.
+
+Streaming (receive_upload) runs on the event loop; storing the file and
+its database row (store_upload) is blocking, so async handlers run it
+with the rest of their database work through run_with_uploads.
+
+Files are content-addressed: each one is stored once, as
+uploads/files/<first 2 hex digits>/<sha256>.<ext>, and the stored_files
+table counts how many rows refer to it. Deleting or replacing an upload
+releases one reference, and the file is unlinked after the transaction
+that released its last reference commits.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from typing import Callable, Dict, Optional, Set, Tuple, TypeVar
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+
+from config import settings
+from database import SessionLocal
+from image_variants import schedule_variants, remove_variants
+from models import StoredFile, Department, BlogPost, GalleryImage, Document, SiteSettings
+
+T = TypeVar("T")
+
+UPLOAD_ROOT = "uploads"
+FILES_DIR = os.path.join(UPLOAD_ROOT, "files")
+
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "webp", "avif", "svg"}
+DOCUMENT_EXTENSIONS = {
+    "pdf", "doc", "docx", "xls", "xlsx", "ppt", "pptx", "txt", "rtf", "odt", "csv",
+} | IMAGE_EXTENSIONS
+
+# Allowed file extensions per upload category
+UPLOAD_CATEGORIES: Dict[str, Set[str]] = {
+    "gallery": IMAGE_EXTENSIONS,
+    "blog": IMAGE_EXTENSIONS,
+    "hero": IMAGE_EXTENSIONS,
+    "departments": IMAGE_EXTENSIONS,
+    "documents": DOCUMENT_EXTENSIONS,
+}
+
+# Columns that hold upload URLs, with the cache namespace of each model
+UPLOAD_COLUMNS = [
+    (Department, "image_url", "departments"),
+    (BlogPost, "image_url", "blog"),
+    (GalleryImage, "image_url", "gallery"),
+    (Document, "file_url", "documents"),
+    (SiteSettings, "hero_image_url", "settings"),
+    (SiteSettings, "hero_background_image_url", "settings"),
+]
+
+# Leading bytes of the raster image formats we accept
+IMAGE_SIGNATURES = (
+    b"\xff\xd8\xff",          # JPEG
+    b"\x89PNG\r\n\x1a\n",     # PNG
+    b"GIF87a", b"GIF89a",     # GIF
+)
+
+
+class StoredUpload:
+    """A file stored by store_upload"""
+
+    def __init__(self, sha256: str, url: str, size: int, content_type: Optional[str]):
+        self.sha256 = sha256
+        self.url = url
+        self.size = size
+        self.content_type = content_type
+
+    @property
+    def path(self) -> str:
+        return url_to_path(self.url)
+
+
+def url_to_path(url: str) -> str:
+    """Filesystem path of an /uploads/... URL"""
+    return url.replace("/uploads/", "uploads/", 1)
+
+
+def content_url(sha256: str, extension: str) -> str:
+    """URL a file with this digest is stored under"""
+    suffix = f".{extension}" if extension else ""
+    return f"/{UPLOAD_ROOT}/files/{sha256[:2]}/{sha256}{suffix}"
+
+
+def get_max_bytes(category: str) -> int:
+    """Size limit for a category (UPLOAD_MAX_MB, falling back to UPLOAD_MAX_MB_DEFAULT)"""
+    max_mb = settings.UPLOAD_MAX_MB.get(category, settings.UPLOAD_MAX_MB_DEFAULT)
+    return int(max_mb * 1024 * 1024)
+
+
+def get_extension(filename: Optional[str]) -> str:
+    return os.path.splitext(filename or "")[1].lower().lstrip(".")
+
+
+def _check_type(upload: UploadFile, category: str, extension: str) -> None:
+    allowed = UPLOAD_CATEGORIES[category]
+    if extension not in allowed:
+        raise HTTPException(
+            status_code=415,
+            detail=f"File type '.{extension}' is not allowed for {category} uploads",
+        )
+    content_type = (upload.content_type or "").split(";")[0].strip().lower()
+    if allowed is IMAGE_EXTENSIONS and content_type and not content_type.startswith("image/") \
+            and content_type != "application/octet-stream":
+        raise HTTPException(status_code=415, detail=f"Expected an image upload, got '{content_type}'")
+
+
+def _check_signature(head: bytes, category: str, extension: str) -> None:
+    """Reject image uploads that do not start with an image file signature"""
+    if UPLOAD_CATEGORIES[category] is not IMAGE_EXTENSIONS:
+        return
+    if extension in ("jpg", "jpeg", "png", "gif") and not head.startswith(IMAGE_SIGNATURES):
+        raise HTTPException(status_code=415, detail="Uploaded file is not a valid image")
+    if extension == "webp" and not (head[:4] == b"RIFF" and head[8:12] == b"WEBP"):
+        raise HTTPException(status_code=415, detail="Uploaded file is not a valid image")
+    if extension == "avif" and head[4:8] != b"ftyp":
+        raise HTTPException(status_code=415, detail="Uploaded file is not a valid image")
+
+
+class StagedUpload:
+    """An upload streamed to a temporary file by receive_upload, not yet stored"""
+
+    def __init__(self, temp_path: str, sha256: str, extension: str, size: int, content_type: Optional[str]):
+        self.temp_path = temp_path
+        self.sha256 = sha256
+        self.extension = extension
+        self.size = size
+        self.content_type = content_type
+
+    def discard(self) -> None:
+        """Remove the temporary file if it wasn't stored"""
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+async def receive_upload(upload: UploadFile, category: str) -> StagedUpload:
+    """
+    Stream an upload to a temporary file in the store, hashing it as it arrives.
+    Raises 413 if the file exceeds the category size limit and 415 if its type isn't allowed.
+    Touches no database, so it runs on the event loop; pass the result to store_upload.
+    """
+    extension = get_extension(upload.filename)
+    _check_type(upload, category, extension)
+
+    max_bytes = get_max_bytes(category)
+    if upload.size is not None and upload.size > max_bytes:
+        raise _too_large(category, max_bytes)
+
+    os.makedirs(FILES_DIR, exist_ok=True)
+    # Temporary file inside the store so the final rename stays on one filesystem
+    fd, temp_path = tempfile.mkstemp(dir=FILES_DIR, prefix=".upload-", suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while True:
+                chunk = await upload.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if size == 0:
+                    _check_signature(chunk, category, extension)
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(category, max_bytes)
+                digest.update(chunk)
+                await asyncio.to_thread(buffer.write, chunk)
+            await asyncio.to_thread(_flush, buffer)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return StagedUpload(temp_path, digest.hexdigest(), extension, size, upload.content_type)
+
+
+def store_upload(db: Session, staged: StagedUpload) -> StoredUpload:
+    """
+    Add a reference to a staged upload in the caller's transaction. The file is
+    moved into the content-addressed store after that transaction commits (and
+    discarded if it doesn't); identical files are only stored once.
+    Blocking (database): call it from a sync handler or the threadpool.
+    """
+    stored = StoredUpload(
+        staged.sha256, content_url(staged.sha256, staged.extension), staged.size, staged.content_type
+    )
+    # The file may already be stored under another extension
+    stored.url = add_file_reference(db, stored)
+    db.info.setdefault("staged_uploads", []).append((staged, stored.path))
+    return stored
+
+
+async def run_with_uploads(write: Callable[[], T], *staged: Optional[StagedUpload]) -> T:
+    """
+    Run a handler's database work (which stores the staged uploads) in the threadpool,
+    keeping the event loop free; temporary files it didn't store are removed afterwards.
+    """
+    try:
+        return await run_in_threadpool(write)
+    finally:
+        for upload in staged:
+            if upload is not None:
+                await asyncio.to_thread(upload.discard)
+
+
+def add_file_reference(db: Session, stored: StoredUpload) -> str:
+    """
+    Count one more row referring to a stored file, creating its index entry if needed.
+    Returns the URL the file is stored under.
+    """
+    row = db.get(StoredFile, stored.sha256)
+    if row is None:
+        try:
+            with db.begin_nested():
+                db.add(StoredFile(
+                    sha256=stored.sha256, url=stored.url, size=stored.size,
+                    content_type=stored.content_type, ref_count=1,
+                ))
+        except IntegrityError:
+            # A concurrent upload of the same file committed its entry first;
+            # a locking read sees it even under REPEATABLE READ
+            row = db.query(StoredFile).filter(StoredFile.sha256 == stored.sha256).with_for_update().one()
+        else:
+            schedule_variants(db, stored.sha256, stored.url)
+            return stored.url
+    row.ref_count = StoredFile.ref_count + 1
+    db.flush()
+    return row.url
+
+
+def release_upload(db: Session, url: Optional[str]) -> None:
+    """
+    Drop one reference to an uploaded file in the caller's transaction.
+    The file is deleted after commit once no row refers to it any more.
+    Files uploaded before content-addressed storage have no index entry and
+    belong to a single row, so they are always deleted.
+    """
+    if not url or not url.startswith(f"/{UPLOAD_ROOT}/"):
+        return
+    row = db.query(StoredFile).filter(StoredFile.url == url).first()
+    if row is not None:
+        row.ref_count = StoredFile.ref_count - 1
+        db.flush()
+        if row.ref_count > 0:
+            return
+        db.delete(row)
+        db.flush()
+    db.info.setdefault("released_uploads", set()).add(url)
+
+
+def _flush(buffer) -> None:
+    buffer.flush()
+    os.fsync(buffer.fileno())
+
+
+def _too_large(category: str, max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File is too large; {category} uploads are limited to {max_bytes / (1024 * 1024):g} MB",
+    )
+
+
+# Upload routes: path pattern -> (category, number of files the form can carry)
+UPLOAD_ROUTES = [
+    (re.compile(r"^/api/departments(/\d+)?$"), ("departments", 1)),
+    (re.compile(r"^/api/blog(/\d+)?$"), ("blog", 1)),
+    (re.compile(r"^/api/gallery$"), ("gallery", 1)),
+    (re.compile(r"^/api/documents$"), ("documents", 1)),
+    (re.compile(r"^/api/settings$"), ("hero", 2)),
+]
+# Allowance for the text fields sent alongside the files
+FORM_FIELDS_MAX_BYTES = 1024 * 1024
+
+
+def upload_body_limit(path: str) -> Optional[Tuple[str, int]]:
+    """(category, largest accepted request body) for an upload route, or None"""
+    for pattern, (category, files) in UPLOAD_ROUTES:
+        if pattern.match(path):
+            return category, get_max_bytes(category) * files + FORM_FIELDS_MAX_BYTES
+    return None
+
+
+class UploadLimitMiddleware:
+    """ASGI middleware rejecting oversized multipart uploads before their body is spooled"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        headers = Headers(scope=scope) if scope["type"] == "http" else None
+        route_limit = upload_body_limit(scope["path"]) if headers is not None else None
+        if route_limit is None or not headers.get("content-type", "").startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+        category, limit = route_limit
+        max_bytes = get_max_bytes(category)
+        content_length = headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse({"detail": _too_large(category, max_bytes).detail}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside form parsing, which FastAPI turns into the 413 response
+                    raise _too_large(category, max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _place_after_commit(session: Session) -> None:
+    for staged, path in session.info.pop("staged_uploads", ()):
+        try:
+            if os.path.exists(path):
+                staged.discard()
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(staged.temp_path, path)
+        except OSError as e:
+            print(f"Error storing upload {path}: {e}")
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _unlink_after_commit(session: Session) -> None:
+    urls = session.info.pop("released_uploads", None)
+    if not urls:
+        return
+    # Re-check in a new session: the same file may have been uploaded again
+    # (in this transaction or another one) after its last reference was released
+    with SessionLocal() as check:
+        still_used = {url for (url,) in check.query(StoredFile.url).filter(StoredFile.url.in_(urls))}
+    for url in urls - still_used:
+        path = url_to_path(url)
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+            remove_variants(path)
+        except OSError as e:
+            print(f"Error deleting upload {path}: {e}")
+
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def _forget_after_transaction_end(session: Session, transaction) -> None:
+    # after_commit has already handled a committed transaction; anything left was rolled back or
+    # abandoned. Savepoints (see add_file_reference) end inside the transaction, so they are skipped.
+    if transaction.parent is not None:
+        return
+    session.info.pop("released_uploads", None)
+    for staged, _ in session.info.pop("staged_uploads", ()):
+        staged.discard()
+
+
+def migrate_legacy_uploads(db: Session):
+    """
+    Move files uploaded before content-addressed storage into the store,
+    point their rows at the new URLs and count the references.
+    Duplicate files collapse into one. Returns (rows updated, files removed).
+    """
+    from cache import bump_content_version
+
+    moved = {}  # legacy url -> StoredUpload
+    namespaces = set()
+    updated = 0
+    for model, column, namespace in UPLOAD_COLUMNS:
+        attr = getattr(model, column)
+        for row in db.query(model).filter(attr.like(f"/{UPLOAD_ROOT}/%"), ~attr.like(f"/{UPLOAD_ROOT}/files/%")):
+            url = getattr(row, column)
+            if url not in moved:
+                path = url_to_path(url)
+                if not os.path.isfile(path):
+                    print(f"Skipping missing upload {path}")
+                    continue
+                moved[url] = _store_existing_file(db, path)
+            stored = moved[url]
+            add_file_reference(db, stored)
+            setattr(row, column, stored.url)
+            namespaces.add(namespace)
+            updated += 1
+
+    if namespaces:
+        bump_content_version(db, *namespaces)
+    db.commit()
+
+    for url in moved:
+        os.remove(url_to_path(url))
+    return updated, len(moved)
+
+
+def _store_existing_file(db: Session, path: str) -> StoredUpload:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(settings.UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    sha256 = digest.hexdigest()
+    existing = db.get(StoredFile, sha256)
+    url = existing.url if existing else content_url(sha256, get_extension(path))
+    target = url_to_path(url)
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Copy now, remove the original only after the new URLs are committed
+        shutil.copy2(path, target)
+    return StoredUpload(sha256, url, os.path.getsize(target), None)